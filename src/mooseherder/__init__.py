@@ -5,12 +5,26 @@ MOOSE Herder
 
 from mooseherder.inputmodifier import InputModifier
 from mooseherder.simrunner import SimRunner
+from mooseherder.simrunner import RunResult
 from mooseherder.mooserunner import MooseRunner
 from mooseherder.gmshrunner import GmshRunner
 from mooseherder.exodusreader import ExodusReader
 from mooseherder.mooseherd import MooseHerd
+from mooseherder.retrypolicy import RetryPolicy
+from mooseherder.jobscheduler import JobScheduler
+from mooseherder.jobscheduler import SlurmScheduler
+from mooseherder.jobscheduler import PBSScheduler
 from mooseherder.directorymanager import DirectoryManager
 from mooseherder.sweepreader import SweepReader
+from mooseherder.sweepdesign import SweepDesign
+from mooseherder.sweepdesign import FactorialDesign
+from mooseherder.sweepdesign import LatinHypercubeDesign
+from mooseherder.sweepdesign import HaltonDesign
+from mooseherder.sweepdesign import SobolDesign
+from mooseherder.sweepdesign import ZipDesign
+from mooseherder.sweepstore import SweepStoreWriter
+from mooseherder.adaptivesampler import AdaptiveSampler
+from mooseherder.sweeptelemetry import SweepTelemetry
 from mooseherder.simdata import SimData
 from mooseherder.simdata import SimReadConfig
 from mooseherder.mooseconfig import MooseConfig
@@ -22,7 +36,13 @@ __all__ = ["inputmodifier",
             "gmshrunner",
             "exodusreader",
             "mooseherd",
+            "retrypolicy",
+            "jobscheduler",
             "directorymanager",
             "sweepreader",
+            "sweepdesign",
+            "sweepstore",
+            "adaptivesampler",
+            "sweeptelemetry",
             "simdata",
             "mooseconfig"]
@@ -0,0 +1,404 @@
+'''
+===============================================================================
+AdaptiveSampler Class
+
+Authors: Lloyd Fletcher
+===============================================================================
+'''
+import functools
+from collections.abc import Callable
+from pathlib import Path
+import numpy as np
+from mooseherder.mooseherd import MooseHerd
+from mooseherder.exodusreader import ExodusReader
+from mooseherder.sweepdesign import UnitCubeDesign, LatinHypercubeDesign
+
+
+class AdaptiveSampler:
+    """ Sequential sampling driver for response surface and calibration
+    studies. An initial Latin hypercube batch is run with the herd, the chosen
+    responses (e.g. global variables at the last time step) are read from each
+    chain as it completes and a cubic radial basis function surrogate is
+    fitted to them. The leave-one-out error of the surrogate at each sampled
+    point is used as the local error estimate and the next batch is chosen
+    from random candidate points to maximise the distance to the nearest
+    sample times the error at that sample. Each batch is a new sweep of the
+    herd so the same DirectoryManager run directories are reused.
+    """
+    def __init__(self,
+                 herd: MooseHerd,
+                 chain_bounds: list[dict[str,tuple[float,float]] | None],
+                 glob_vars: list[str] | None = None,
+                 read_func: Callable[[list[Path | None]],
+                                     np.ndarray | None] | None = None,
+                 num_init: int = 8,
+                 batch_size: int = 4,
+                 num_candidates: int = 1000,
+                 seed: int | None = None) -> None:
+        """__init__
+
+        Args:
+            herd (MooseHerd): herd used to run each batch.
+            chain_bounds (list[dict[str,tuple[float,float]] | None]): for each
+                position in the simulation chain a dictionary of the lower and
+                upper bound for each variable to sample, see UnitCubeDesign.
+            glob_vars (list[str] | None, optional): names of the global
+                variables read from the last output of the chain at the last
+                time step as the responses. Defaults to None.
+            read_func (Callable[[list[Path | None]],np.ndarray | None] | None,
+                optional): function called in the herd worker with the output
+                paths of a chain that returns the responses as a 1D array or
+                None if the chain failed. Must be picklable. Overrides
+                glob_vars. Defaults to None.
+            num_init (int, optional): number of points in the initial Latin
+                hypercube batch. Defaults to 8.
+            batch_size (int, optional): number of points in each following
+                batch, usually a multiple of the number of parallel
+                simulations in the herd. Defaults to 4.
+            num_candidates (int, optional): number of random candidate points
+                scored to choose each batch. Defaults to 1000.
+            seed (int | None, optional): seed for the initial design and the
+                candidate points. Defaults to None.
+
+        Raises:
+            ValueError: neither glob_vars or read_func were given or the
+                number of initial points or batch size is less than 1.
+        """
+        if read_func is None and glob_vars is None:
+            raise ValueError('Either glob_vars or read_func must be given.')
+        if num_init < 1 or batch_size < 1:
+            raise ValueError('Initial points and batch size must be 1 or more.')
+
+        if read_func is None:
+            read_func = functools.partial(read_glob_vars,glob_vars=glob_vars)
+
+        self._herd = herd
+        self._chain_bounds = chain_bounds
+        self._read_func = read_func
+        self._num_init = num_init
+        self._batch_size = batch_size
+        self._num_candidates = num_candidates
+        self._seed = seed
+        self._rng = np.random.default_rng(seed)
+
+        self._design = _PointDesign(chain_bounds,np.zeros((1,0)))
+        self._num_dims = self._design.get_num_dims()
+
+        self._points = np.zeros((0,self._num_dims))
+        self._responses = np.zeros((0,0))
+        self._failed = np.zeros((0,self._num_dims))
+        self._var_lists = list([])
+        self._errors = np.zeros((0,))
+        self._surrogate = None
+
+
+    def get_var_lists(self) -> list[list[dict | None]]:
+        """get_var_lists
+
+        Returns:
+            list[list[dict | None]]: variable lists of the successfully run
+                chains in the order they were sampled.
+        """
+        return self._var_lists
+
+
+    def get_responses(self) -> np.ndarray:
+        """get_responses
+
+        Returns:
+            np.ndarray: responses as an NxR array where N is the number of
+                successful chains and R is the number of responses.
+        """
+        return self._responses
+
+
+    def get_error_estimates(self) -> np.ndarray:
+        """get_error_estimates: leave-one-out error of the surrogate at each
+        sampled point normalised by the standard deviation of each response.
+
+        Returns:
+            np.ndarray: error estimate for each successful chain.
+        """
+        return self._errors
+
+
+    def get_num_failed(self) -> int:
+        """get_num_failed
+
+        Returns:
+            int: number of chains that failed to give a response.
+        """
+        return self._failed.shape[0]
+
+
+    def run(self, max_sims: int, tol: float | None = None
+            ) -> tuple[list[list[dict | None]],np.ndarray]:
+        """run: runs the initial batch if it has not been run and then adds
+        batches until the total number of chains reaches max_sims or the
+        largest error estimate falls below the tolerance. Can be called again
+        with a larger max_sims to continue sampling.
+
+        Args:
+            max_sims (int): maximum total number of chains to run.
+            tol (float | None, optional): stop once the largest normalised
+                error estimate is below this value. Defaults to None which
+                runs max_sims chains.
+
+        Returns:
+            tuple[list[list[dict | None]],np.ndarray]: the variable lists and
+                responses of the successful chains, see get_var_lists and
+                get_responses.
+        """
+        if self._get_num_sims() == 0:
+            num_init = min(self._num_init,max_sims)
+            design = LatinHypercubeDesign(self._chain_bounds,num_init,
+                                          seed=self._seed)
+            self.run_batch(np.array([design.get_unit_point(ii)
+                                     for ii in range(num_init)]))
+
+        while self._get_num_sims() < max_sims:
+            if (tol is not None and self._errors.shape[0] > 0
+                and np.max(self._errors) < tol):
+                break
+
+            num_points = min(self._batch_size,max_sims-self._get_num_sims())
+            self.run_batch(self.propose(num_points))
+
+        return (self._var_lists,self._responses)
+
+
+    def run_batch(self, unit_points: np.ndarray) -> None:
+        """run_batch: runs one batch of chains with the herd, reads the
+        responses and refits the surrogate.
+
+        Args:
+            unit_points (np.ndarray): NxD array of points in the unit
+                hypercube to run where D is the number of sampled variables.
+        """
+        design = _PointDesign(self._chain_bounds,unit_points)
+        responses = list([None]*len(design))
+        # The herd resets its iteration counts when the sweep starts if
+        # keep_all is False so the sweep index is taken inside the loop
+        for (sim_iter,_,_,_,read_data) in self._herd.run_iter(
+            design,read_func=self._read_func):
+            responses[sim_iter-self._herd.get_sim_iter()] = read_data
+
+        for ii,rr in enumerate(responses):
+            if rr is None:
+                self._failed = np.vstack((self._failed,unit_points[ii,:]))
+                continue
+
+            rr = np.atleast_1d(np.asarray(rr,dtype=np.float64))
+            if self._responses.shape[0] == 0:
+                self._responses = np.zeros((0,rr.shape[0]))
+            self._points = np.vstack((self._points,unit_points[ii,:]))
+            self._responses = np.vstack((self._responses,rr))
+            self._var_lists.append(design.get_var_list(ii))
+
+        self._fit()
+
+
+    def propose(self, num_points: int) -> np.ndarray:
+        """propose: chooses the next batch of points from random candidates.
+        Points are picked one at a time, each picked point is treated as a
+        sample with the error of its nearest sample so that the batch spreads
+        out. Failed chains are treated as samples with no error so points are
+        not proposed next to them.
+
+        Args:
+            num_points (int): number of points to propose.
+
+        Returns:
+            np.ndarray: num_pointsxD array of points in the unit hypercube.
+        """
+        candidates = self._rng.random((self._num_candidates,self._num_dims))
+        sampled = np.vstack((self._points,self._failed))
+        if self._errors.shape[0] == self._points.shape[0]:
+            errors = self._errors
+        else:
+            errors = np.ones(self._points.shape[0])
+        errors = np.concatenate((errors,np.zeros(self._failed.shape[0])))
+
+        if sampled.shape[0] == 0:
+            return candidates[:num_points,:]
+
+        dists = _get_distances(candidates,sampled)
+        near_inds = np.argmin(dists,axis=1)
+        near_dists = dists[np.arange(dists.shape[0]),near_inds]
+        near_errors = errors[near_inds]
+        # Small error floor so the space keeps filling once errors are tiny
+        near_errors = near_errors + 1e-6
+
+        proposed = list([])
+        for _ in range(min(num_points,self._num_candidates)):
+            pick = int(np.argmax(near_dists*near_errors))
+            proposed.append(candidates[pick,:])
+
+            pick_dists = _get_distances(candidates,candidates[pick:pick+1,:])[:,0]
+            closer = pick_dists < near_dists
+            near_dists[closer] = pick_dists[closer]
+            near_errors[closer] = near_errors[pick]
+            near_dists[pick] = 0.0
+
+        return np.array(proposed)
+
+
+    def predict(self, var_lists: list[list[dict | None]]) -> np.ndarray:
+        """predict: evaluates the surrogate at the given variables.
+
+        Args:
+            var_lists (list[list[dict | None]]): variable lists with a value
+                for each variable in chain_bounds.
+
+        Raises:
+            ValueError: the surrogate has not been fitted.
+
+        Returns:
+            np.ndarray: NxR array of predicted responses.
+        """
+        if self._surrogate is None:
+            raise ValueError('No surrogate fitted, run the sampler first.')
+
+        unit_points = np.array([self._design.get_unit_point_from_vars(vv)
+                                for vv in var_lists])
+        return _eval_rbf(self._surrogate,unit_points)
+
+
+    def _get_num_sims(self) -> int:
+        return self._points.shape[0] + self._failed.shape[0]
+
+
+    def _fit(self) -> None:
+        """_fit: helper function that fits the surrogate to the normalised
+        responses and updates the error estimates. At least two successful
+        chains are needed, otherwise all errors are set to one.
+        """
+        num_points = self._points.shape[0]
+        if num_points < 2:
+            self._surrogate = None
+            self._errors = np.ones(num_points)
+            return
+
+        scale = np.std(self._responses,axis=0)
+        scale[scale == 0.0] = 1.0
+        (self._surrogate,self._errors) = _fit_rbf(self._points,
+                                                  self._responses,
+                                                  scale)
+
+
+class _PointDesign(UnitCubeDesign):
+    """ Design over a fixed set of points in the unit hypercube used to pass
+    each batch to the herd.
+    """
+    def __init__(self,
+                 chain_bounds: list[dict[str,tuple[float,float]] | None],
+                 unit_points: np.ndarray) -> None:
+        super().__init__(chain_bounds,max(unit_points.shape[0],1))
+        self._num_points = unit_points.shape[0]
+        self._unit_points = unit_points
+
+
+    def get_unit_point(self, sweep_ind: int) -> np.ndarray:
+        return self._unit_points[sweep_ind,:]
+
+
+    def get_unit_point_from_vars(self, var_list: list[dict | None]
+                                 ) -> np.ndarray:
+        values = np.array([var_list[jj][kk] for (jj,kk) in self._keys], # type: ignore
+                          dtype=np.float64)
+        return (values-self._lower)/(self._upper-self._lower)
+
+
+def read_glob_vars(output_list: list[Path | None],
+                   glob_vars: list[str],
+                   output_ind: int = -1,
+                   time_ind: int = -1) -> np.ndarray | None:
+    """read_glob_vars: reads global variables at one time step from an exodus
+    output of a simulation chain. Used as the default response reader for the
+    AdaptiveSampler.
+
+    Args:
+        output_list (list[Path | None]): output paths of the chain.
+        glob_vars (list[str]): names of the global variables to read.
+        output_ind (int, optional): position in the chain of the output to
+            read. Defaults to -1.
+        time_ind (int, optional): index of the time step. Defaults to -1.
+
+    Returns:
+        np.ndarray | None: the global variables in the order given or None if
+            the output does not exist.
+    """
+    output_path = output_list[output_ind]
+    if output_path is None or not output_path.is_file():
+        return None
+
+    reader = ExodusReader(output_path)
+    glob_array = reader.get_glob_vars_array(np.array(glob_vars),
+                                            time_inds=np.array([time_ind]))
+    if glob_array is None:
+        return None
+
+    return glob_array[0][0,:]
+
+
+def _get_distances(points_a: np.ndarray, points_b: np.ndarray) -> np.ndarray:
+    return np.sqrt(np.sum((points_a[:,np.newaxis,:]
+                           - points_b[np.newaxis,:,:])**2,axis=-1))
+
+
+def _get_poly_terms(points: np.ndarray, linear: bool) -> np.ndarray:
+    if linear:
+        return np.hstack((np.ones((points.shape[0],1)),points))
+    return np.ones((points.shape[0],1))
+
+
+def _fit_rbf(points: np.ndarray, responses: np.ndarray, scale: np.ndarray
+             ) -> tuple[dict[str,np.ndarray],np.ndarray]:
+    """_fit_rbf: helper function that fits a cubic radial basis function
+    interpolant with a polynomial tail, linear if there are enough points. The
+    leave-one-out errors are found without refitting using Rippa's formula.
+
+    Args:
+        points (np.ndarray): NxD sampled points in the unit hypercube.
+        responses (np.ndarray): NxR responses.
+        scale (np.ndarray): scale for each response used to normalise the
+            errors.
+
+    Returns:
+        tuple[dict[str,np.ndarray],np.ndarray]: the surrogate and the
+            normalised leave-one-out error at each point.
+    """
+    num_points = points.shape[0]
+    linear = num_points > points.shape[1]+1
+    poly = _get_poly_terms(points,linear)
+    num_poly = poly.shape[1]
+
+    system = np.zeros((num_points+num_poly,num_points+num_poly))
+    system[:num_points,:num_points] = _get_distances(points,points)**3
+    system[:num_points,num_points:] = poly
+    system[num_points:,:num_points] = poly.T
+
+    rhs = np.zeros((num_points+num_poly,responses.shape[1]))
+    rhs[:num_points,:] = responses
+    # Pseudo inverse as points can coincide e.g. when rerunning a point
+    system_inv = np.linalg.pinv(system)
+    coeffs = system_inv @ rhs
+
+    diag = np.diag(system_inv)[:num_points]
+    diag = np.where(np.abs(diag) > 0.0,diag,np.inf)
+    loo_errors = coeffs[:num_points,:]/diag[:,np.newaxis]/scale
+    errors = np.sqrt(np.mean(loo_errors**2,axis=1))
+
+    surrogate = {'points': points,
+                 'coeffs': coeffs,
+                 'linear': np.array(linear)}
+    return (surrogate,errors)
+
+
+def _eval_rbf(surrogate: dict[str,np.ndarray], unit_points: np.ndarray
+              ) -> np.ndarray:
+    points = surrogate['points']
+    coeffs = surrogate['coeffs']
+    phi = _get_distances(unit_points,points)**3
+    poly = _get_poly_terms(unit_points,bool(surrogate['linear']))
+    return phi @ coeffs[:points.shape[0],:] + poly @ coeffs[points.shape[0]:,:]
@@ -9,7 +9,10 @@ Authors: Lloyd Fletcher
 import os
 import shutil
 import json
+import tempfile
+from collections.abc import Iterable
 from pathlib import Path
+from mooseherder.simrunner import RunResult
 
 class DirectoryManager:
     """ Manages directories for running simulations in parallel with the
@@ -29,6 +32,12 @@ class DirectoryManager:
         self._output_paths = list([])
         self._output_key_tag = 'output-key'
         self._sweep_var_tag = 'sweep-vars'
+        self._journal_tag = 'sweep-journal'
+        self._run_results_tag = 'run-results'
+        self._task_dir_tag = 'cluster-tasks'
+        self._status_file = 'sweep-status.json'
+        self._cache_dir_name = 'sim-cache'
+        self._cache_entry_file = 'cache-entry.json'
 
 
     def _set_run_dirs(self) -> list[Path]:
@@ -234,21 +243,399 @@ class DirectoryManager:
 
 
     def write_sweep_vars(self,
-                         sweep_vars: list[list[dict | None]],
+                         sweep_vars: Iterable[list[dict | None]],
                          sweep_iter: int = 1) -> None:
         """write_sweep_vars: writes the sweep variable dictionary to a json
-        file to log the variables used for each simulation.
+        file to log the variables used for each simulation. The variables are
+        written one simulation chain per line as they are taken from the
+        iterable so a lazy SweepDesign is never expanded in memory.
 
         Args:
-            sweep_vars (list[list[dict[str, Any]]]): sweep variables as passed
-                to the herd to run.
+            sweep_vars (Iterable[list[dict | None]]): sweep variables as
+                passed to the herd to run.
             sweep_iter (int, optional): iteration number for number of calls to the
                 herd. Defaults to 1.
         """
         with open(self.get_sweep_var_file(sweep_iter), "w", encoding='utf-8') as okf:
-            json.dump(sweep_vars, okf, indent=4)
+            okf.write('[')
+            for ii,vv in enumerate(sweep_vars):
+                okf.write(('\n' if ii == 0 else ',\n') + json.dumps(vv))
+            okf.write('\n]\n')
 
 
+    def get_run_results_file(self, sweep_iter: int = 1) -> Path:
+        """get_run_results_file: gets the path to the file recording the run
+        results of each simulation chain for the given sweep iteration.
+
+        Args:
+            sweep_iter (int, optional): iteration number for the number of
+                calls to the herd. Defaults to 1.
+
+        Returns:
+            Path: path to the run results file.
+        """
+        return self._run_dirs[0] / f'{self._run_results_tag}-{sweep_iter:d}.json'
+
+
+    def write_run_results(self,
+                          run_results: list[list[RunResult] | None],
+                          sweep_iter: int = 1) -> None:
+        """write_run_results: writes the run results (status, exit code, wall
+        time, peak memory, stdout path and output file details) of each
+        simulation chain to a json file in the first run directory alongside
+        the output key.
+
+        Args:
+            run_results (list[list[RunResult] | None]): outer list is the
+                simulation iteration and the inner list the run result of each
+                position in the simulation chain.
+            sweep_iter (int, optional): iteration number for the number of
+                calls to the herd. Defaults to 1.
+        """
+        with open(self.get_run_results_file(sweep_iter),'w',encoding='utf-8') as rrf:
+            json.dump(run_results_to_dicts(run_results), rrf, indent=4)
+
+
+    def get_journal_file(self, sweep_iter: int = 1) -> Path:
+        """get_journal_file: gets the path to the journal file for the given
+        sweep iteration.
+
+        Args:
+            sweep_iter (int, optional): iteration number for the number of
+                calls to the herd. Defaults to 1.
+
+        Returns:
+            Path: path to the journal file.
+        """
+        return self._run_dirs[0] / f'{self._journal_tag}-{sweep_iter:d}.jsonl'
+
+
+    def start_journal(self, sweep_iter: int, sim_iter_start: int) -> None:
+        """start_journal: creates the journal file for a sweep overwriting any
+        existing journal for the same sweep iteration. The journal is a JSON
+        lines file where the first line records the simulation iteration at
+        the start of the sweep and each following line is appended as a
+        simulation chain completes so that the sweep can be resumed if the
+        herd crashes.
+
+        Args:
+            sweep_iter (int): iteration number for the number of calls to the
+                herd.
+            sim_iter_start (int): simulation iteration at the start of the
+                sweep.
+        """
+        with open(self.get_journal_file(sweep_iter),'w',encoding='utf-8') as jf:
+            jf.write(json.dumps({'sim_iter_start': sim_iter_start}) + '\n')
+            jf.flush()
+            os.fsync(jf.fileno())
+
+
+    def append_journal(self,
+                       sweep_iter: int,
+                       sweep_ind: int,
+                       output_list: list[Path | None],
+                       run_results: list[RunResult] | None = None) -> None:
+        """append_journal: appends a completed simulation chain to the journal
+        as a single line and flushes it to disk so that the journal is not lost
+        if the herd crashes.
+
+        Args:
+            sweep_iter (int): iteration number for the number of calls to the
+                herd.
+            sweep_ind (int): index of the simulation chain in the sweep.
+            output_list (list[Path | None]): paths to the outputs of the
+                simulation chain.
+            run_results (list[RunResult] | None, optional): run result of each
+                position in the simulation chain. Defaults to None.
+        """
+        entry = {'sweep_ind': sweep_ind,
+                 'outputs': output_paths_to_str([output_list])[0],
+                 'results': run_results_to_dicts([run_results])[0]}
+
+        with open(self.get_journal_file(sweep_iter),'a',encoding='utf-8') as jf:
+            jf.write(json.dumps(entry) + '\n')
+            jf.flush()
+            os.fsync(jf.fileno())
+
+
+    def read_journal(self, sweep_iter: int
+                     ) -> tuple[int,
+                                dict[int,list[Path | None]],
+                                dict[int,list[RunResult] | None]]:
+        """read_journal: reads the journal for the given sweep iteration. A
+        partially written last line (e.g. if the herd crashed while writing)
+        is ignored. If a chain appears more than once the last entry is used.
+
+        Args:
+            sweep_iter (int): iteration number for the number of calls to the
+                herd.
+
+        Raises:
+            FileNotFoundError: the journal file does not exist.
+
+        Returns:
+            tuple[int,dict[int,list[Path | None]],dict[int,list[RunResult] | None]]:
+                the simulation iteration at the start of the sweep, a
+                dictionary of output paths and a dictionary of run results both
+                keyed by the index of the completed chain in the sweep.
+        """
+        journal_file = self.get_journal_file(sweep_iter)
+        if not journal_file.is_file():
+            raise FileNotFoundError(
+                f'Journal for sweep iteration {sweep_iter} '+
+                f'not found at path: {journal_file}')
+
+        sim_iter_start = 0
+        completed = dict({})
+        completed_results = dict({})
+        with open(journal_file,'r',encoding='utf-8') as jf:
+            for line in jf:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+
+                if 'sim_iter_start' in entry:
+                    sim_iter_start = entry['sim_iter_start']
+                else:
+                    completed[entry['sweep_ind']] = \
+                        output_str_to_paths([entry['outputs']])[0]
+                    completed_results[entry['sweep_ind']] = \
+                        run_results_from_dicts([entry.get('results')])[0]
+
+        return (sim_iter_start,completed,completed_results)
+
+
+    def get_task_dir(self, sweep_iter: int = 1) -> Path:
+        """get_task_dir: gets the directory in the first run directory used
+        for the job script, scheduler logs and task results when a sweep is
+        run as a cluster job array, see MooseHerd.run_cluster.
+
+        Args:
+            sweep_iter (int, optional): iteration number for the number of
+                calls to the herd. Defaults to 1.
+
+        Returns:
+            Path: path to the task directory.
+        """
+        return self._run_dirs[0] / f'{self._task_dir_tag}-{sweep_iter:d}'
+
+
+    def write_task_result(self,
+                          sweep_iter: int,
+                          sweep_ind: int,
+                          output_list: list[Path | None],
+                          run_results: list[RunResult]) -> None:
+        """write_task_result: writes the outputs and run results of a
+        simulation chain run as a job array task to its own file in the task
+        directory. The file is written to a temporary file and renamed so it
+        is never read partially written.
+
+        Args:
+            sweep_iter (int): iteration number for the number of calls to the
+                herd.
+            sweep_ind (int): index of the simulation chain in the sweep.
+            output_list (list[Path | None]): paths to the outputs of the
+                simulation chain.
+            run_results (list[RunResult]): run result of each position in the
+                simulation chain.
+        """
+        task_file = self.get_task_dir(sweep_iter) / f'task-{sweep_ind:d}.json'
+        temp_file = task_file.with_suffix(f'.tmp-{os.getpid()}')
+        entry = {'outputs': output_paths_to_str([output_list])[0],
+                 'results': run_results_to_dicts([run_results])[0]}
+
+        with open(temp_file,'w',encoding='utf-8') as tf:
+            json.dump(entry,tf,indent=4)
+            tf.flush()
+            os.fsync(tf.fileno())
+        os.replace(temp_file,task_file)
+
+
+    def read_task_result(self, sweep_iter: int, sweep_ind: int
+                         ) -> tuple[list[Path | None],list[RunResult]] | None:
+        """read_task_result: reads the result of a simulation chain written by
+        write_task_result.
+
+        Args:
+            sweep_iter (int): iteration number for the number of calls to the
+                herd.
+            sweep_ind (int): index of the simulation chain in the sweep.
+
+        Returns:
+            tuple[list[Path | None],list[RunResult]] | None: the paths to the
+                outputs and the run results of the simulation chain, None if
+                the task has not written its result.
+        """
+        task_file = self.get_task_dir(sweep_iter) / f'task-{sweep_ind:d}.json'
+        if not task_file.is_file():
+            return None
+
+        with open(task_file,'r',encoding='utf-8') as tf:
+            entry = json.load(tf)
+
+        return (output_str_to_paths([entry['outputs']])[0],
+                run_results_from_dicts([entry['results']])[0]) # type: ignore
+
+
+    def get_status_file(self) -> Path:
+        """get_status_file: gets the path to the status file written in the
+        base directory while a sweep is running, see SweepTelemetry.
+
+        Returns:
+            Path: path to the status file.
+        """
+        return self._base_dir / self._status_file
+
+
+    def write_status(self, status: dict) -> None:
+        """write_status: writes the status of the running sweep to the status
+        file. The file is written to a unique temporary file and renamed so it
+        is never read partially written, even if several threads write it.
+
+        Args:
+            status (dict): sweep status that can be saved as json.
+        """
+        status_file = self.get_status_file()
+        (temp_fd,temp_name) = tempfile.mkstemp(prefix=status_file.name+'.',
+                                               suffix='.tmp',
+                                               dir=status_file.parent)
+        try:
+            with os.fdopen(temp_fd,'w',encoding='utf-8') as sf:
+                json.dump(status,sf,indent=4)
+            os.replace(temp_name,status_file)
+        except BaseException:
+            Path(temp_name).unlink(missing_ok=True)
+            raise
+
+
+    def read_sweep_vars(self, sweep_iter: int = 1) -> list[list[dict | None]]:
+        """read_sweep_vars: reads the sweep variables written for the given
+        sweep iteration.
+
+        Args:
+            sweep_iter (int, optional): iteration number for the number of
+                calls to the herd. Defaults to 1.
+
+        Raises:
+            FileNotFoundError: the sweep variable file does not exist.
+
+        Returns:
+            list[list[dict | None]]: sweep variables as passed to the herd.
+        """
+        sweep_var_file = self.get_sweep_var_file(sweep_iter)
+        if not sweep_var_file.is_file():
+            raise FileNotFoundError(
+                f'Sweep variable file for sweep iteration {sweep_iter} '+
+                f'not found at path: {sweep_var_file}')
+
+        with open(sweep_var_file,'r',encoding='utf-8') as svf:
+            return json.load(svf)
+
+
+    def get_cache_dir(self) -> Path:
+        """get_cache_dir: gets the path to the directory used to cache
+        simulation outputs keyed by a hash of the simulation inputs. The cache
+        directory sits next to the run directories in the base directory and
+        is not removed by clear_dirs().
+
+        Returns:
+            Path: path to the cache directory.
+        """
+        return self._base_dir / self._cache_dir_name
+
+
+    def clear_cache(self) -> None:
+        """clear_cache: deletes the cache directory and all cached outputs.
+        """
+        if self.get_cache_dir().is_dir():
+            shutil.rmtree(self.get_cache_dir())
+
+
+    def find_cached_outputs(self, cache_hash: str) -> list[Path | None] | None:
+        """find_cached_outputs: finds the cached outputs for a simulation
+        chain with the given input hash.
+
+        Args:
+            cache_hash (str): hash of the simulation chain inputs.
+
+        Returns:
+            list[Path | None] | None: paths to the cached outputs for each
+                position in the simulation chain. Returns None if there is
+                no valid cache entry for the hash.
+        """
+        entry_file = self.get_cache_dir() / cache_hash / self._cache_entry_file
+        if not entry_file.is_file():
+            return None
+
+        with open(entry_file,'r',encoding='utf-8') as ef:
+            output_names = json.load(ef)
+
+        output_paths = list([])
+        for nn in output_names:
+            if nn is None:
+                output_paths.append(None)
+            else:
+                output_path = entry_file.parent / nn
+                if not output_path.is_file():
+                    return None
+                output_paths.append(output_path)
+
+        return output_paths
+
+
+    def write_cached_outputs(self,
+                             cache_hash: str,
+                             output_paths: list[Path | None]) -> bool:
+        """write_cached_outputs: copies the outputs of a simulation chain into
+        the cache under the given input hash. Nothing is cached if any of the
+        outputs does not exist or is empty. The entry is written to a temporary
+        directory and then renamed so parallel workers never see a partial
+        entry.
+
+        Args:
+            cache_hash (str): hash of the simulation chain inputs.
+            output_paths (list[Path | None]): paths to the outputs for each
+                position in the simulation chain.
+
+        Returns:
+            bool: True if the outputs were added to the cache.
+        """
+        for oo in output_paths:
+            if oo is not None and (not oo.is_file() or oo.stat().st_size == 0):
+                return False
+
+        cache_dir = self.get_cache_dir()
+        entry_dir = cache_dir / cache_hash
+        if entry_dir.is_dir():
+            return False
+
+        cache_dir.mkdir(exist_ok=True)
+        temp_dir = cache_dir / f'.{cache_hash}-{os.getpid()}'
+        if temp_dir.is_dir():
+            shutil.rmtree(temp_dir)
+        temp_dir.mkdir()
+
+        output_names = list([])
+        for oo in output_paths:
+            if oo is None:
+                output_names.append(None)
+            else:
+                shutil.copy2(oo,temp_dir / oo.name)
+                output_names.append(oo.name)
+
+        with open(temp_dir / self._cache_entry_file,'w',encoding='utf-8') as ef:
+            json.dump(output_names,ef,indent=4)
+
+        try:
+            temp_dir.rename(entry_dir)
+        except OSError:
+            # Another worker cached the same inputs first
+            shutil.rmtree(temp_dir)
+            return False
+
+        return True
+
 
 def output_paths_to_str(output_files: list[list[Path | None]]
                         ) -> list[list[str | None]]:
@@ -300,3 +687,47 @@ def output_str_to_paths(output_files: list[list[str | None]]
         str_output.append(iter_output)
 
     return str_output
+
+
+def run_results_to_dicts(run_results: list[list[RunResult] | None]
+                         ) -> list[list[dict] | None]:
+    """run_results_to_dicts: helper function for converting the run results to
+    dictionaries to allow them to be saved as json.
+
+    Args:
+        run_results (list[list[RunResult] | None]): run results for each
+            simulation chain.
+
+    Returns:
+        list[list[dict] | None]: as input with RunResult converted to dict.
+    """
+    dict_results = list([])
+    for chain_results in run_results:
+        if chain_results is None:
+            dict_results.append(None)
+        else:
+            dict_results.append([rr.to_dict() for rr in chain_results])
+
+    return dict_results
+
+
+def run_results_from_dicts(run_results: list[list[dict] | None]
+                           ) -> list[list[RunResult] | None]:
+    """run_results_from_dicts: helper function to convert the run results read
+    from json to RunResult objects.
+
+    Args:
+        run_results (list[list[dict] | None]): run results as dictionaries.
+
+    Returns:
+        list[list[RunResult] | None]: as input with dict converted to
+            RunResult.
+    """
+    obj_results = list([])
+    for chain_results in run_results:
+        if chain_results is None:
+            obj_results.append(None)
+        else:
+            obj_results.append([RunResult.from_dict(rr) for rr in chain_results])
+
+    return obj_results
@@ -16,13 +16,83 @@ There are several different cases that lead to different MOOSE output formats.
 Authors: Lloyd Fletcher, Rory Spencer
 ===============================================================================
 """
+import time
+import functools
 from pathlib import Path
+from collections.abc import Callable, Mapping, Iterator
+from typing import Any
 import netCDF4 as nc
 import numpy as np
 from mooseherder.simdata import SimData, SimReadConfig
 from mooseherder.outputreader import OutputReader
 
 
+_read_profile = {'on': False, 'times': dict({}), 'child_times': list([])}
+""" Profiling state of the exodus reads in this process, see
+set_read_profiling.
+"""
+
+
+def set_read_profiling(profile: bool = True) -> None:
+    """set_read_profiling: turns on timing of the ExodusReader reads in this
+    process. Each read method records its own time in seconds excluding the
+    time spent in other timed read methods it calls, so the times add up to
+    the total read time. Used by the herd to time the read function when
+    profiling is turned on, see MooseHerd.set_profile_flag.
+
+    Args:
+        profile (bool, optional): True to time the reads. Defaults to True.
+    """
+    _read_profile['on'] = profile
+
+
+def pop_read_times() -> dict[str,float]:
+    """pop_read_times: gets the read times recorded since the last call and
+    clears them, see set_read_profiling.
+
+    Returns:
+        dict[str,float]: total time in seconds for each read method, opening
+            the exodus file is recorded as 'open'.
+    """
+    read_times = _read_profile['times']
+    _read_profile['times'] = dict({})
+    return read_times
+
+
+def _timed_read(read_key: str) -> Callable:
+    """_timed_read: decorator that records the time of an ExodusReader read
+    method under the given key when read profiling is turned on.
+
+    Args:
+        read_key (str): key used to record the time of the method.
+
+    Returns:
+        Callable: decorator for the read method.
+    """
+    def decorator(read_method: Callable) -> Callable:
+        @functools.wraps(read_method)
+        def timed_read(*args, **kwargs) -> Any:
+            if not _read_profile['on']:
+                return read_method(*args, **kwargs)
+
+            child_times = _read_profile['child_times']
+            child_times.append(0.0)
+            start_time = time.perf_counter()
+            try:
+                return read_method(*args, **kwargs)
+            finally:
+                read_time = time.perf_counter() - start_time
+                self_time = read_time - child_times.pop()
+                if len(child_times) > 0:
+                    child_times[-1] += read_time
+
+                read_times = _read_profile['times']
+                read_times[read_key] = read_times.get(read_key,0.0) + self_time
+
+        return timed_read
+    return decorator
+
+
 class ExodusReader(OutputReader):
     """Class to read exodus files output by MOOSE using the netCDF package.
     This class handles extracting the data from the exodus file and creates
@@ -30,6 +100,7 @@ class ExodusReader(OutputReader):
     by creating an ExodusReader and then calling either read_sim_data() or
     read_all_sim_data() specified at the bottom of the class.
     """
+    @_timed_read('open')
     def __init__(self, output_file: Path) -> None:
         """__init__: Construct class by reading the exodus file using the
         netCDF package. The exodus file must exist.
@@ -47,6 +118,33 @@ class ExodusReader(OutputReader):
         self._exodus_path = output_file
         self._data = nc.Dataset(str(self._exodus_path))
 
+        self._names = dict({})
+        self._name_inds = dict({})
+
+
+    def __getstate__(self) -> dict[str,Any]:
+        """__getstate__: the netCDF dataset cannot be pickled so it is dropped
+        and re-opened from the exodus path when the reader is unpickled. This
+        allows readers and lazy SimData objects to be passed between processes.
+
+        Returns:
+            dict[str,Any]: reader state without the open netCDF dataset.
+        """
+        state = self.__dict__.copy()
+        del state['_data']
+        return state
+
+
+    def __setstate__(self, state: dict[str,Any]) -> None:
+        """__setstate__: restores the reader state and re-opens the netCDF
+        dataset.
+
+        Args:
+            state (dict[str,Any]): reader state as returned by __getstate__.
+        """
+        self.__dict__.update(state)
+        self._data = nc.Dataset(str(self._exodus_path))
+
 
     def get_names(self, key: str | None) -> np.ndarray | None:
         """get_names: Extract a list of variable names from the dataset. Useful
@@ -61,19 +159,103 @@ class ExodusReader(OutputReader):
                 that correspond to the variables in the dataset. Returns None
                 if the specified key does not exist in the dataset.
         """
-        if key not in self._data.variables or key is None:
+        names = self._read_names(key)
+        if names is None:
+            return None
+
+        return names.copy()
+
+
+    def _read_names(self, key: str | None) -> np.ndarray | None:
+        """_read_names: helper function that decodes a table of names from the
+        dataset on first use and caches the result so that subsequent calls do
+        not need to decode the character array again.
+
+        Args:
+            key (str | None): string key used to extract a list of names from
+                the dataset e.g. 'name_nod_var'. If key is None returns None.
+
+        Returns:
+            np.ndarray | None: cached numpy array of strings. Returns None if
+                the specified key does not exist in the dataset.
+        """
+        if key is None:
+            return None
+
+        if key not in self._names:
+            if key not in self._data.variables:
+                self._names[key] = None
+            else:
+                self._names[key] = nc.chartostring(
+                    np.array(self._data.variables[key][:]))
+
+        return self._names[key]
+
+
+    def _get_name_inds(self, key: str) -> dict[str,int]:
+        """_get_name_inds: helper function that returns a dictionary mapping
+        each name in the specified table of names to its index in the dataset.
+        The dictionary is built on first use and then cached.
+
+        Args:
+            key (str): string key of the table of names e.g. 'name_nod_var'.
+
+        Returns:
+            dict[str,int]: dictionary keyed by name giving the zero based
+                index of the name in the dataset. Empty if the table of names
+                does not exist.
+        """
+        if key not in self._name_inds:
+            name_inds = dict({})
+            names = self._read_names(key)
+            if names is not None:
+                for ii,nn in enumerate(names):
+                    name_inds.setdefault(str(nn),ii)
+
+            self._name_inds[key] = name_inds
+
+        return self._name_inds[key]
+
+
+    def _get_name_key(self, name: str, names_key: str, key_tag: str
+                      ) -> str | None:
+        """_get_name_key: as get_key but uses the cached name index to find
+        the variable key instead of searching the array of names.
+
+        Args:
+            name (str): the specific name key that the user wants to extract.
+            names_key (str): string key of the table of names in the dataset
+                e.g. 'ss_names'.
+            key_tag (str): the string tag that is prepended to get the variable
+                from the dataset.
+
+        Returns:
+            str | None: the string key in the dataset to get the variable.
+                Returns None if the name does not exist.
+        """
+        ind = self._get_name_inds(names_key).get(str(name))
+        if ind is None:
             return None
 
-        return nc.chartostring(np.array(self._data.variables[key]))
+        return f'{key_tag}{ind+1:d}'
 
 
-    def get_var(self, key: str, time_inds: np.ndarray | None = None
+    def get_var(self, key: str,
+                time_inds: np.ndarray | None = None,
+                spat_inds: np.ndarray | None = None
                 ) -> np.ndarray:
-        """get_var: Extract a numeric variable from the dataset.
+        """get_var: Extract a numeric variable from the dataset. Only the
+        hyperslab specified by the time and spatial indices is read from disk.
 
         Args:
             key (str): key corresponding to the variable in the dataset. e.g.
                 'time_whole'
+            time_inds (np.ndarray | None, optional): indices of the time steps
+                to extract. Ignored if the variable does not vary in time.
+                Defaults to None which extracts all time steps.
+            spat_inds (np.ndarray | None, optional): indices of the nodes or
+                elements to extract. Defaults to None which extracts all nodes
+                or elements.
 
         Returns:
             np.ndarray: numpy numeric array containing the variable data.
@@ -81,12 +263,44 @@ class ExodusReader(OutputReader):
         if key not in self._data.variables:
             return np.array([])
 
-        data = np.array(self._data.variables[key]).T
+        var_slice = self._get_var_slice(key,time_inds,spat_inds)
+        return np.array(self._data.variables[key][var_slice]).T
 
-        if time_inds is None:
-            return data
 
-        return data[:,time_inds]
+    def _get_var_slice(self, key: str,
+                       time_inds: np.ndarray | None,
+                       spat_inds: np.ndarray | None) -> tuple:
+        """_get_var_slice: helper function to build the slice used to read a
+        hyperslab of a variable from the dataset. Time varying variables are
+        stored in the exodus file as TxN where T is the number of time steps
+        so the time indices are applied to the first dimension and the spatial
+        indices to the second.
+
+        Args:
+            key (str): key corresponding to the variable in the dataset.
+            time_inds (np.ndarray | None): indices of the time steps to
+                extract. If None all time steps are extracted.
+            spat_inds (np.ndarray | None): indices of the nodes or elements to
+                extract. If None all nodes or elements are extracted.
+
+        Returns:
+            tuple: slice to index the netCDF variable with.
+        """
+        dims = self._data.variables[key].dimensions
+        var_slice = [slice(None)]*len(dims)
+
+        if len(dims) == 0:
+            return tuple(var_slice)
+
+        if dims[0] == 'time_step':
+            if time_inds is not None:
+                var_slice[0] = time_inds
+            if spat_inds is not None and len(dims) > 1:
+                var_slice[1] = spat_inds
+        elif spat_inds is not None:
+            var_slice[0] = spat_inds
+
+        return tuple(var_slice)
 
 
     def get_key(self,
@@ -132,6 +346,7 @@ class ExodusReader(OutputReader):
         return names
 
 
+    @_timed_read('get_connectivity')
     def get_connectivity(self) -> dict[str,np.ndarray]:
         """get_connectivity: returns the connectivity table as a dictionary
         keyed with the name 'connectX' and the table itseld as numpy array.
@@ -163,6 +378,7 @@ class ExodusReader(OutputReader):
         return self.get_names('ss_names')
 
 
+    @_timed_read('get_sidesets')
     def get_sidesets(self, names: np.ndarray | None
                      ) -> dict[tuple[str,str], np.ndarray] | None:
         """get_sidesets: returns the sidesets as a dictionary keyed by a tuple
@@ -179,9 +395,7 @@ class ExodusReader(OutputReader):
                 first string being the sideset name and the second being either
                 'node' or 'elem'. Returns None if no sidesets found.
         """
-        all_names = self.get_sideset_names()
-
-        if names is None or all_names is None:
+        if names is None or self._read_names('ss_names') is None:
             return None
 
         node_key_tag = 'node_ns'
@@ -189,8 +403,8 @@ class ExodusReader(OutputReader):
 
         side_sets = dict({})
         for nn in names: # type: ignore
-            node_key = self.get_key(nn,all_names,node_key_tag)
-            elem_key = self.get_key(nn,all_names,elem_key_tag)
+            node_key = self._get_name_key(nn,'ss_names',node_key_tag)
+            elem_key = self._get_name_key(nn,'ss_names',elem_key_tag)
 
             if node_key is None:
                 side_sets[(nn,'node')] = None
@@ -205,6 +419,7 @@ class ExodusReader(OutputReader):
         return side_sets
 
 
+    @_timed_read('get_all_sidesets')
     def get_all_sidesets(self) -> dict[tuple[str,str], np.ndarray] | None:
         """get_all_sidesets: returns all sidesets as a dictionary keyed by a tuple
         of ('sideset_name', 'node' | 'elem'). Gives either the list of node
@@ -231,9 +446,11 @@ class ExodusReader(OutputReader):
         return self.get_names('name_nod_var')
 
 
+    @_timed_read('get_node_vars')
     def get_node_vars(self,
                       names: np.ndarray | None,
-                      time_inds: np.ndarray | None  = None
+                      time_inds: np.ndarray | None  = None,
+                      node_inds: np.ndarray | None = None
                       ) -> dict[str,np.ndarray] | None:
         """get_node_vars: gets the specified nodal variables as a dictionary
         keyed by the variable name (e.g. 'disp_x') where the nodal variable is
@@ -243,6 +460,10 @@ class ExodusReader(OutputReader):
         Args:
             names (np.ndarray | None): numpy array of strings that are the
                 variables to be extracted from the exodus dataset.
+            time_inds (np.ndarray | None, optional): indices of the time steps
+                to extract. Defaults to None which extracts all time steps.
+            node_inds (np.ndarray | None, optional): indices of the nodes to
+                extract. Defaults to None which extracts all nodes.
 
         Returns:
             dict[str,np.ndarray] | None: dictionary of requested nodal
@@ -253,18 +474,18 @@ class ExodusReader(OutputReader):
         if names is None:
             return None
 
-        all_names = self.get_node_var_names()
+        name_inds = self._get_name_inds('name_nod_var')
         key_tag = 'vals_nod_var'
         vars = dict({})
 
         for nn in names: # type: ignore
-            inds = np.where(all_names == nn)[0]
-            key = f'{key_tag}{inds[0]+1:d}'
-            vars[nn] = self.get_var(key,time_inds)
+            key = f'{key_tag}{name_inds[str(nn)]+1:d}'
+            vars[nn] = self.get_var(key,time_inds,node_inds)
 
         return vars
 
 
+    @_timed_read('get_all_node_vars')
     def get_all_node_vars(self) -> dict[str, np.ndarray] | None:
         """get_all_node_vars: as get_node_vars but returns all nodal variables
         found in the dataset. Gets all specified nodal variables as a dictionary
@@ -302,7 +523,7 @@ class ExodusReader(OutputReader):
         Returns:
             int: number of element blocks/sub-domains in the simulation.
         """
-        return self.get_names('eb_names').shape[0] # type: ignore
+        return self._read_names('eb_names').shape[0] # type: ignore
 
 
     def get_elem_var_names_and_blocks(self) -> list[tuple[str,int]] | None:
@@ -328,9 +549,11 @@ class ExodusReader(OutputReader):
         return names_blocks
 
 
+    @_timed_read('get_elem_vars')
     def get_elem_vars(self,
                       names_blocks: list[tuple[str,int]] | None,
-                      time_inds: np.ndarray | None = None
+                      time_inds: np.ndarray | None = None,
+                      elem_inds: np.ndarray | None = None
                       ) -> dict[tuple[str,int],np.ndarray] | None:
         """get_elem_vars: gets the element variables as a dictionary keyed by
         tuples which containg the element variable name and the block number.
@@ -342,27 +565,31 @@ class ExodusReader(OutputReader):
             names_blocks (list[tuple[str,int]] | None): list of tuples
                 containing the combination of element variables names and
                 blocks to be extracted from the dataset.
+            time_inds (np.ndarray | None, optional): indices of the time steps
+                to extract. Defaults to None which extracts all time steps.
+            elem_inds (np.ndarray | None, optional): indices of the elements
+                to extract within each block. Defaults to None which extracts
+                all elements.
 
         Returns:
             dict[tuple[str,int],np.ndarray] | None: contains the variables
                 requested keyed using the input names_blocks with the data
                 given as a numpy array.
         """
-        all_names = self.get_elem_var_names()
-
-        if all_names is None or names_blocks is None:
+        if self._read_names('name_elem_var') is None or names_blocks is None:
             return None
 
         key_tag = 'vals_elem_var'
 
         vars = dict({})
         for nn in names_blocks:
-            key = self.get_key(nn[0],all_names,key_tag) + f'eb{nn[1]:d}' # type: ignore
-            vars[nn] = self.get_var(key,time_inds)
+            key = self._get_name_key(nn[0],'name_elem_var',key_tag) + f'eb{nn[1]:d}' # type: ignore
+            vars[nn] = self.get_var(key,time_inds,elem_inds)
 
         return vars
 
 
+    @_timed_read('get_all_elem_vars')
     def get_all_elem_vars(self) -> dict[tuple[str,int], np.ndarray] | None:
         """get_all_elem_vars: gets all element variables as a dictionary keyed by
         tuples which containg the element variable name and the block number.
@@ -392,6 +619,7 @@ class ExodusReader(OutputReader):
         return self.get_names('name_glo_var')
 
 
+    @_timed_read('get_glob_vars')
     def get_glob_vars(self,
                       names: np.ndarray | None,
                       time_inds: np.ndarray | None  = None
@@ -405,31 +633,76 @@ class ExodusReader(OutputReader):
             names (np.ndarray | None): numpy array of strings specifying the
                 global variable names to extract from the dataset. If this is
                 None then return None.
+            time_inds (np.ndarray | None, optional): indices of the time steps
+                to extract. Defaults to None which extracts all time steps.
 
         Returns:
             dict[str, np.ndarray] | None: dictionary keyed with the global
                 variable names requested giving the data as a numpy array.
         """
-        all_names = self.get_glob_var_names()
-
-        if all_names is None or names is None:
+        glob_array = self.get_glob_vars_array(names,time_inds)
+        if glob_array is None:
             return None
 
-        key = 'vals_glo_var'
+        (data,col_inds) = glob_array
 
         glob_vars = dict({})
         for nn in names: # type: ignore
-            inds = np.where(all_names == nn)[0]
-            if time_inds is None:
-                glob_vars[nn] = np.array(self._data.variables[key][:,inds[0]])
-            else:
-                data = np.array(self._data.variables[key][:,inds[0]])
-                data = data[time_inds]
-                glob_vars[nn] = data
+            glob_vars[nn] = data[...,col_inds[str(nn)]]
 
         return glob_vars
 
 
+    @_timed_read('get_glob_vars_array')
+    def get_glob_vars_array(self,
+                            names: np.ndarray | None,
+                            time_inds: np.ndarray | None = None
+                            ) -> tuple[np.ndarray,dict[str,int]] | None:
+        """get_glob_vars_array: gets the specified global variables as a single
+        2D numpy array with dimensions TxG where T is the number of time steps
+        and G is the number of requested global variables. The global variable
+        table is read from the dataset in a single call and a dictionary
+        mapping the variable names to the column index is also returned.
+
+        Args:
+            names (np.ndarray | None): numpy array of strings specifying the
+                global variable names to extract from the dataset. If this is
+                None then return None.
+            time_inds (np.ndarray | None, optional): indices of the time steps
+                to extract. A single integer index gives a 1D array of length
+                G for that time step. Defaults to None which extracts all time
+                steps.
+
+        Returns:
+            tuple[np.ndarray,dict[str,int]] | None: the global variable data
+                as a TxG numpy array (or G for a single time index) with the
+                columns in the order of the requested names and a dictionary
+                keyed by the global variable name giving the column index in
+                the array. Returns None if there are no global variables in the
+                dataset.
+        """
+        if self._read_names('name_glo_var') is None or names is None:
+            return None
+
+        name_inds = self._get_name_inds('name_glo_var')
+        glob_inds = np.array([name_inds[str(nn)] for nn in names],dtype=int)
+
+        if time_inds is None:
+            time_inds = slice(None) # type: ignore
+
+        # Read all columns for the requested time steps in one call, the
+        # global variable table is small compared to the nodal variables
+        data = np.array(self._data.variables['vals_glo_var'][time_inds,:])
+        data = data[...,glob_inds]
+
+        col_inds = dict({})
+        for ii,nn in enumerate(names): # type: ignore
+            col_inds.setdefault(str(nn),ii)
+
+        return (data,col_inds)
+
+
+    @_timed_read('get_all_glob_vars')
     def get_all_glob_vars(self) -> dict[str, np.ndarray] | None:
         """get_all_glob_vars: gets all global variables as a dictionary
         keyed by the variable name specified in the MOOSE input file. The data
@@ -443,6 +716,7 @@ class ExodusReader(OutputReader):
         return self.get_glob_vars(self.get_glob_var_names())
 
 
+    @_timed_read('get_coords')
     def get_coords(self) -> tuple[np.ndarray,int]:
         """Gets the nodal coordinates in each spatial dimension setting any
         undefined dimensions to zeros.
@@ -492,23 +766,26 @@ class ExodusReader(OutputReader):
         return coord
 
 
+    @_timed_read('get_time')
     def get_time(self, time_inds: np.ndarray | None = None) -> np.ndarray:
         """Get a vector of simulation time steps.
 
+        Args:
+            time_inds (np.ndarray | None, optional): indices of the time steps
+                to extract. Defaults to None which extracts all time steps.
+
         Returns:
             np.array: returns an array with shape (T,) where T is the number
                 of time steps and the values of the elements are the simulation
                 time and each time step.
         """
-        time_steps = np.array([]
-                              )
-        if 'time_whole' in self._data.variables:
-            time_steps = np.array(self._data.variables['time_whole'])
+        if 'time_whole' not in self._data.variables:
+            return np.array([])
 
-            if time_inds is not None:
-                time_steps = time_steps[time_inds]
+        if time_inds is None:
+            time_inds = slice(None) # type: ignore
 
-        return time_steps
+        return np.array(self._data.variables['time_whole'][time_inds])
 
 
     def print_vars(self) -> None:
@@ -537,6 +814,7 @@ class ExodusReader(OutputReader):
         return read_config
 
 
+    @_timed_read('read_sim_data')
     def read_sim_data(self,
                       read_config: SimReadConfig) -> SimData:
         """read_sim_data: reads the simulation data based on the specified
@@ -570,6 +848,7 @@ class ExodusReader(OutputReader):
         return data
 
 
+    @_timed_read('read_all_sim_data')
     def read_all_sim_data(self) -> SimData:
         """read_all_sim_data: gets all simulation data from the exodus dataset.
 
@@ -588,3 +867,167 @@ class ExodusReader(OutputReader):
 
         return data
 
+
+    @_timed_read('read_lazy_sim_data')
+    def read_lazy_sim_data(self,
+                           read_config: SimReadConfig | None = None
+                           ) -> SimData:
+        """read_lazy_sim_data: as read_sim_data but the connectivity, sidesets
+        and the nodal, element and global variables are returned as read-only
+        mappings that read each entry from the exodus file only when it is
+        first indexed. Entries are cached after they have been read. The time
+        steps and coordinates are read immediately. The reader must remain
+        open for the lifetime of the returned SimData object, the mappings hold
+        a reference to this reader to ensure this.
+
+        Args:
+            read_config (SimReadConfig | None, optional): data class containing
+                the names of the variables that can be extracted from the
+                exodus dataset. Defaults to None which allows all variables in
+                the dataset to be read.
+
+        Returns:
+            SimData: data class containing the simulation data where the
+                connect, side_sets, node_vars, elem_vars and glob_vars fields
+                are ExodusVarMap objects or None.
+        """
+        if read_config is None:
+            read_config = self.get_read_config()
+
+        data = SimData()
+
+        if read_config.time:
+            data.time = self.get_time(read_config.time_inds)
+        if read_config.coords:
+            (data.coords,data.num_spat_dims) = self.get_coords()
+        if read_config.connect:
+            data.connect = ExodusVarMap(self,'connect',
+                                        self.get_connectivity_names())
+
+        if (read_config.sidesets is not None
+            and self._read_names('ss_names') is not None):
+            side_set_keys = list([])
+            for nn in read_config.sidesets:
+                side_set_keys = side_set_keys + [(nn,'node'),(nn,'elem')]
+            data.side_sets = ExodusVarMap(self,'side_set',side_set_keys)
+
+        if read_config.node_vars is not None:
+            data.node_vars = ExodusVarMap(self,'node',
+                                          read_config.node_vars,
+                                          read_config.time_inds)
+
+        if (read_config.elem_vars is not None
+            and self._read_names('name_elem_var') is not None):
+            data.elem_vars = ExodusVarMap(self,'elem',
+                                          read_config.elem_vars,
+                                          read_config.time_inds)
+
+        if (read_config.glob_vars is not None
+            and self._read_names('name_glo_var') is not None):
+            data.glob_vars = ExodusVarMap(self,'glob',
+                                          read_config.glob_vars,
+                                          read_config.time_inds)
+
+        return data
+
+
+class ExodusVarMap(Mapping):
+    """Read-only mapping used by ExodusReader.read_lazy_sim_data() in place of
+    the dictionaries in SimData. The keys are known when the mapping is
+    created but the data for each key is only read from the exodus file when
+    it is first indexed. Data that has been read is cached until clear_cache()
+    is called.
+    """
+    def __init__(self,
+                 reader: ExodusReader,
+                 var_type: str,
+                 keys: Any,
+                 time_inds: np.ndarray | None = None) -> None:
+        """__init__: Construct the mapping from an open exodus reader.
+
+        Args:
+            reader (ExodusReader): reader used to extract the data on access.
+            var_type (str): type of data in the mapping. One of 'connect',
+                'side_set', 'node', 'elem' or 'glob'.
+            keys (Any): iterable of keys as they would appear in the SimData
+                dictionary e.g. 'disp_x' for nodal variables or ('strain_xx',1)
+                for element variables.
+            time_inds (np.ndarray | None, optional): indices of the time steps
+                to extract. Defaults to None which extracts all time steps.
+
+        Raises:
+            ValueError: the variable type is not recognised.
+        """
+        if var_type not in ('connect','side_set','node','elem','glob'):
+            raise ValueError(f'Unknown exodus variable type: {var_type}')
+
+        self._reader = reader
+        self._var_type = var_type
+        self._keys = dict.fromkeys(keys)
+        self._time_inds = time_inds
+        self._cache = dict({})
+
+
+    def __getitem__(self, key: Any) -> np.ndarray:
+        if key not in self._keys:
+            raise KeyError(key)
+
+        if key not in self._cache:
+            self._cache[key] = self._read(key)
+
+        return self._cache[key]
+
+
+    def __iter__(self) -> Iterator:
+        return iter(self._keys)
+
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+
+    def _read(self, key: Any) -> np.ndarray:
+        """_read: helper function to extract the data for a single key from
+        the exodus file using the reader.
+
+        Args:
+            key (Any): key of the data to read.
+
+        Returns:
+            np.ndarray: data read from the exodus file.
+        """
+        if self._var_type == 'connect':
+            return self._reader.get_var(key)
+
+        if self._var_type == 'side_set':
+            return self._reader.get_sidesets(np.array([key[0]]))[key] # type: ignore
+
+        if self._var_type == 'node':
+            return self._reader.get_node_vars(np.array([key]),
+                                              self._time_inds)[key] # type: ignore
+
+        if self._var_type == 'elem':
+            return self._reader.get_elem_vars([key],
+                                              self._time_inds)[key] # type: ignore
+
+        return self._reader.get_glob_vars(np.array([key]),
+                                          self._time_inds)[key] # type: ignore
+
+
+    def is_cached(self, key: Any) -> bool:
+        """is_cached: checks if the data for the given key has been read.
+
+        Args:
+            key (Any): key of the data.
+
+        Returns:
+            bool: True if the data has been read from file and is cached.
+        """
+        return key in self._cache
+
+
+    def clear_cache(self) -> None:
+        """clear_cache: releases all cached data so that it will be read from
+        file again on the next access.
+        """
+        self._cache = dict({})
@@ -6,9 +6,17 @@ Authors: Rory Spencer, Lloyd Fletcher
 ===============================================================================
 '''
 import os
+import time
+import json
+import shutil
+import hashlib
 import subprocess
 from pathlib import Path
-from mooseherder.simrunner import SimRunner
+from mooseherder.simrunner import (SimRunner,
+                                   RunResult,
+                                   RUN_OK,
+                                   RUN_TIMED_OUT,
+                                   run_process)
 
 class GmshRunner(SimRunner):
     """Used to call gmsh to create a mesh file to be used to run a finite
@@ -28,6 +36,11 @@ class GmshRunner(SimRunner):
 
         self._input_path = None
         self._arg_list = []
+        self._timeout = None
+        self._run_result = None
+        self._mesh_cache = None
+        self._link_type = 'hard'
+        self._gmsh_version = None
 
     def set_gmsh_app(self, gmsh_app: Path) -> None: # type: ignore
         """Sets path to the gmsh app.
@@ -44,6 +57,177 @@ class GmshRunner(SimRunner):
         self._gmsh_app = gmsh_app
 
 
+    def set_timeout(self, timeout: float | None = None) -> None:
+        """set_timeout: sets the wall clock time after which gmsh is killed.
+
+        Args:
+            timeout (float | None, optional): timeout in seconds. Defaults to
+                None for no timeout.
+
+        Raises:
+            ValueError: the timeout is not positive.
+        """
+        if timeout is not None and timeout <= 0:
+            raise ValueError('Timeout must be positive or None.')
+
+        self._timeout = timeout
+
+
+    def get_timeout(self) -> float | None:
+        """get_timeout
+
+        Returns:
+            float | None: timeout in seconds or None for no timeout.
+        """
+        return self._timeout
+
+
+    def get_timed_out(self) -> bool:
+        """get_timed_out: whether the last run was killed because it exceeded
+        the timeout.
+
+        Returns:
+            bool: True if the last run timed out.
+        """
+        return (self._run_result is not None
+                and self._run_result.status == RUN_TIMED_OUT)
+
+
+    def get_run_result(self) -> RunResult | None:
+        """get_run_result: record of the last run including the exit code,
+        wall time, peak memory and stdout path.
+
+        Returns:
+            RunResult | None: record of the last run, None if not run yet.
+        """
+        return self._run_result
+
+
+    def set_mesh_cache(self,
+                       cache_dir: Path | None = None,
+                       link_type: str = 'hard') -> None:
+        """set_mesh_cache: sets the directory used to cache the files written
+        by gmsh (e.g. the *.msh mesh) keyed by a hash of the rendered *.geo
+        file and the gmsh version. If a run matches a cached entry the cached
+        files are linked into the directory of the *.geo file instead of
+        running gmsh. Only the *.geo file itself is hashed so any files it
+        includes or merges must not change between runs. Before gmsh is run
+        the files linked from the cache into the *.geo directory are removed
+        so that gmsh can never write through a link into the cache.
+
+        Args:
+            cache_dir (Path | None, optional): directory for the mesh cache,
+                created if it does not exist. Defaults to None which disables
+                the mesh cache.
+            link_type (str, optional): 'hard' to hard link the cached files
+                (falling back to a copy if the cache is on another file
+                system) or 'symbolic' to symlink them. Defaults to 'hard'.
+
+        Raises:
+            ValueError: the link type is not 'hard' or 'symbolic'.
+        """
+        if link_type not in ('hard','symbolic'):
+            raise ValueError("Link type must be 'hard' or 'symbolic'.")
+
+        self._mesh_cache = cache_dir
+        self._link_type = link_type
+
+
+    def get_mesh_cache(self) -> Path | None:
+        """get_mesh_cache
+
+        Returns:
+            Path | None: directory used for the mesh cache or None if the mesh
+                cache is disabled.
+        """
+        return self._mesh_cache
+
+
+    def get_gmsh_version(self) -> str:
+        """get_gmsh_version: gets the version string reported by the gmsh app.
+        The version is only read from gmsh once.
+
+        Returns:
+            str: gmsh version string, empty if it could not be read.
+        """
+        if self._gmsh_version is None:
+            try:
+                version = subprocess.run([str(self._gmsh_app),'--version'],
+                                         capture_output=True,
+                                         text=True,
+                                         timeout=60,
+                                         check=False)
+                self._gmsh_version = (version.stdout + version.stderr).strip()
+            except (OSError,subprocess.TimeoutExpired):
+                self._gmsh_version = ''
+
+        return self._gmsh_version
+
+
+    def _get_mesh_hash(self, arg_list: list[str]) -> str:
+        """_get_mesh_hash: helper function that hashes the gmsh version, the
+        command line options and the rendered *.geo file for the mesh cache.
+
+        Args:
+            arg_list (list[str]): gmsh command line without the input file.
+
+        Returns:
+            str: hex digest of the hash.
+        """
+        mesh_hash = hashlib.sha256()
+        mesh_hash.update(self.get_gmsh_version().encode('utf-8'))
+        mesh_hash.update(' '.join(arg_list[1:]).encode('utf-8'))
+        with open(self._input_path,'rb') as gf: # type: ignore
+            mesh_hash.update(hashlib.sha256(gf.read()).digest())
+
+        return mesh_hash.hexdigest()
+
+
+    def get_run_command(self, input_file: Path
+                        ) -> tuple[list[str],Path | None,float | None] | None:
+        """get_run_command: sets the input file and gets the command that run
+        would execute, see SimRunner. Returns None if the mesh cache is set as
+        run is needed to check the cache.
+
+        Args:
+            input_file (Path): path to the *.geo file.
+
+        Returns:
+            tuple[list[str],Path | None,float | None] | None: gmsh command
+                line, working directory (None) and the timeout.
+        """
+        if self._mesh_cache is not None:
+            return None
+
+        self.set_input_file(input_file)
+        if self._gmsh_app is None:
+            raise RuntimeError("Specify the full path to the gmsh app before calling run.")
+
+        self._arg_list = [str(self._gmsh_app),'-parse_and_exit',
+                          str(self._input_path)]
+        return (self._arg_list,None,self._timeout)
+
+
+    def set_run_result(self, run_result: RunResult) -> None:
+        """set_run_result: sets the record of a run started by the herd using
+        the command from get_run_command.
+
+        Args:
+            run_result (RunResult): record of the run.
+        """
+        self._run_result = run_result
+
+
+    def get_cache_key(self) -> str:
+        """get_cache_key: string describing the gmsh app used to build the
+        hash for caching simulation outputs.
+
+        Returns:
+            str: cache key string.
+        """
+        return f'GmshRunner:{self._gmsh_app}'
+
+
     def get_input_file(self) -> Path | None:
         """get_input_path: the path to the input file to run gmsh with.
 
@@ -103,9 +287,32 @@ class GmshRunner(SimRunner):
 
         print(f'arg_list={self._arg_list}')
 
-        subprocess.run(self._arg_list,
-                       shell=False,
-                       check=False)
+        if self._mesh_cache is None:
+            self._run_result = run_process(self._arg_list,
+                                           timeout=self._timeout)
+            return
+
+        run_start_time = time.perf_counter()
+        geo_dir = self._input_path.parent
+        entry_dir = self._mesh_cache / self._get_mesh_hash(arg_list)
+        if link_cached_meshes(entry_dir,geo_dir,self._link_type):
+            self._run_result = RunResult(
+                exit_code=0,wall_time=time.perf_counter()-run_start_time)
+            return
+
+        remove_linked_files(geo_dir)
+        dir_before = _snapshot_dir(geo_dir)
+
+        self._run_result = run_process(self._arg_list,
+                                       timeout=self._timeout)
+
+        if (self._run_result.status == RUN_OK and
+            self._run_result.exit_code == 0):
+            dir_after = _snapshot_dir(geo_dir)
+            mesh_files = [geo_dir / ff for ff in dir_after
+                          if dir_before.get(ff) != dir_after[ff]
+                          and geo_dir / ff != self._input_path]
+            write_cached_meshes(entry_dir,mesh_files)
 
 
     def get_output_path(self) -> Path | None:
@@ -118,3 +325,152 @@ class GmshRunner(SimRunner):
         """
         return None
 
+
+
+MESH_ENTRY_FILE = 'mesh-entry.json'
+""" Name of the file listing the cached files in a mesh cache entry.
+"""
+
+MESH_LINKS_FILE = '.mesh-links.json'
+""" Name of the file listing the files linked from the mesh cache into the
+directory of the *.geo file.
+"""
+
+def _snapshot_dir(check_dir: Path) -> dict[str,tuple[int,int,int]]:
+    """_snapshot_dir: helper function that records the inode, size and
+    modification time of every file in the directory so that files written
+    by gmsh can be found.
+
+    Args:
+        check_dir (Path): directory to snapshot.
+
+    Returns:
+        dict[str,tuple[int,int,int]]: inode, size and modification time in ns
+            keyed by file name.
+    """
+    snapshot = dict({})
+    for ff in check_dir.iterdir():
+        if ff.is_file() and not ff.is_symlink():
+            stat = ff.stat()
+            snapshot[ff.name] = (stat.st_ino,stat.st_size,stat.st_mtime_ns)
+
+    return snapshot
+
+
+def remove_linked_files(check_dir: Path) -> None:
+    """remove_linked_files: removes the files linked from the mesh cache into
+    the directory, as recorded by link_cached_meshes. Used before gmsh is run
+    so gmsh cannot write through the link into the cache. Other files in the
+    directory are not touched.
+
+    Args:
+        check_dir (Path): directory to clean.
+    """
+    links_file = check_dir / MESH_LINKS_FILE
+    if not links_file.is_file():
+        return
+
+    with open(links_file,'r',encoding='utf-8') as lf:
+        linked_names = json.load(lf)
+
+    for nn in linked_names:
+        linked = check_dir / nn
+        if linked.is_symlink() or linked.exists():
+            linked.unlink()
+
+    links_file.unlink()
+
+
+def link_cached_meshes(entry_dir: Path, link_dir: Path,
+                       link_type: str = 'hard') -> bool:
+    """link_cached_meshes: links the files in a mesh cache entry into the
+    given directory replacing any existing files with the same name. The
+    names of the linked files are recorded in the directory so that
+    remove_linked_files only removes these files.
+
+    Args:
+        entry_dir (Path): mesh cache entry directory.
+        link_dir (Path): directory to link the cached files into.
+        link_type (str, optional): 'hard' or 'symbolic'. Defaults to 'hard'.
+
+    Returns:
+        bool: True if the entry exists and all files were linked.
+    """
+    entry_file = entry_dir / MESH_ENTRY_FILE
+    if not entry_file.is_file():
+        return False
+
+    with open(entry_file,'r',encoding='utf-8') as ef:
+        mesh_names = json.load(ef)
+
+    for nn in mesh_names:
+        if not (entry_dir / nn).is_file():
+            return False
+
+    links_file = link_dir / MESH_LINKS_FILE
+    linked_names = list([])
+    if links_file.is_file():
+        with open(links_file,'r',encoding='utf-8') as lf:
+            linked_names = json.load(lf)
+    linked_names = linked_names + [nn for nn in mesh_names
+                                   if nn not in linked_names]
+    with open(links_file,'w',encoding='utf-8') as lf:
+        json.dump(linked_names,lf,indent=4)
+
+    for nn in mesh_names:
+        cached = entry_dir / nn
+        target = link_dir / nn
+        if target.is_symlink() or target.exists():
+            target.unlink()
+
+        if link_type == 'symbolic':
+            target.symlink_to(cached.resolve())
+        else:
+            try:
+                os.link(cached,target)
+            except OSError:
+                shutil.copy2(cached,target)
+
+    return True
+
+
+def write_cached_meshes(entry_dir: Path, mesh_files: list[Path]) -> bool:
+    """write_cached_meshes: copies the files written by gmsh into a mesh cache
+    entry. Nothing is cached if no files were written or any file is empty.
+    The entry is written to a temporary directory and then renamed so that
+    parallel workers never see a partial entry.
+
+    Args:
+        entry_dir (Path): mesh cache entry directory to create.
+        mesh_files (list[Path]): files written by gmsh.
+
+    Returns:
+        bool: True if the files were added to the cache.
+    """
+    if len(mesh_files) == 0 or entry_dir.is_dir():
+        return False
+
+    for mm in mesh_files:
+        if not mm.is_file() or mm.stat().st_size == 0:
+            return False
+
+    entry_dir.parent.mkdir(parents=True,exist_ok=True)
+    temp_dir = entry_dir.parent / f'.{entry_dir.name}-{os.getpid()}'
+    if temp_dir.is_dir():
+        shutil.rmtree(temp_dir)
+    temp_dir.mkdir()
+
+    for mm in mesh_files:
+        shutil.copy2(mm,temp_dir / mm.name)
+
+    with open(temp_dir / MESH_ENTRY_FILE,'w',encoding='utf-8') as ef:
+        json.dump([mm.name for mm in mesh_files],ef,indent=4)
+
+    try:
+        temp_dir.rename(entry_dir)
+    except OSError:
+        # Another worker cached the same mesh first
+        shutil.rmtree(temp_dir)
+        return False
+
+    return True
@@ -18,6 +18,10 @@ class InputModifier:
     Variable definition blocks should begin #comment character#* and end
     #comment character#**, e.g. //_* and //** for gmsh or #_* and #** for
     moose.
+
+    The input file is compiled into a template once on creation (a static
+    string between each variable value) so that writing a modified input file
+    only requires joining the template with the variable values.
     """
 
     def __init__(
@@ -57,8 +61,12 @@ class InputModifier:
         self._var_start_ind = 0
         self._var_end_ind = -1
 
+        self._template_static = list([])
+        self._template_keys = list([])
+
         self.find_vars()
         self.read_vars()
+        self._compile_template()
 
     def _extract_var_str(self, var_line: str) -> tuple[str, str | float | int, str]:
         """Helper function to split a string from the input file variable block
@@ -127,6 +135,55 @@ class InputModifier:
                 break
 
 
+    def _compile_template(self) -> None:
+        """Helper function that compiles the input file into a template. The
+        template is a list of variable keys, one per variable line in the
+        variable block, and a list of static strings that go before, between
+        and after the variable values. The static strings include everything
+        before and after the variable block.
+        """
+        self._template_static = list([])
+        self._template_keys = list([])
+
+        static = "".join(self._input_lines[: self._var_start_ind + 1])
+        var_block = self._input_lines[self._var_start_ind + 1 : self._var_end_ind]
+
+        for ll in var_block:
+            [var_key, _, com_str] = self._extract_var_str(ll)
+            if (len(var_key) != 0) and (var_key in self._vars):
+                self._template_static.append(static + f"{var_key} = ")
+                self._template_keys.append(var_key)
+                if len(com_str) == 0:
+                    static = f"{self._end_char}\n"
+                else:
+                    # NOTE: comment string includes the new line character already
+                    static = f"{self._end_char} {self._comment_char}{com_str}"
+            else:
+                static += ll
+
+        static += "".join(self._input_lines[self._var_end_ind :])
+        self._template_static.append(static)
+
+
+    def _check_var_keys(self, new_vars: dict) -> None:
+        """Helper function to check that all keys in the new variables exist
+        in the variables found in the input file.
+
+        Args:
+            new_vars (dict): new variables to check.
+
+        Raises:
+            KeyError: a key does not exist in the variables found in the input
+                file.
+        """
+        for kk in new_vars:
+            if kk not in self._vars:
+                raise KeyError(
+                    f"Key {kk} does not exist in the variables found in the input file. "
+                    + "Check input file to make sure the variable exists."
+                )
+
+
     def update_vars(self, new_vars: dict) -> None:
         """Updates the variable dictionary that will be written to the input
         file.
@@ -137,14 +194,35 @@ class InputModifier:
                 extracted from the input file. Only the variables to be edited
                 need to be present.
         """
-        for kk in new_vars:
-            if kk in self._vars:
-                self._vars[kk] = new_vars[kk]
-            else:
-                raise KeyError(
-                    f"Key {kk} does not exist in the variables found in the input file. "
-                    + "Check input file to make sure the variable exists."
-                )
+        self._check_var_keys(new_vars)
+        self._vars.update(new_vars)
+
+
+    def render(self, new_vars: dict | None = None) -> str:
+        """Renders the input file as a string using the current variable
+        dictionary with any new variables substituted. The variable dictionary
+        of the modifier is not changed.
+
+        Args:
+            new_vars (dict | None, optional): variables to substitute, as for
+                update_vars. Defaults to None which renders the current
+                variables.
+
+        Returns:
+            str: the contents of the modified input file.
+        """
+        render_vars = self._vars
+        if new_vars:
+            self._check_var_keys(new_vars)
+            render_vars = {**self._vars, **new_vars}
+
+        parts = list([])
+        for static, kk in zip(self._template_static, self._template_keys):
+            parts.append(static)
+            parts.append(str(render_vars[kk]))
+        parts.append(self._template_static[-1])
+
+        return "".join(parts)
 
 
     def write_file(self, input_write_file: Path) -> None:
@@ -153,21 +231,32 @@ class InputModifier:
         Args:
             input_write_file (str): Path to where the file should be written.
         """
-        var_block = self._input_lines[self._var_start_ind + 1 : self._var_end_ind]
+        with open(input_write_file, "w", encoding="utf-8") as out_file:
+            out_file.write(self.render())
 
-        for ii, ll in enumerate(var_block):
-            [var_key, _, com_str] = self._extract_var_str(ll)
-            if (len(var_key) != 0) and (var_key in self._vars):
-                if len(com_str) == 0:
-                    var_line = f"{var_key} = {self._vars[var_key]}{self._end_char}\n"
-                else:
-                    # NOTE: comment string includes the new line character already
-                    var_line = f"{var_key} = {self._vars[var_key]}{self._end_char} {self._comment_char}{com_str}"
-                line_ind = ii + self._var_start_ind + 1
-                self._input_lines[line_ind] = var_line
 
-        with open(input_write_file, "w", encoding="utf-8") as out_file:
-            out_file.writelines(self._input_lines)
+    def render_many(self, var_dicts: list[dict | None], paths: list[Path]) -> None:
+        """Writes one input file per variable dictionary. Each dictionary is
+        substituted into the current variables independently, as for render,
+        so the variable dictionary of the modifier is not changed.
+
+        Args:
+            var_dicts (list[dict | None]): variables to substitute for each
+                file. None writes the current variables.
+            paths (list[Path]): path to write each file to.
+
+        Raises:
+            ValueError: the number of variable dictionaries and paths differ.
+        """
+        if len(var_dicts) != len(paths):
+            raise ValueError(
+                f"Number of variable dictionaries ({len(var_dicts)}) does not "
+                + f"match the number of paths ({len(paths)})."
+            )
+
+        for vv, pp in zip(var_dicts, paths):
+            with open(pp, "w", encoding="utf-8") as out_file:
+                out_file.write(self.render(vv))
 
 
     def get_vars(self) -> dict:
@@ -0,0 +1,342 @@
+'''
+===============================================================================
+Job Scheduler Classes
+
+Authors: Lloyd Fletcher
+===============================================================================
+'''
+import sys
+import pickle
+import subprocess
+from abc import ABC, abstractmethod
+from pathlib import Path
+
+
+SLURM_UNKNOWN_JOB = ('Invalid job id',)
+PBS_UNKNOWN_JOB = ('Unknown Job Id','Job has finished')
+
+
+class JobSchedulerError(Exception):
+    """JobSchedulerError: custom error class for flagging errors submitting or
+    querying jobs on a cluster batch scheduler.
+    """
+
+class JobScheduler(ABC):
+    """JobScheduler: ABC for the cluster batch schedulers used by
+    MooseHerd.run_cluster. The herd writes a job script with the header from
+    the scheduler that runs one simulation chain per job array task, submits
+    it and then polls the scheduler until the job array has left the queue.
+    """
+    @abstractmethod
+    def get_script_header(self, job_name: str, n_tasks: int, log_dir: Path
+                          ) -> list[str]:
+        """get_script_header
+        """
+
+
+    @abstractmethod
+    def get_task_index_var(self) -> str:
+        """get_task_index_var
+        """
+
+
+    @abstractmethod
+    def submit(self, script_path: Path) -> str:
+        """submit
+        """
+
+
+    @abstractmethod
+    def is_active(self, job_id: str) -> bool:
+        """is_active
+        """
+
+
+    @abstractmethod
+    def cancel(self, job_id: str) -> None:
+        """cancel
+        """
+
+
+class SlurmScheduler(JobScheduler):
+    """SlurmScheduler: submits the herd job array to Slurm using sbatch and
+    polls it with squeue.
+    """
+    def __init__(self,
+                 options: list[str] | None = None,
+                 max_running: int | None = None,
+                 sbatch: str = 'sbatch',
+                 squeue: str = 'squeue',
+                 scancel: str = 'scancel') -> None:
+        """__init__
+
+        Args:
+            options (list[str] | None, optional): extra sbatch options added
+                to the job script e.g. ['--partition=short','--time=01:00:00',
+                '--cpus-per-task=4']. Defaults to None.
+            max_running (int | None, optional): maximum number of array tasks
+                running at once. Defaults to None for no limit.
+            sbatch (str, optional): sbatch command. Defaults to 'sbatch'.
+            squeue (str, optional): squeue command. Defaults to 'squeue'.
+            scancel (str, optional): scancel command. Defaults to 'scancel'.
+        """
+        self._options = options if options is not None else list([])
+        self._max_running = max_running
+        self._sbatch = sbatch
+        self._squeue = squeue
+        self._scancel = scancel
+
+
+    def get_script_header(self, job_name: str, n_tasks: int, log_dir: Path
+                          ) -> list[str]:
+        """get_script_header: gets the sbatch directives for the job array.
+
+        Args:
+            job_name (str): name of the job.
+            n_tasks (int): number of tasks in the job array.
+            log_dir (Path): directory for the task stdout/stderr logs.
+
+        Returns:
+            list[str]: lines of the job script header.
+        """
+        array = f'0-{n_tasks-1}'
+        if self._max_running is not None:
+            array = array + f'%{self._max_running}'
+
+        header = ['#!/bin/bash',
+                  f'#SBATCH --job-name={job_name}',
+                  f'#SBATCH --array={array}',
+                  f'#SBATCH --output={log_dir}/slurm-%A_%a.out']
+        return header + [f'#SBATCH {oo}' for oo in self._options]
+
+
+    def get_task_index_var(self) -> str:
+        """get_task_index_var
+
+        Returns:
+            str: environment variable holding the array task index.
+        """
+        return 'SLURM_ARRAY_TASK_ID'
+
+
+    def submit(self, script_path: Path) -> str:
+        """submit: submits the job script with sbatch.
+
+        Args:
+            script_path (Path): path to the job script.
+
+        Raises:
+            JobSchedulerError: sbatch failed.
+
+        Returns:
+            str: id of the submitted job.
+        """
+        return _run_command([self._sbatch,'--parsable',str(script_path)]
+                            ).split(';')[0]
+
+
+    def is_active(self, job_id: str) -> bool:
+        """is_active: whether any task of the job is still pending or running.
+        The job has left the queue if squeue lists no tasks or reports an
+        invalid job id.
+
+        Args:
+            job_id (str): id of the job.
+
+        Raises:
+            JobSchedulerError: squeue failed for any other reason (e.g. the
+                controller timed out), the job state is unknown.
+
+        Returns:
+            bool: True if the job is still in the queue.
+        """
+        return _query_command([self._squeue,'-h','-j',job_id,'-o','%i'],
+                              SLURM_UNKNOWN_JOB)
+
+
+    def cancel(self, job_id: str) -> None:
+        """cancel: cancels all tasks of the job.
+
+        Args:
+            job_id (str): id of the job.
+        """
+        subprocess.run([self._scancel,job_id],capture_output=True,check=False)
+
+
+class PBSScheduler(JobScheduler):
+    """PBSScheduler: submits the herd job array to PBS Pro using qsub and
+    polls it with qstat.
+    """
+    def __init__(self,
+                 options: list[str] | None = None,
+                 qsub: str = 'qsub',
+                 qstat: str = 'qstat',
+                 qdel: str = 'qdel') -> None:
+        """__init__
+
+        Args:
+            options (list[str] | None, optional): extra qsub options added to
+                the job script e.g. ['-l select=1:ncpus=4',
+                '-l walltime=01:00:00']. Defaults to None.
+            qsub (str, optional): qsub command. Defaults to 'qsub'.
+            qstat (str, optional): qstat command. Defaults to 'qstat'.
+            qdel (str, optional): qdel command. Defaults to 'qdel'.
+        """
+        self._options = options if options is not None else list([])
+        self._qsub = qsub
+        self._qstat = qstat
+        self._qdel = qdel
+
+
+    def get_script_header(self, job_name: str, n_tasks: int, log_dir: Path
+                          ) -> list[str]:
+        """get_script_header: gets the PBS directives for the job array. PBS
+        job arrays need at least two tasks so a single task array is submitted
+        as two tasks and the extra task does nothing.
+
+        Args:
+            job_name (str): name of the job.
+            n_tasks (int): number of tasks in the job array.
+            log_dir (Path): directory for the task stdout/stderr logs.
+
+        Returns:
+            list[str]: lines of the job script header.
+        """
+        header = ['#!/bin/bash',
+                  f'#PBS -N {job_name}',
+                  f'#PBS -J 0-{max(n_tasks-1,1)}',
+                  '#PBS -j oe',
+                  f'#PBS -o {log_dir}/']
+        return header + [f'#PBS {oo}' for oo in self._options]
+
+
+    def get_task_index_var(self) -> str:
+        """get_task_index_var
+
+        Returns:
+            str: environment variable holding the array task index.
+        """
+        return 'PBS_ARRAY_INDEX'
+
+
+    def submit(self, script_path: Path) -> str:
+        """submit: submits the job script with qsub.
+
+        Args:
+            script_path (Path): path to the job script.
+
+        Raises:
+            JobSchedulerError: qsub failed.
+
+        Returns:
+            str: id of the submitted job.
+        """
+        return _run_command([self._qsub,str(script_path)])
+
+
+    def is_active(self, job_id: str) -> bool:
+        """is_active: whether any task of the job is still queued or running.
+        The job has left the queue if qstat reports an unknown or finished
+        job id.
+
+        Args:
+            job_id (str): id of the job.
+
+        Raises:
+            JobSchedulerError: qstat failed for any other reason (e.g. the
+                server could not be contacted), the job state is unknown.
+
+        Returns:
+            bool: True if the job is still in the queue.
+        """
+        return _query_command([self._qstat,job_id],PBS_UNKNOWN_JOB)
+
+
+    def cancel(self, job_id: str) -> None:
+        """cancel: cancels all tasks of the job.
+
+        Args:
+            job_id (str): id of the job.
+        """
+        subprocess.run([self._qdel,job_id],capture_output=True,check=False)
+
+
+def _run_command(arg_list: list[str]) -> str:
+    """_run_command: helper function that runs a scheduler command and
+    returns its stdout.
+
+    Args:
+        arg_list (list[str]): command and arguments to run.
+
+    Raises:
+        JobSchedulerError: the command failed.
+
+    Returns:
+        str: stripped stdout of the command.
+    """
+    try:
+        proc = subprocess.run(arg_list,capture_output=True,text=True,
+                              check=False)
+    except OSError as err:
+        raise JobSchedulerError(f'Failed to run {arg_list[0]}: {err}') from err
+
+    if proc.returncode != 0:
+        raise JobSchedulerError(f'{arg_list[0]} failed with exit code '
+                                f'{proc.returncode}: {proc.stderr.strip()}')
+
+    return proc.stdout.strip()
+
+
+def _query_command(arg_list: list[str], unknown_job: tuple[str, ...]
+                   ) -> bool:
+    """_query_command: helper function that runs a scheduler queue query. The
+    schedulers return an error for job ids that have left the queue, only
+    errors containing one of the unknown job messages are taken to mean the
+    job has finished.
+
+    Args:
+        arg_list (list[str]): command and arguments to run.
+        unknown_job (tuple[str, ...]): messages the scheduler gives for job
+            ids that have left the queue, matched ignoring case.
+
+    Raises:
+        JobSchedulerError: the command could not be run or failed with an
+            error other than an unknown job.
+
+    Returns:
+        bool: True if the command succeeded and listed the job.
+    """
+    try:
+        proc = subprocess.run(arg_list,capture_output=True,text=True,
+                              check=False)
+    except OSError as err:
+        raise JobSchedulerError(f'Failed to run {arg_list[0]}: {err}') from err
+
+    if proc.returncode == 0:
+        return proc.stdout.strip() != ''
+
+    message = (proc.stderr + proc.stdout).lower()
+    if any(uu.lower() in message for uu in unknown_job):
+        return False
+
+    raise JobSchedulerError(f'{arg_list[0]} failed with exit code '
+                            f'{proc.returncode}: {proc.stderr.strip()}')
+
+
+def run_task(herd_file: Path, task_ind: int) -> None:
+    """run_task: runs one simulation chain of a sweep submitted with
+    MooseHerd.run_cluster. Called by each job array task using:
+    'python -m mooseherder.jobscheduler <herd file> <task index>'.
+
+    Args:
+        herd_file (Path): path to the herd saved by MooseHerd.run_cluster.
+        task_ind (int): index of the job array task.
+    """
+    with open(herd_file,'rb') as hf:
+        herd = pickle.load(hf)
+
+    herd.run_task(task_ind)
+
+
+if __name__ == '__main__':
+    run_task(Path(sys.argv[1]),int(sys.argv[2]))
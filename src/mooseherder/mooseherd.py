@@ -6,14 +6,39 @@ Authors: Lloyd Fletcher, Rory Spencer
 ===============================================================================
 '''
 import os
+import sys
+import copy
 import time
+import queue
+import shlex
+import signal
+import pickle
+import asyncio
+import heapq
+import hashlib
+import itertools
+import threading
 import multiprocessing as mp
+from typing import Any
+from collections.abc import Callable, Iterable, Iterator
 from pathlib import Path
 from multiprocessing.pool import Pool
 
 from mooseherder.directorymanager import DirectoryManager
-from mooseherder.simrunner import SimRunner
+from mooseherder.simrunner import (SimRunner,
+                                   RunResult,
+                                   RUN_OK,
+                                   RUN_FAILED,
+                                   RUN_TIMED_OUT,
+                                   RUN_SKIPPED,
+                                   RUN_CANCELLED,
+                                   run_process_async)
 from mooseherder.inputmodifier import InputModifier
+from mooseherder.exodusreader import set_read_profiling, pop_read_times
+from mooseherder.retrypolicy import RetryPolicy
+from mooseherder.jobscheduler import JobScheduler, JobSchedulerError
+from mooseherder.sweepdesign import SweepDesign
+from mooseherder.sweeptelemetry import SweepTelemetry
 
 
 class MooseHerdError(Exception):
@@ -63,6 +88,35 @@ class MooseHerd:
 
         self._sim_iter = 0
         self._iter_run_time = -1.0
+        self._iter_results = list([])
+
+        self._worker_num = None
+
+        self._core_budget = None
+        self._cpu_sets = None
+
+        self._use_cache = False
+
+        self._retry_policies = None
+
+        self._pipeline = False
+
+        self._batch_size = 1
+
+        self._sweep_stopped = False
+
+        self._telemetry = None
+
+        self._profile = False
+        self._render_times = list([])
+
+
+    def __getstate__(self) -> dict[str,Any]:
+        # The telemetry holds threads and a server so stays with the herd
+        # that is running the sweep
+        state = self.__dict__.copy()
+        state['_telemetry'] = None
+        return state
 
 
     def set_input_copy_names(self, input_names: list[str] | None = None) -> None:
@@ -103,6 +157,152 @@ class MooseHerd:
         self._keep_all = keep_all
 
 
+    def set_cache_flag(self, use_cache: bool = True) -> None:
+        """set_cache_flag: flag used to skip running simulation chains whose
+        inputs have already been run. The outputs are cached in the directory
+        manager's cache directory keyed by a hash of the rendered input files
+        and the runner options. If an identical chain is found in the cache the
+        path to the cached output is returned instead of running the chain.
+
+        Args:
+            use_cache (bool, optional): True = use the output cache. Defaults
+                to True.
+        """
+        self._use_cache = use_cache
+
+
+    def set_profile_flag(self, profile: bool = True) -> None:
+        """set_profile_flag: flag used to record where the time goes in each
+        simulation chain. The timings are recorded in seconds in the run
+        result of each position in the chain (RunResult.timings) and written
+        with the run results so they can be read as a table across the sweep
+        using SweepReader.read_timings. The stages are:
+        'render' writing the input file, 'run' all attempts of the runner
+        including retries, 'run:<section>' the sections of the run reported
+        by the runner (see SimRunner.get_timings and
+        MooseRunner.set_timing_flag) and, on the last position, 'read' the
+        read function passed to run_para/run_iter with 'read:<method>' the
+        time spent in each ExodusReader read method.
+
+        Args:
+            profile (bool, optional): True = record the stage timings.
+                Defaults to True.
+        """
+        self._profile = profile
+
+
+    def set_retry_policies(self,
+                           policies: list[RetryPolicy | None] | None = None
+                           ) -> None:
+        """set_retry_policies: sets the retry policy for each position in the
+        simulation chain. Runs that fail are retried within the herd worker
+        that ran them, optionally with degraded input variables or runner
+        options, before moving on to the next position in the chain.
+
+        Args:
+            policies (list[RetryPolicy | None] | None, optional): one retry
+                policy per SimRunner in the chain, None for no retries at that
+                position. Defaults to None which disables retries.
+
+        Raises:
+            MooseHerdError: the length of the policy list does not match the
+                length of the simulation chain.
+        """
+        if policies is not None and len(policies) != len(self._runners):
+            raise MooseHerdError(f'The length of the retry policies ({len(policies)})'
+                                 ' must match the length of the sim runners '
+                                 f'({len(self._runners)})')
+
+        self._retry_policies = policies
+
+
+    def get_retry_policies(self) -> list[RetryPolicy | None] | None:
+        """get_retry_policies
+
+        Returns:
+            list[RetryPolicy | None] | None: retry policy for each position in
+                the simulation chain or None if retries are disabled.
+        """
+        return self._retry_policies
+
+
+    def set_pipeline_flag(self, pipeline: bool = True) -> None:
+        """set_pipeline_flag: flag used to run each position in the simulation
+        chain as its own task when running in parallel. The input files for a
+        chain are written by the main process and the chain stages are queued
+        on the workers as their dependencies complete. Later stages are always
+        run first when they are ready so earlier stages (e.g. gmsh meshing)
+        for upcoming chains fill the workers while later stages (e.g. MOOSE
+        solves) are waiting for their inputs. Each chain in progress has its
+        own run directory so that files written with fixed names (e.g. the
+        gmsh mesh) are not overwritten by another chain. The number of chains
+        in progress is therefore the number of directories in the directory
+        manager, use more directories than parallel simulations to allow the
+        earlier stages to run ahead.
+
+        Args:
+            pipeline (bool, optional): True = run the chain stages as separate
+                tasks. Defaults to True.
+        """
+        self._pipeline = pipeline
+
+
+    def set_batch_size(self, batch_size: int = 1) -> None:
+        """set_batch_size: sets the number of simulation chains each worker
+        runs together as a batch. The chains in a batch are run position by
+        position and positions whose runner supports batching (e.g.
+        MooseRunner.run_batch) run all chains in the batch with one call to
+        the runner so the runner start up cost is only paid once per batch.
+        Runs that do not complete in a batch are rerun on their own, with
+        retries if a retry policy is set, so one failing chain does not fail
+        the rest of the batch. Each chain in a batch runs in its own
+        sub-directory ('batch-1', 'batch-2' etc.) of the worker's run
+        directory so that files written with fixed names (e.g. the gmsh mesh)
+        are not overwritten. Batching is not used when the herd is pipelined.
+
+        Args:
+            batch_size (int, optional): number of simulation chains per batch.
+                Defaults to 1 which runs each chain on its own.
+
+        Raises:
+            MooseHerdError: the batch size is less than 1.
+        """
+        if batch_size < 1:
+            raise MooseHerdError('Batch size must be 1 or more.')
+
+        self._batch_size = int(batch_size)
+
+
+    def get_batch_size(self) -> int:
+        """get_batch_size
+
+        Returns:
+            int: number of simulation chains per batch.
+        """
+        return self._batch_size
+
+
+    def set_telemetry(self, telemetry: SweepTelemetry | None = None) -> None:
+        """set_telemetry: sets the telemetry used to report the progress of
+        sweeps run with run_sequential, run_para, run_iter and run_async, see
+        SweepTelemetry. The telemetry is not sent to the herd workers.
+
+        Args:
+            telemetry (SweepTelemetry | None, optional): telemetry to update
+                while sweeps run. Defaults to None for no telemetry.
+        """
+        self._telemetry = telemetry
+
+
+    def get_telemetry(self) -> SweepTelemetry | None:
+        """get_telemetry
+
+        Returns:
+            SweepTelemetry | None: telemetry updated while sweeps run.
+        """
+        return self._telemetry
+
+
     def set_num_para_sims(self, n_para: int = 1) -> None:
         """set_num_para_sims: sets the number of simulation chains to run in
         parallel. Limits the number
@@ -124,6 +324,112 @@ class MooseHerd:
             self._n_para_sims = n_para
 
 
+    def set_core_budget(self, cores: int | list[int] | None = None) -> None:
+        """set_core_budget: sets the cores the herd is allowed to use when
+        running in parallel. The budget is divided into disjoint cpu sets with
+        enough cores for the most demanding runner in the simulation chain (
+        e.g. MPI tasks x threads for MOOSE). Each parallel worker is pinned to
+        its own cpu set and the number of parallel simulations is limited so
+        that the cores are never oversubscribed.
+
+        Args:
+            cores (int | list[int] | None, optional): if int use this many of
+                the cpus available to this process, if a list use these cpu ids.
+                Defaults to None which disables the core budget.
+
+        Raises:
+            MooseHerdError: the core budget is empty.
+        """
+        if cores is None:
+            self._core_budget = None
+            return
+
+        if isinstance(cores,int):
+            cores = get_available_cpus()[:cores]
+
+        if len(cores) == 0:
+            raise MooseHerdError('The core budget must contain at least one core.')
+
+        self._core_budget = list(cores)
+
+
+    def get_core_budget(self) -> list[int] | None:
+        """get_core_budget
+
+        Returns:
+            list[int] | None: list of cpu ids the herd is allowed to use or
+                None if there is no core budget.
+        """
+        return self._core_budget
+
+
+    def _get_num_workers(self) -> int:
+        """_get_num_workers: helper function that gets the number of parallel
+        workers that fit in the core budget.
+
+        Raises:
+            MooseHerdError: the core budget has fewer cores than the most
+                demanding runner in the simulation chain needs.
+
+        Returns:
+            int: number of parallel workers, this is at most the number of
+                parallel simulations.
+        """
+        if self._core_budget is None:
+            return self._n_para_sims
+
+        chain_cores = max([rr.get_num_cores() for rr in self._runners])
+        if len(self._core_budget) < chain_cores:
+            raise MooseHerdError(f'The core budget ({len(self._core_budget)} '
+                                 'cores) is smaller than the number of cores '
+                                 f'needed by the simulation chain ({chain_cores}).')
+
+        return min(self._n_para_sims,len(self._core_budget) // chain_cores)
+
+
+    def _assign_cpu_sets(self) -> int:
+        """_assign_cpu_sets: helper function that divides the core budget into
+        disjoint cpu sets, one for each parallel worker.
+
+        Raises:
+            MooseHerdError: the core budget is too small for the simulation
+                chain, see _get_num_workers.
+
+        Returns:
+            int: number of parallel workers that fit in the core budget, this
+                is at most the number of parallel simulations.
+        """
+        n_workers = self._get_num_workers()
+        if self._core_budget is None:
+            self._cpu_sets = None
+            return n_workers
+
+        chain_cores = max([rr.get_num_cores() for rr in self._runners])
+
+        cpu_sets = list([])
+        for nn in range(n_workers):
+            cpu_sets.append(
+                self._core_budget[nn*chain_cores:(nn+1)*chain_cores])
+        self._cpu_sets = cpu_sets
+
+        return n_workers
+
+
+    def _bind_worker(self) -> None:
+        """_bind_worker: helper function that pins the current worker process
+        and its runners to the worker's cpu set if a core budget is set.
+        """
+        if self._cpu_sets is None:
+            return
+
+        cpus = self._cpu_sets[int(self._get_worker_num())-1]
+        if hasattr(os,'sched_setaffinity'):
+            os.sched_setaffinity(0,cpus)
+
+        for rr in self._runners:
+            rr.set_cpu_set(cpus)
+
+
     def get_sim_iter(self) -> int:
         """get_sim_iter: returns the current simulation iteration corresponding
         to the combination of variables being analysed. This number will
@@ -168,9 +474,13 @@ class MooseHerd:
         current sub-process.
 
         Returns:
-            str: number string taken from the process name. If this is the main
-                process returns '1'.
+            str: worker slot number assigned when the worker was started by
+                run_para. Otherwise the number string taken from the process
+                name. If this is the main process returns '1'.
         """
+        if self._worker_num is not None:
+            return self._worker_num
+
         name = self._get_process_name()
 
         if name == 'MainProcess':
@@ -209,7 +519,9 @@ class MooseHerd:
                    mod_vars: dict | None,
                    save_file: Path) -> None:
         """_mod_input: helper function that uses the input modifier to write
-        new variables to the input file and save it to the specified path.
+        new variables to the input file and save it to the specified path. The
+        variables are rendered on top of the modifier's variables without
+        changing them so each chain only gets the variables it is given.
 
         Args:
             modifier (InputModifier): input modifier for the specified type of
@@ -219,14 +531,14 @@ class MooseHerd:
             save_file (Path): path with file name and extension to output the
                 modified input file.
         """
-        if mod_vars is not None:
-            modifier.update_vars(mod_vars)
-        modifier.write_file(save_file)
+        with open(save_file,'w',encoding='utf-8') as sf:
+            sf.write(modifier.render(mod_vars))
 
 
-    def _run(self, runner: SimRunner, run_file: Path) -> Path | None:
+    def _run(self, runner: SimRunner, run_file: Path
+             ) -> tuple[Path | None, RunResult]:
         """_run: helper function to call the SimRunner and get the path to the
-        output file.
+        output file and the run result.
 
         Args:
             runner (SimRunner): for running the simulation, must be a class
@@ -234,17 +546,261 @@ class MooseHerd:
             run_file (Path): path to the input file to run with SimRunner.
 
         Returns:
-            Path | None: _description_
+            tuple[Path | None, RunResult]: path to the output file, None if
+                there is no output or the runner timed out, and the run result.
         """
+        run_start_time = time.perf_counter()
         runner.run(run_file)
-        return runner.get_output_path()
+
+        run_result = runner.get_run_result()
+        if run_result is None:
+            run_result = RunResult(wall_time=time.perf_counter()-run_start_time)
+            if runner.get_timed_out():
+                run_result.status = RUN_TIMED_OUT
+
+        self._add_runner_timings(runner,run_result)
+
+        if run_result.status == RUN_TIMED_OUT:
+            return (None,run_result)
+
+        output_path = runner.get_output_path()
+        run_result.check_output(output_path)
+        return (output_path,run_result)
+
+
+    def _run_retry(self, chain_pos: int, run_file: Path,
+                   mod_vars: dict | None = None
+                   ) -> tuple[Path | None, RunResult, bool]:
+        """_run_retry: helper function that runs the SimRunner at the given
+        position in the chain and retries the run based on the retry policy
+        for that position.
+
+        Args:
+            chain_pos (int): position in the simulation chain.
+            run_file (Path): path to the input file to run with SimRunner.
+            mod_vars (dict | None, optional): variables used to write the input
+                file, the degraded variables are applied on top of these.
+                Defaults to None.
+
+        Returns:
+            tuple[Path | None, RunResult, bool]: path to the output file, the
+                run result of the last attempt and True if degraded settings
+                were used.
+        """
+        start_time = time.perf_counter()
+        runner = self._runners[chain_pos]
+        (output_path,run_result) = self._run(runner,run_file)
+
+        policy = None
+        if self._retry_policies is not None:
+            policy = self._retry_policies[chain_pos]
+        if policy is None:
+            self._add_run_time(run_result,start_time)
+            return (output_path,run_result,False)
+
+        degraded = False
+        retry = 0
+        while True:
+            if (run_result.status == RUN_OK and policy.output_check is not None
+                and not policy.output_check(run_file)):
+                run_result.status = RUN_FAILED
+
+            if not policy.should_retry(run_result,retry):
+                break
+
+            retry += 1
+            time.sleep(policy.get_backoff(retry))
+
+            (retry_runner,pos_degraded) = self._get_retry_runner(
+                chain_pos,runner,run_file,mod_vars,retry)
+            degraded = degraded or pos_degraded
+
+            (output_path,run_result) = self._run(retry_runner,run_file)
+
+        run_result.attempts = retry+1
+        self._add_run_time(run_result,start_time)
+        return (output_path,run_result,degraded)
+
+
+    def _add_runner_timings(self, runner: SimRunner, run_result: RunResult
+                            ) -> None:
+        """_add_runner_timings: helper function that records the sections of
+        the run reported by the runner in the run result when profiling is
+        turned on, see set_profile_flag.
+
+        Args:
+            runner (SimRunner): runner that has just run.
+            run_result (RunResult): run result of the run.
+        """
+        if not self._profile:
+            return
+
+        for kk,tt in runner.get_timings().items():
+            run_result.timings[f'run:{kk}'] = tt
+
+
+    def _add_run_time(self, run_result: RunResult, start_time: float) -> None:
+        """_add_run_time: helper function that records the time taken by all
+        attempts at a position in the chain when profiling is turned on, see
+        set_profile_flag.
+
+        Args:
+            run_result (RunResult): run result of the last attempt.
+            start_time (float): performance timer value before the first
+                attempt.
+        """
+        if self._profile:
+            run_result.timings['run'] = time.perf_counter() - start_time
+
+
+    def _get_retry_runner(self, chain_pos: int, runner: SimRunner,
+                          run_file: Path, mod_vars: dict | None, retry: int
+                          ) -> tuple[SimRunner,bool]:
+        """_get_retry_runner: helper function that applies the degraded
+        settings of the retry policy at the given position in the chain before
+        a retry. Degraded variables are written to the input file and degraded
+        runner options are applied to a copy of the runner.
+
+        Args:
+            chain_pos (int): position in the simulation chain.
+            runner (SimRunner): runner used for the first attempt.
+            run_file (Path): path to the input file to run with SimRunner.
+            mod_vars (dict | None): variables used to write the input file.
+            retry (int): retry number starting from 1.
+
+        Returns:
+            tuple[SimRunner,bool]: runner to use for the retry and True if
+                degraded settings were applied.
+        """
+        policy = self._retry_policies[chain_pos] # type: ignore
+        degraded = False
+        retry_runner = runner
+        if policy.degrade_vars is not None:
+            degraded = True
+            retry_vars = dict(mod_vars) if mod_vars is not None else dict({})
+            retry_vars.update(policy.degrade_vars)
+            with open(run_file,'w',encoding='utf-8') as rf:
+                rf.write(self._modifiers[chain_pos].render(retry_vars))
+        if policy.degrade_runner is not None:
+            degraded = True
+            retry_runner = copy.deepcopy(runner)
+            policy.degrade_runner(retry_runner,retry)
+
+        return (retry_runner,degraded)
+
+
+    async def _run_async(self, runner: SimRunner, run_file: Path
+                         ) -> tuple[Path | None, RunResult]:
+        """_run_async: as _run but starts the runner process as an asyncio
+        subprocess using the command from SimRunner.get_run_command. Runners
+        that do not provide a command are run in a thread.
+
+        Args:
+            runner (SimRunner): for running the simulation, must be a class
+                that implements the SimRunner ABC.
+            run_file (Path): path to the input file to run with SimRunner.
+
+        Returns:
+            tuple[Path | None, RunResult]: path to the output file, None if
+                there is no output or the runner timed out, and the run result.
+        """
+        run_command = runner.get_run_command(run_file)
+        if run_command is None:
+            return await asyncio.to_thread(self._run,runner,run_file)
+
+        (arg_list,cwd,timeout) = run_command
+        run_result = await run_process_async(arg_list,cwd,timeout)
+        runner.set_run_result(run_result)
+        self._add_runner_timings(runner,run_result)
+
+        if run_result.status == RUN_TIMED_OUT:
+            return (None,run_result)
+
+        output_path = runner.get_output_path()
+        run_result.check_output(output_path)
+        return (output_path,run_result)
+
+
+    async def _run_retry_async(self, chain_pos: int, runner: SimRunner,
+                               run_file: Path, mod_vars: dict | None = None
+                               ) -> tuple[Path | None, RunResult, bool]:
+        """_run_retry_async: as _run_retry for the asyncio driver using the
+        given copy of the runner at that position in the chain.
+
+        Args:
+            chain_pos (int): position in the simulation chain.
+            runner (SimRunner): copy of the runner at this position used only
+                by this simulation chain.
+            run_file (Path): path to the input file to run with SimRunner.
+            mod_vars (dict | None, optional): variables used to write the input
+                file. Defaults to None.
+
+        Returns:
+            tuple[Path | None, RunResult, bool]: as _run_retry.
+        """
+        start_time = time.perf_counter()
+        (output_path,run_result) = await self._run_async(runner,run_file)
+
+        policy = None
+        if self._retry_policies is not None:
+            policy = self._retry_policies[chain_pos]
+        if policy is None:
+            self._add_run_time(run_result,start_time)
+            return (output_path,run_result,False)
+
+        degraded = False
+        retry = 0
+        while True:
+            if (run_result.status == RUN_OK and policy.output_check is not None
+                and not policy.output_check(run_file)):
+                run_result.status = RUN_FAILED
+
+            if not policy.should_retry(run_result,retry):
+                break
+
+            retry += 1
+            await asyncio.sleep(policy.get_backoff(retry))
+
+            (retry_runner,pos_degraded) = self._get_retry_runner(
+                chain_pos,runner,run_file,mod_vars,retry)
+            degraded = degraded or pos_degraded
+
+            (output_path,run_result) = await self._run_async(retry_runner,
+                                                             run_file)
+
+        run_result.attempts = retry+1
+        self._add_run_time(run_result,start_time)
+        return (output_path,run_result,degraded)
+
+
+    def _get_cache_hash(self, run_files: list[Path]) -> str:
+        """_get_cache_hash: helper function that hashes the rendered input
+        files and the runner cache keys for the simulation chain.
+
+        Args:
+            run_files (list[Path]): paths to the rendered input files.
+
+        Returns:
+            str: hex digest of the hash.
+        """
+        chain_hash = hashlib.sha256()
+        for ff,rr in zip(run_files,self._runners):
+            chain_hash.update(rr.get_cache_key().encode('utf-8'))
+            with open(ff,'rb') as rf:
+                chain_hash.update(hashlib.sha256(rf.read()).digest())
+
+        return chain_hash.hexdigest()
 
 
     def run_once(self, sim_iter: int, var_list: list[dict | None]
                  ) -> list[Path | None]:
         """run_once: runs a specific simulation chain with the given variable
         list once and returns a list of paths to the output files. Used by
-        run_seq and run_para for parallelisation.
+        run_seq and run_para for parallelisation. If the cache flag is set and
+        the rendered inputs match a cached chain the cached outputs are
+        returned without running the chain. If a runner fails or times out
+        the rest of the chain is skipped, see get_iter_results. Failed runs
+        are retried based on the retry policies, see set_retry_policies.
 
         Args:
             sim_iter (int): current simulation iteration which is the index of
@@ -257,60 +813,241 @@ class MooseHerd:
                 is no useful output from the runner in the simulation chain it
                 returns None in the list.
         """
+        worker_num = self._get_worker_num()
+        run_dir = self._dir_manager.get_run_dir(int(worker_num)-1)
+        run_num = self._get_run_num(sim_iter,worker_num)
+
+        return self._run_chain(var_list,run_dir,run_num)
+
+
+    def _run_chain(self, var_list: list[dict | None], run_dir: Path,
+                   run_num: str) -> list[Path | None]:
+        """_run_chain: helper function for run_once that writes the input files
+        for the simulation chain to the given run directory and runs the chain.
+
+        Args:
+            var_list (list[dict | None]): variables for each position in the
+                simulation chain.
+            run_dir (Path): directory to write the input files to.
+            run_num (str): run number used to name the input files.
+
+        Returns:
+            list[Path | None]: as run_once.
+        """
         iter_start_time = time.perf_counter()
 
+        run_files = self._write_inputs(var_list,run_dir,run_num)
+        render_times = self._render_times
+
+        cache_hash = None
+        if self._use_cache:
+            cache_hash = self._get_cache_hash(run_files)
+            cached_outputs = self._dir_manager.find_cached_outputs(cache_hash)
+            if cached_outputs is not None:
+                self._iter_results = _get_cached_results(cached_outputs)
+                _add_render_times(self._iter_results,render_times)
+                self._iter_run_time = time.perf_counter() - iter_start_time
+                return cached_outputs
+
+        output_list = list([])
+        self._iter_results = list([])
+        degraded = False
+        for ii,_ in enumerate(self._runners):
+            if any(rs.status != RUN_OK for rs in self._iter_results):
+                output_list.append(None)
+                self._iter_results.append(RunResult(status=RUN_SKIPPED))
+                continue
+
+            (output_path,run_result,pos_degraded) = self._run_retry(
+                ii,run_files[ii],var_list[ii])
+            output_list.append(output_path)
+            self._iter_results.append(run_result)
+            degraded = degraded or pos_degraded
+
+        # Outputs from degraded retries do not match the hashed inputs
+        if (cache_hash is not None and not degraded and
+            all(rs.status == RUN_OK for rs in self._iter_results)):
+            self._dir_manager.write_cached_outputs(cache_hash,output_list)
+
+        _add_render_times(self._iter_results,render_times)
+        self._iter_run_time = time.perf_counter() - iter_start_time
+
+        return output_list
+
+
+    def run_batch_once(self, sim_iters: list[int],
+                       var_lists: list[list[dict | None]]
+                       ) -> tuple[list[list[Path | None]],
+                                  list[list[RunResult]],
+                                  list[float]]:
+        """run_batch_once: runs a batch of simulation chains, see
+        set_batch_size. As run_once for each chain in the batch. Used by
+        run_seq and run_para when the batch size is more than 1.
+
+        Args:
+            sim_iters (list[int]): simulation iteration of each chain.
+            var_lists (list[list[dict | None]]): variable list for each chain.
+
+        Returns:
+            tuple[list[list[Path | None]],list[list[RunResult]],list[float]]:
+                the paths to the simulation outputs, the run results and the
+                run time for each chain in the batch. The run time of a batched
+                run is split equally between the chains in the batch.
+        """
+        batch_start_time = time.perf_counter()
+
         worker_num = self._get_worker_num()
         run_dir = self._dir_manager.get_run_dir(int(worker_num)-1)
-        run_num = self._get_run_num(sim_iter,worker_num)
 
+        output_lists = [list([]) for _ in var_lists]
+        result_lists = [list([]) for _ in var_lists]
+        degraded = [False for _ in var_lists]
+        cache_hashes = [None for _ in var_lists]
+        run_files = list([])
+        render_times = list([])
+        active = list([])
+        for kk,(sim_iter,var_list) in enumerate(zip(sim_iters,var_lists)):
+            batch_dir = run_dir / f'batch-{kk+1}'
+            batch_dir.mkdir(exist_ok=True)
+            run_files.append(self._write_inputs(
+                var_list,batch_dir,self._get_run_num(sim_iter,worker_num)))
+            render_times.append(self._render_times)
+
+            if self._use_cache:
+                cache_hashes[kk] = self._get_cache_hash(run_files[kk])
+                cached_outputs = self._dir_manager.find_cached_outputs(
+                                                            cache_hashes[kk])
+                if cached_outputs is not None:
+                    output_lists[kk] = cached_outputs
+                    result_lists[kk] = _get_cached_results(cached_outputs)
+                    continue
+
+            active.append(kk)
+
+        for ii,rr in enumerate(self._runners):
+            run_chains = list([])
+            for kk in active:
+                if any(rs.status != RUN_OK for rs in result_lists[kk]):
+                    output_lists[kk].append(None)
+                    result_lists[kk].append(RunResult(status=RUN_SKIPPED))
+                else:
+                    run_chains.append(kk)
+
+            batch_results = dict({})
+            if rr.get_batch_support() and len(run_chains) > 1:
+                batch_results = dict(zip(run_chains,rr.run_batch(
+                    [run_files[kk][ii] for kk in run_chains])))
+
+            policy = None
+            if self._retry_policies is not None:
+                policy = self._retry_policies[ii]
+
+            for kk in run_chains:
+                run_result = batch_results.get(kk)
+                if (run_result is not None and run_result.status == RUN_OK and
+                    (policy is None or policy.output_check is None or
+                     policy.output_check(run_files[kk][ii]))):
+                    output_lists[kk].append(run_result.output_path)
+                    result_lists[kk].append(run_result)
+                    continue
+
+                (output_path,run_result,pos_degraded) = self._run_retry(
+                    ii,run_files[kk][ii],var_lists[kk][ii])
+                output_lists[kk].append(output_path)
+                result_lists[kk].append(run_result)
+                degraded[kk] = degraded[kk] or pos_degraded
+
+        # Outputs from degraded retries do not match the hashed inputs
+        for kk in active:
+            if (cache_hashes[kk] is not None and not degraded[kk] and
+                all(rs.status == RUN_OK for rs in result_lists[kk])):
+                self._dir_manager.write_cached_outputs(cache_hashes[kk],
+                                                       output_lists[kk])
+
+        run_times = list([])
+        for rl,rt in zip(result_lists,render_times):
+            _add_render_times(rl,rt)
+            run_times.append(sum(max(rs.wall_time,0.0) for rs in rl))
+
+        self._iter_results = result_lists[-1]
+        self._iter_run_time = time.perf_counter() - batch_start_time
+
+        return (output_lists,result_lists,run_times)
+
+
+    def _write_inputs(self,
+                      var_list: list[dict | None],
+                      run_dir: Path,
+                      run_num: str) -> list[Path]:
+        """_write_inputs: helper function that writes the input files for each
+        position in the simulation chain to the run directory. When profiling
+        is turned on the time to write each input file is kept for the run
+        results, see _add_render_times.
+
+        Args:
+            var_list (list[dict | None]): variables for each position in the
+                simulation chain.
+            run_dir (Path): directory to write the input files to.
+            run_num (str): run number used to name the input files.
+
+        Returns:
+            list[Path]: paths to the input files.
+        """
         run_files = list([])
+        self._render_times = list([])
         for ii,mm in enumerate(self._modifiers):
             ext = mm.get_input_file().suffix
             run_files.append(run_dir / (self._input_names[ii] +'-'+run_num+ext))
+            render_start_time = time.perf_counter()
             self._mod_input(mm,var_list[ii],run_files[ii])
+            if self._profile:
+                self._render_times.append(time.perf_counter()-render_start_time)
 
-        output_list = list([])
-        for ii,rr in enumerate(self._runners):
-            output_list.append(self._run(rr,run_files[ii]))
-
-        self._iter_run_time = time.perf_counter() - iter_start_time
-
-        return output_list
+        return run_files
 
 
-    def _start_sweep(self, var_sweep: list[list[dict | None]]) -> float:
+    def _start_sweep(self, var_sweep: list[list[dict | None]] | SweepDesign) -> float:
         """_start_sweep: helper function used at the start of a variable sweep
         in either run_seq or run_para. Sets the var_sweep attribute, deals with
-        the management of directories and starts the performance counter.
+        the management of directories, writes the sweep variables and starts
+        the sweep journal before starting the performance counter.
 
         Args:
-            var_sweep (list[list[dict  |  None]]): as passed to run_seq/para
+            var_sweep (list[list[dict | None]] | SweepDesign): as passed to
+                run_seq/para
 
         Returns:
             float: performance timer start value.
         """
         self._var_sweep = var_sweep
+        self._sweep_stopped = False
 
         if not self._keep_all:
             self.reset_iter_counts()
             self._dir_manager.clear_dirs()
             self._dir_manager.create_dirs()
 
+        self._dir_manager.write_sweep_vars(var_sweep,self._sweep_iter+1)
+        self._dir_manager.start_journal(self._sweep_iter+1,self._sim_iter)
+
         return time.perf_counter()
 
 
     def _end_sweep(self, start_sweep_time: float,
-                   output_files: list[list[Path | None]]) -> None:
+                   output_files: list[list[Path | None]],
+                   run_results: list[list[RunResult] | None]) -> None:
         """_end_sweep: helper function called at the end of runseq/para.
         Reacords the sweep run time. Increments the iteration counters. and
-        writes the output key and sweep variables to the first workers
-        directory.
+        writes the output key and run results to the first workers directory.
+        The sweep variables are written once by _start_sweep.
 
         Args:
             start_sweep_time (float): the sweep start time taken from the
                 _start_sweep() function.
             output_files (list[list[Path]]): list of list of paths to the
                 simulation chain output files.
+            run_results (list[list[RunResult] | None]): list of list of run
+                results for each simulation chain.
         """
         self._sweep_run_time = time.perf_counter() - start_sweep_time
 
@@ -319,21 +1056,42 @@ class MooseHerd:
 
         self._dir_manager.set_output_paths(output_files)
         self._dir_manager.write_output_key(self._sweep_iter)
-        self._dir_manager.write_sweep_vars(self._var_sweep,self._sweep_iter)
+        self._dir_manager.write_run_results(run_results,self._sweep_iter)
 
+        if self._telemetry is not None:
+            self._telemetry.end_sweep(self._sweep_stopped)
 
-    def run_sequential(self, var_sweep: list[list[dict | None]]
+
+    def _start_telemetry(self, num_chains: int, num_workers: int,
+                         start_queue: Any = None) -> None:
+        """_start_telemetry: helper function that starts the telemetry for the
+        sweep once the sweep has been started with _start_sweep.
+
+        Args:
+            num_chains (int): number of simulation chains in the sweep.
+            num_workers (int): number of chains run at once.
+            start_queue (mp.Queue | None, optional): queue the workers put
+                the start of each chain on. Defaults to None.
+        """
+        if self._telemetry is not None:
+            self._telemetry.start_sweep(self._dir_manager,self._sweep_iter+1,
+                                        num_chains,num_workers,start_queue)
+
+
+    def run_sequential(self, var_sweep: list[list[dict | None]] | SweepDesign
                        ) -> list[list[Path | None]]:
         """run_sequential: runs the variable sweep given in var_sweep
         sequentially and returns the paths to the simulation outputs.
 
         Args:
-            var_sweep (list[list[dict | None]]): outer list is the simulation
-                iteration, inner list is the position in the simulation chain
-                that the variable dictionary corresponds to. The dictionary
-                contains the variables that will be inserted into the input
-                file before calling run on the SimRunner. If None instead of
-                a dictionary then the input file is copied with no modification
+            var_sweep (list[list[dict | None]] | SweepDesign): outer list is
+                the simulation iteration, inner list is the position in the
+                simulation chain that the variable dictionary corresponds to.
+                The dictionary contains the variables that will be inserted
+                into the input file before calling run on the SimRunner. If
+                None instead of a dictionary then the input file is copied with
+                no modification. A SweepDesign (e.g. SobolDesign) creates each
+                variable list as it is needed.
 
         Returns:
             list[list[Path | None]]: outer list is the simulation iteration and
@@ -342,32 +1100,79 @@ class MooseHerd:
                 or None if no useful output is produced.
         """
         start_sweep_time = self._start_sweep(var_sweep)
+        self._start_telemetry(len(var_sweep),1)
 
         output_files = list([])
-
-        ii = self._sim_iter
-        for vv in var_sweep:
-            output_files.append(self.run_once(ii,vv))
-            ii += 1
-
-
-        self._end_sweep(start_sweep_time,output_files)
+        run_results = list([])
+
+        for jj in range(0,len(var_sweep),self._batch_size):
+            batch_vars = var_sweep[jj:jj+self._batch_size]
+            sim_iters = [self._sim_iter+jj+kk for kk,_ in enumerate(batch_vars)]
+            if self._telemetry is not None:
+                for kk,_ in enumerate(batch_vars):
+                    self._telemetry.chain_started(jj+kk)
+
+            if self._batch_size > 1:
+                (batch_outputs,batch_results,_) = self.run_batch_once(
+                    sim_iters,batch_vars)
+            else:
+                batch_outputs = [self.run_once(sim_iters[0],batch_vars[0])]
+                batch_results = [self.get_iter_results()]
+
+            for kk,(oo,rr) in enumerate(zip(batch_outputs,batch_results)):
+                output_files.append(oo)
+                run_results.append(rr)
+                self._dir_manager.append_journal(self._sweep_iter+1,jj+kk,
+                                                 oo,rr)
+                if self._telemetry is not None:
+                    self._telemetry.chain_ended(jj+kk,rr)
+
+        self._end_sweep(start_sweep_time,output_files,run_results)
 
         return output_files
 
 
-    def run_para(self, var_sweep: list[list[dict | None]]
+    def run_para(self, var_sweep: list[list[dict | None]] | SweepDesign,
+                 cost_hints: list[float] | None = None,
+                 stop_func: Callable[[list[dict | None],list[Path | None]],
+                                     bool] | None = None,
+                 kill_running: bool = False
                  ) -> list[list[Path | None]]:
         """run_para: runs the variable sweep with the simulation chain in
-        parallel.
+        parallel. A fixed number of workers is started, each with its own
+        working directory, and the workers pull the next simulation chain from
+        a shared queue as soon as they finish the previous one. The herd is
+        only sent to each worker once when it starts. If a core budget is set
+        (see set_core_budget) each worker is pinned to its own set of cores.
 
         Args:
-            var_sweep (list[list[dict | None]]): outer list is the simulation
-                iteration, inner list is the position in the simulation chain
-                that the variable dictionary corresponds to. The dictionary
-                contains the variables that will be inserted into the input
-                file before calling run on the SimRunner. If None instead of
-                a dictionary then the input file is copied with no modification
+            var_sweep (list[list[dict | None]] | SweepDesign): outer list is
+                the simulation iteration, inner list is the position in the
+                simulation chain that the variable dictionary corresponds to.
+                The dictionary contains the variables that will be inserted
+                into the input file before calling run on the SimRunner. If
+                None instead of a dictionary then the input file is copied with
+                no modification. A SweepDesign (e.g. SobolDesign) creates each
+                variable list as it is needed.
+            cost_hints (list[float] | None, optional): relative cost of each
+                simulation chain in the sweep e.g. the number of elements in
+                the mesh. The most expensive chains are queued first so that
+                long running chains do not hold up the end of the sweep.
+                Defaults to None which queues the chains in sweep order.
+            stop_func (Callable[[list[dict | None],list[Path | None]],bool] |
+                None, optional): predicate called in the herd process with the
+                variable list and output paths of each chain as it completes.
+                Once it returns True no more chains are started and the
+                chains that were not started are recorded as 'cancelled' with
+                no outputs, see get_sweep_stopped. Defaults to None.
+            kill_running (bool, optional): when the sweep is stopped also kill
+                the chains that are running, their process groups are killed
+                and they are recorded as 'cancelled'. Not available on
+                Windows. Defaults to False.
+
+        Raises:
+            MooseHerdError: the length of the cost hints does not match the
+                length of the variable sweep.
 
         Returns:
             list[list[Path | None]]: outer list is the simulation iteration and
@@ -375,23 +1180,698 @@ class MooseHerd:
                 the cimulation chain. Gives the path to the simulation output
                 or None if no useful output is produced.
         """
+        output_files = list([None]*len(var_sweep))
+
+        # The sweep start is only known once run_iter has started the sweep,
+        # the iteration counts are reset then if keep_all is False
+        for (sim_iter,_,output_list,_,_) in self.run_iter(
+            var_sweep,cost_hints,stop_func=stop_func,kill_running=kill_running):
+            output_files[sim_iter-self._sim_iter] = output_list
+
+        return output_files
+
+
+    def run_iter(self, var_sweep: list[list[dict | None]] | SweepDesign,
+                 cost_hints: list[float] | None = None,
+                 read_func: Callable[[list[Path | None]], Any] | None = None,
+                 stop_func: Callable[[list[dict | None],list[Path | None]],
+                                     bool] | None = None,
+                 kill_running: bool = False
+                 ) -> Iterator[tuple[int,
+                                     list[dict | None],
+                                     list[Path | None],
+                                     float,
+                                     Any]]:
+        """run_iter: as run_para but returns a generator that yields the
+        results of each simulation chain as soon as it completes, allowing
+        post-processing to overlap with the remaining simulations. The output
+        key and sweep variables are written once all chains have completed.
+        If the generator is closed before it is exhausted (e.g. by breaking
+        out of the loop) the workers are terminated and kill the simulations
+        they are running, the chains that have not completed are recorded as
+        'cancelled' with no outputs and the sweep is ended as stopped, see get_sweep_stopped. Cancelled chains can be run
+        later using resume.
+
+        Args:
+            var_sweep (list[list[dict | None]] | SweepDesign): as run_para.
+            cost_hints (list[float] | None, optional): as run_para. Defaults to
+                None.
+            read_func (Callable[[list[Path | None]], Any] | None, optional):
+                function called in the worker with the list of output paths
+                once the chain has run e.g. SweepReader.read_results_once. Must
+                be picklable. Defaults to None.
+            stop_func (Callable[[list[dict | None],list[Path | None]],bool] |
+                None, optional): as run_para. Defaults to None.
+            kill_running (bool, optional): as run_para. Defaults to False.
+
+        Raises:
+            MooseHerdError: the length of the cost hints does not match the
+                length of the variable sweep.
+
+        Yields:
+            tuple[int,list[dict | None],list[Path | None],float,Any]: the
+                simulation iteration, the variable list for the chain, the
+                paths to the simulation outputs, the chain run time and the
+                result of read_func (None if read_func is None) in the order the
+                chains complete.
+        """
+        if cost_hints is not None and len(cost_hints) != len(var_sweep):
+            raise MooseHerdError(f'The length of the cost hints ({len(cost_hints)})'
+                                 ' must match the length of the variable sweep '
+                                 f'({len(var_sweep)})')
+
         sweep_start_time = self._start_sweep(var_sweep)
 
-        with Pool(self._n_para_sims) as pool:
-            processes = list([])
+        sweep_inds = range(len(var_sweep))
+        if cost_hints is not None:
+            sweep_inds = sorted(sweep_inds,key=lambda ii: cost_hints[ii],
+                                reverse=True)
+
+        # Jobs are created as the pool takes them so a lazy SweepDesign is
+        # never expanded in memory
+        jobs = ((ii, self._sim_iter+ii, var_sweep[ii], read_func)
+                for ii in sweep_inds)
+
+        stop_event = None
+        if stop_func is not None:
+            stop_event = mp.Event()
+
+        start_queue = None
+        if self._telemetry is not None:
+            start_queue = mp.Queue()
+        self._start_telemetry(len(var_sweep),self._get_num_workers(),
+                              start_queue)
+
+        output_files = list([None]*len(var_sweep))
+        run_results = list([None]*len(var_sweep))
+        pool_iter = self._run_pool(jobs,stop_event,kill_running,start_queue)
+        completed = False
+        try:
+            for (ii,output_list,run_time,read_data,results) in pool_iter:
+                output_files[ii] = output_list
+                run_results[ii] = results
+                var_list = var_sweep[ii]
+                # The worker copies of the herd hold their own iteration results
+                self._iter_run_time = run_time
+                self._iter_results = results
+                if self._telemetry is not None:
+                    self._telemetry.chain_ended(ii,results)
+
+                # Cancelled chains are left out of the journal so resume runs
+                # them
+                if any(rr.status == RUN_CANCELLED for rr in results):
+                    self._sweep_stopped = True
+                else:
+                    self._dir_manager.append_journal(self._sweep_iter+1,ii,
+                                                     output_list,results)
+                    if (stop_event is not None and not stop_event.is_set()
+                        and stop_func(var_list,output_list)): # type: ignore
+                        stop_event.set()
+                        self._sweep_stopped = True
+
+                yield (self._sim_iter+ii,var_list,output_list,run_time,
+                       read_data)
+
+            completed = True
+        finally:
+            if not completed:
+                # Closing the pool generator terminates the workers, which
+                # kill their running simulations before they exit
+                pool_iter.close()
+                self._sweep_stopped = True
+                n_runners = len(self._runners)
+                for ii,rr in enumerate(run_results):
+                    if rr is None:
+                        output_files[ii] = [None]*n_runners
+                        run_results[ii] = _get_cancelled_results(n_runners)
+
+            self._end_sweep(sweep_start_time,output_files,run_results)
+
+
+    def _run_pool(self, jobs: Iterable[tuple[int,int,list[dict | None],
+                                             Callable | None]],
+                  stop_event: Any = None,
+                  kill_running: bool = False,
+                  start_queue: Any = None
+                  ) -> Iterator[tuple[int,list[Path | None],float,Any,
+                                   list[RunResult]]]:
+        """_run_pool: helper function that starts the pool of workers and
+        runs the given jobs on it yielding the results as each job completes.
+        Once the stop event is set the workers return the remaining jobs as
+        cancelled without running them.
+
+        Args:
+            jobs (Iterable[tuple[int,int,list[dict | None],Callable | None]]):
+                jobs to run as passed to _run_worker.
+            stop_event (mp.Event | None, optional): event used to stop the
+                sweep early. Defaults to None.
+            kill_running (bool, optional): kill the running chains when the
+                stop event is set. Defaults to False.
+            start_queue (mp.Queue | None, optional): queue the workers put
+                (sweep index, start time, worker number) on as they start each
+                chain for the telemetry. Defaults to None.
+
+        Yields:
+            tuple[int,list[Path | None],float,Any,list[RunResult]]: the
+                result of _run_worker for each job in the order the jobs
+                complete.
+        """
+        n_workers = self._assign_cpu_sets()
+
+        worker_nums = mp.Queue()
+        for nn in range(n_workers):
+            worker_nums.put(str(nn+1))
+
+        with Pool(n_workers,
+                  initializer=_init_worker,
+                  initargs=(self,worker_nums,stop_event,kill_running,
+                            start_queue)) as pool:
+            if self._pipeline:
+                yield from self._run_pipeline(pool,n_workers,jobs,stop_event)
+            elif self._batch_size > 1:
+                for batch_out in pool.imap_unordered(
+                        _run_batch_worker,_chunk_jobs(jobs,self._batch_size)):
+                    yield from batch_out
+            else:
+                yield from pool.imap_unordered(_run_worker,jobs)
+
+
+    def _run_pipeline(self,
+                      pool: Pool,
+                      n_workers: int,
+                      jobs: Iterable[tuple[int,int,list[dict | None],
+                                           Callable | None]],
+                      stop_event: Any = None
+                      ) -> Iterator[tuple[int,list[Path | None],float,Any,
+                                          list[RunResult]]]:
+        """_run_pipeline: helper function for _run_pool that runs each
+        position in the simulation chains as a separate task on the pool. The
+        input files for a chain are written when the chain is started and
+        each chain is given its own run directory (slot) so that the stages of
+        the chain can run on any worker. At most n_workers
+        tasks are queued on the pool at once and the ready task with the
+        latest position in the chain is queued first.
+
+        Args:
+            pool (Pool): pool of workers started by _run_pool.
+            n_workers (int): number of workers in the pool.
+            jobs (Iterable[tuple[int,int,list[dict | None],Callable | None]]):
+                jobs to run as passed to _run_worker.
+            stop_event (mp.Event | None, optional): as _run_pool, chains that
+                have not started when it is set are cancelled without writing
+                their input files. Defaults to None.
+
+        Yields:
+            tuple[int,list[Path | None],float,Any,list[RunResult]]: as
+                _run_worker for each chain in the order the chains complete.
+        """
+        n_stages = len(self._runners)
+        free_slots = list(range(len(self._dir_manager.get_all_run_dirs())))
+        job_iter = iter(jobs)
+        next_job = next(job_iter,None)
+        chains = dict({})
+        ready = list([])
+        done = queue.Queue()
+        in_flight = 0
+        order = 0
+
+        def on_error(err: BaseException) -> None:
+            done.put(err)
+
+        while next_job is not None or ready or in_flight > 0:
+            while next_job is not None and free_slots:
+                (ii,sim_iter,var_list,read_func) = next_job
+                next_job = next(job_iter,None)
+                if stop_event is not None and stop_event.is_set():
+                    yield (ii,[None]*n_stages,0.0,None,
+                           _get_cancelled_results(n_stages))
+                    continue
+
+                slot = free_slots.pop(0)
+                run_num = str(sim_iter+1) if self._keep_all else str(slot+1)
+                run_dir = self._dir_manager.get_run_dir(slot)
+                chain = {'slot': slot,
+                         'vars': var_list,
+                         'read_func': read_func,
+                         'files': self._write_inputs(var_list,run_dir,run_num),
+                         'render': self._render_times,
+                         'outputs': list([]),
+                         'results': list([]),
+                         'run_time': 0.0,
+                         'degraded': False,
+                         'hash': None}
+
+                if self._use_cache:
+                    chain['hash'] = self._get_cache_hash(chain['files'])
+                    cached_outputs = self._dir_manager.find_cached_outputs(
+                                                                chain['hash'])
+                    if cached_outputs is not None:
+                        free_slots.append(slot)
+                        cached_results = _get_cached_results(cached_outputs)
+                        _add_render_times(cached_results,chain['render'])
+                        read_data = None
+                        if read_func is not None:
+                            read_data = _read_chain(read_func,cached_outputs,
+                                                    cached_results,
+                                                    self._profile)
+                        yield (ii,cached_outputs,0.0,read_data,cached_results)
+                        continue
+
+                chains[ii] = chain
+                heapq.heappush(ready,(0,order,ii))
+                order += 1
+                if self._telemetry is not None:
+                    self._telemetry.chain_started(ii)
+
+            while ready and in_flight < n_workers:
+                (neg_stage,_,ii) = heapq.heappop(ready)
+                stage = -neg_stage
+                chain = chains[ii]
+                read_func = None
+                if stage == n_stages-1:
+                    read_func = chain['read_func']
+                pool.apply_async(_run_stage_worker,
+                                 ((ii,stage,chain['files'][stage],
+                                   chain['vars'][stage],chain['outputs'],
+                                   read_func),),
+                                 callback=done.put,
+                                 error_callback=on_error)
+                in_flight += 1
+
+            if in_flight == 0:
+                continue
+
+            stage_result = done.get()
+            in_flight -= 1
+            if isinstance(stage_result,BaseException):
+                raise stage_result
+
+            (ii,stage,output_path,run_result,degraded,read_data) = stage_result
+            chain = chains[ii]
+            chain['outputs'].append(output_path)
+            chain['results'].append(run_result)
+            chain['run_time'] += max(run_result.wall_time,0.0)
+            chain['degraded'] = chain['degraded'] or degraded
+
+            if run_result.status == RUN_OK and stage < n_stages-1:
+                heapq.heappush(ready,(-(stage+1),order,ii))
+                order += 1
+                continue
+
+            for _ in range(stage+1,n_stages):
+                chain['outputs'].append(None)
+                chain['results'].append(RunResult(status=RUN_SKIPPED))
+
+            _add_render_times(chain['results'],chain['render'])
+            if stage < n_stages-1 and chain['read_func'] is not None:
+                read_data = _read_chain(chain['read_func'],chain['outputs'],
+                                        chain['results'],self._profile)
+
+            if (chain['hash'] is not None and not chain['degraded'] and
+                all(rs.status == RUN_OK for rs in chain['results'])):
+                self._dir_manager.write_cached_outputs(chain['hash'],
+                                                       chain['outputs'])
+
+            free_slots.append(chain['slot'])
+            del chains[ii]
+            yield (ii,chain['outputs'],chain['run_time'],read_data,
+                   chain['results'])
+
+
+    async def run_async(self, var_sweep: list[list[dict | None]] | SweepDesign,
+                        max_concurrent: int | None = None
+                        ) -> list[list[Path | None]]:
+        """run_async: runs the variable sweep from a single asyncio event loop
+        instead of a pool of worker processes. Each simulation chain is an
+        asyncio task that starts its runners as asyncio subprocesses (see
+        SimRunner.get_run_command) so hundreds of simulations can be managed
+        without a python worker process each. Runners that cannot provide their
+        command are run in a thread. Each chain in progress uses its own run
+        directory so the number of chains run at once is also limited by the
+        number of directories in the directory manager. If the task running the
+        sweep is cancelled all running simulations are killed and no more are
+        started, the sweep can then be completed with resume. Run with
+        asyncio.run(herd.run_async(var_sweep)).
+
+        Args:
+            var_sweep (list[list[dict | None]] | SweepDesign): as run_para.
+            max_concurrent (int | None, optional): maximum number of simulation
+                chains to run at once. Defaults to None which runs one chain
+                per run directory.
+
+        Raises:
+            MooseHerdError: the maximum number of concurrent chains is less
+                than 1.
 
-            ii = self._sim_iter
-            for vv in var_sweep:
-                processes.append(pool.apply_async(self.run_once, args=(ii,vv)))
-                ii += 1
+        Returns:
+            list[list[Path | None]]: as run_para.
+        """
+        n_slots = len(self._dir_manager.get_all_run_dirs())
+        if max_concurrent is not None:
+            if max_concurrent < 1:
+                raise MooseHerdError('Maximum number of concurrent simulations '
+                                     'must be 1 or more.')
+            n_slots = min(n_slots,max_concurrent)
 
-            output_files = [pp.get() for pp in processes]
+        start_sweep_time = self._start_sweep(var_sweep)
 
-        self._end_sweep(sweep_start_time, output_files)
+        free_slots = asyncio.Queue()
+        for ss in range(n_slots):
+            free_slots.put_nowait(ss)
+        self._start_telemetry(len(var_sweep),n_slots)
+
+        output_files = list([None]*len(var_sweep))
+        run_results = list([None]*len(var_sweep))
+
+        async def run_chain(ii: int) -> None:
+            slot = await free_slots.get()
+            if self._telemetry is not None:
+                self._telemetry.chain_started(ii,str(slot+1))
+            try:
+                (output_files[ii],run_results[ii]) = await self._run_chain_async(
+                    self._sim_iter+ii,var_sweep[ii],slot)
+            finally:
+                free_slots.put_nowait(slot)
+            self._dir_manager.append_journal(self._sweep_iter+1,ii,
+                                             output_files[ii],run_results[ii])
+            if self._telemetry is not None:
+                self._telemetry.chain_ended(ii,run_results[ii]) # type: ignore
+
+        tasks = [asyncio.create_task(run_chain(ii))
+                 for ii in range(len(var_sweep))]
+        try:
+            await asyncio.gather(*tasks)
+        except BaseException:
+            for tt in tasks:
+                tt.cancel()
+            await asyncio.gather(*tasks,return_exceptions=True)
+            if self._telemetry is not None:
+                self._telemetry.end_sweep(stopped=True)
+            raise
+
+        self._end_sweep(start_sweep_time,output_files,run_results)
 
         return output_files
 
 
+    async def _run_chain_async(self, sim_iter: int, var_list: list[dict | None],
+                               slot: int
+                               ) -> tuple[list[Path | None],list[RunResult]]:
+        """_run_chain_async: helper function for run_async that runs one
+        simulation chain in the given run directory (slot). As run_once but
+        each chain uses its own copy of the runners.
+
+        Args:
+            sim_iter (int): current simulation iteration.
+            var_list (list[dict | None]): variables for each position in the
+                simulation chain.
+            slot (int): index of the run directory to use.
+
+        Returns:
+            tuple[list[Path | None],list[RunResult]]: the paths to the
+                simulation outputs and the run result of each runner in the
+                chain.
+        """
+        run_dir = self._dir_manager.get_run_dir(slot)
+        run_num = str(sim_iter+1) if self._keep_all else str(slot+1)
+        run_files = self._write_inputs(var_list,run_dir,run_num)
+        render_times = self._render_times
+
+        cache_hash = None
+        if self._use_cache:
+            cache_hash = self._get_cache_hash(run_files)
+            cached_outputs = self._dir_manager.find_cached_outputs(cache_hash)
+            if cached_outputs is not None:
+                chain_results = _get_cached_results(cached_outputs)
+                _add_render_times(chain_results,render_times)
+                return (cached_outputs,chain_results)
+
+        runners = copy.deepcopy(self._runners)
+        output_list = list([])
+        chain_results = list([])
+        degraded = False
+        for ii,rr in enumerate(runners):
+            if any(rs.status != RUN_OK for rs in chain_results):
+                output_list.append(None)
+                chain_results.append(RunResult(status=RUN_SKIPPED))
+                continue
+
+            (output_path,run_result,pos_degraded) = \
+                await self._run_retry_async(ii,rr,run_files[ii],var_list[ii])
+            output_list.append(output_path)
+            chain_results.append(run_result)
+            degraded = degraded or pos_degraded
+
+        # Outputs from degraded retries do not match the hashed inputs
+        if (cache_hash is not None and not degraded and
+            all(rs.status == RUN_OK for rs in chain_results)):
+            self._dir_manager.write_cached_outputs(cache_hash,output_list)
+
+        _add_render_times(chain_results,render_times)
+        return (output_list,chain_results)
+
+
+    def run_cluster(self, var_sweep: list[list[dict | None]] | SweepDesign,
+                    scheduler: JobScheduler,
+                    poll_time: float = 30.0,
+                    python_cmd: str | None = None,
+                    query_retries: int = 10
+                    ) -> list[list[Path | None]]:
+        """run_cluster: runs the variable sweep as a job array on a cluster
+        batch scheduler (e.g. SlurmScheduler or PBSScheduler) with one
+        simulation chain per array task. The herd is saved to the task
+        directory of the directory manager (see
+        DirectoryManager.get_task_dir) along with a job script that runs
+        'python -m mooseherder.jobscheduler' for each task. Each task runs its
+        chain in its own sub-directory ('task-1', 'task-2' etc.) of a run
+        directory, with the tasks spread over the run directories, and writes
+        its result to the task directory. The herd polls the scheduler and
+        the task results until the whole job array has left the queue, appending
+        each completed chain to the journal, and then writes the output key
+        as for run_para. Chains whose task did not write a result (e.g.
+        because the scheduler killed it) are recorded as failed. The run
+        directories must be on a file system shared with the compute nodes.
+        Failed scheduler queries (e.g. a timed out controller) are retried at
+        the next poll. If polling is interrupted (e.g. Ctrl+C) or the queries
+        keep failing the job array is cancelled.
+
+        Args:
+            var_sweep (list[list[dict | None]] | SweepDesign): as run_para.
+            scheduler (JobScheduler): scheduler used to submit and poll the
+                job array.
+            poll_time (float, optional): time in seconds between polls of the
+                scheduler. Defaults to 30.0.
+            python_cmd (str | None, optional): python command used by the
+                tasks, the environment must have mooseherder installed.
+                Defaults to None which uses the python running the herd.
+            query_retries (int, optional): number of consecutive failed
+                scheduler queries allowed before giving up. Defaults to 10.
+
+        Raises:
+            JobSchedulerError: the job array could not be submitted or the
+                scheduler queries failed more than query_retries times in a
+                row.
+
+        Returns:
+            list[list[Path | None]]: as run_para.
+        """
+        start_sweep_time = self._start_sweep(var_sweep)
+        sweep_iter = self._sweep_iter+1
+
+        task_dir = self._dir_manager.get_task_dir(sweep_iter)
+        task_dir.mkdir(parents=True,exist_ok=True)
+
+        herd_file = task_dir / 'herd.pickle'
+        with open(herd_file,'wb') as hf:
+            pickle.dump(self,hf)
+
+        if python_cmd is None:
+            python_cmd = sys.executable
+
+        script_path = task_dir / 'job.sh'
+        script_lines = scheduler.get_script_header(
+                            f'mooseherd-{sweep_iter}',len(var_sweep),
+                            task_dir.resolve())
+        script_lines += [f'cd {shlex.quote(str(Path.cwd()))}',
+                         f'{python_cmd} -m mooseherder.jobscheduler '
+                         f'{shlex.quote(str(herd_file.resolve()))} '
+                         f'${scheduler.get_task_index_var()}',
+                         '']
+        with open(script_path,'w',encoding='utf-8') as sf:
+            sf.write('\n'.join(script_lines))
+
+        job_id = scheduler.submit(script_path)
+
+        output_files = list([None]*len(var_sweep))
+        run_results = list([None]*len(var_sweep))
+        pending = list(range(len(var_sweep)))
+        query_errors = 0
+        try:
+            while True:
+                # Check the queue first so no results are missed at the end
+                try:
+                    active = scheduler.is_active(job_id)
+                    query_errors = 0
+                except JobSchedulerError:
+                    # The job state is unknown so keep polling
+                    query_errors += 1
+                    if query_errors > query_retries:
+                        raise
+                    active = True
+
+                for ii in list(pending):
+                    task_result = self._dir_manager.read_task_result(
+                                                            sweep_iter,ii)
+                    if task_result is None:
+                        continue
+
+                    (output_files[ii],run_results[ii]) = task_result
+                    self._dir_manager.append_journal(sweep_iter,ii,
+                                                     output_files[ii],
+                                                     run_results[ii])
+                    pending.remove(ii)
+
+                # Wait for every task to leave the queue before the run
+                # directories can be reused
+                if not active:
+                    break
+
+                time.sleep(poll_time)
+        except BaseException:
+            scheduler.cancel(job_id)
+            raise
+
+        for ii in pending:
+            output_files[ii] = list([None]*len(self._runners))
+            run_results[ii] = ([RunResult(status=RUN_FAILED)] +
+                [RunResult(status=RUN_SKIPPED) for _ in self._runners[1:]])
+
+        self._end_sweep(start_sweep_time,output_files,run_results)
+
+        return output_files
+
+
+    def run_task(self, task_ind: int) -> None:
+        """run_task: runs the simulation chain for one task of the job array
+        submitted by run_cluster and writes its result to the task directory.
+        Called by each job array task on the herd saved by run_cluster. Task
+        indices beyond the end of the sweep do nothing.
+
+        Args:
+            task_ind (int): index of the job array task which is the index of
+                the simulation chain in the sweep.
+        """
+        if task_ind >= len(self._var_sweep):
+            return
+
+        sweep_iter = self._sweep_iter+1
+        sim_iter = self._sim_iter+task_ind
+
+        n_dirs = len(self._dir_manager.get_all_run_dirs())
+        run_dir = (self._dir_manager.get_run_dir(task_ind % n_dirs) /
+                   f'task-{task_ind+1}')
+        run_dir.mkdir(exist_ok=True)
+
+        output_list = self._run_chain(self._var_sweep[task_ind],run_dir,
+                                      self._get_run_num(sim_iter,
+                                                        str(task_ind+1)))
+        self._dir_manager.write_task_result(sweep_iter,task_ind,output_list,
+                                            self._iter_results)
+
+
+    def resume(self, sweep_iter: int) -> list[list[Path | None]]:
+        """resume: resumes a variable sweep that did not complete (e.g.
+        because the herd crashed) using the sweep variables and journal written
+        to the first run directory. Only the simulation chains that are not in
+        the journal, that did not run ok at every position (e.g. failed, timed
+        out or skipped) or that have outputs missing from disk, are run in
+        parallel as with run_para. The directories are not cleared and the
+        original simulation iteration numbers are used so the outputs of the
+        completed chains are kept. Once all chains have completed the output
+        key is written for the given sweep iteration.
+
+        Args:
+            sweep_iter (int): the sweep iteration to resume (i.e. the number
+                in the name of the sweep variable and journal files).
+
+        Raises:
+            FileNotFoundError: the sweep variables or journal for the sweep
+                iteration were not found.
+
+        Returns:
+            list[list[Path | None]]: as run_para for the whole sweep.
+        """
+        start_sweep_time = time.perf_counter()
+
+        var_sweep = self._dir_manager.read_sweep_vars(sweep_iter)
+        (sim_iter_start,completed,completed_results) = \
+            self._dir_manager.read_journal(sweep_iter)
+
+        output_files = list([None]*len(var_sweep))
+        run_results = list([None]*len(var_sweep))
+        jobs = list([])
+        for ii,vv in enumerate(var_sweep):
+            if ii in completed and _chain_completed(completed[ii],
+                                                    completed_results[ii]):
+                output_files[ii] = completed[ii]
+                run_results[ii] = completed_results[ii]
+            else:
+                jobs.append((ii,sim_iter_start+ii,vv,None))
+
+        if jobs:
+            for (ii,output_list,_,_,results) in self._run_pool(jobs):
+                output_files[ii] = output_list
+                run_results[ii] = results
+                self._dir_manager.append_journal(sweep_iter,ii,output_list,
+                                                 results)
+
+        self._var_sweep = var_sweep
+        self._sweep_run_time = time.perf_counter() - start_sweep_time
+        self._sweep_iter = max(self._sweep_iter,sweep_iter)
+        self._sim_iter = max(self._sim_iter,sim_iter_start+len(var_sweep))
+
+        self._dir_manager.set_output_paths(output_files)
+        self._dir_manager.write_output_key(sweep_iter)
+        self._dir_manager.write_run_results(run_results,sweep_iter)
+
+        return output_files
+
+
+    def get_iter_results(self) -> list[RunResult]:
+        """get_iter_results: gets the run result of each runner in the chain
+        for the last simulation iteration. The run results for each sweep are
+        also written to the first run directory alongside the output key.
+
+        Returns:
+            list[RunResult]: run result for each runner in the chain.
+        """
+        return self._iter_results
+
+
+    def get_iter_status(self) -> list[str]:
+        """get_iter_status: gets the run status of each runner in the chain for
+        the last simulation iteration. The status is 'ok' if the runner
+        completed, 'failed' if it returned a non-zero exit code or did not
+        write its output, 'timed_out' if it was killed by its timeout,
+        'skipped' if an earlier runner in the chain did not complete and
+        'cancelled' if the sweep was stopped early.
+
+        Returns:
+            list[str]: run status for each runner in the chain.
+        """
+        return [rr.status for rr in self._iter_results]
+
+
+    def get_sweep_stopped(self) -> bool:
+        """get_sweep_stopped: whether the last sweep was stopped early by the
+        stop function passed to run_para.
+
+        Returns:
+            bool: True if chains in the last sweep were cancelled.
+        """
+        return self._sweep_stopped
+
+
     def get_sweep_time(self) -> float:
         """get_sweep_time
 
@@ -403,10 +1883,399 @@ class MooseHerd:
 
 
     def get_iter_time(self) -> float:
-        """get_iter_time
+        """get_iter_time: gets the run time of the last simulation iteration.
+        For run_para and run_iter this is the chain that completed last, see
+        SweepTelemetry for the times of every chain in the sweep.
 
         Returns
             float: the time taken for the current simulation iteration to run.
         """
         return self._iter_run_time
 
+
+def get_available_cpus() -> list[int]:
+    """get_available_cpus: gets the ids of the cpus this process is allowed to
+    run on.
+
+    Returns:
+        list[int]: sorted list of cpu ids.
+    """
+    if hasattr(os,'sched_getaffinity'):
+        return sorted(os.sched_getaffinity(0))
+
+    n_cpus = os.cpu_count()
+    if n_cpus is None:
+        n_cpus = 1
+    return list(range(n_cpus))
+
+
+def _outputs_exist(output_list: list[Path | None]) -> bool:
+    """_outputs_exist: helper function to check that all outputs of a
+    simulation chain exist on disk.
+
+    Args:
+        output_list (list[Path | None]): paths to the outputs of the chain.
+
+    Returns:
+        bool: True if all outputs that are not None exist.
+    """
+    return all(oo is None or oo.is_file() for oo in output_list)
+
+
+def _chain_completed(output_list: list[Path | None],
+                     run_results: list[RunResult] | None) -> bool:
+    """_chain_completed: helper function to check that a simulation chain in
+    the journal does not need to be run again when the sweep is resumed.
+
+    Args:
+        output_list (list[Path | None]): paths to the outputs of the chain.
+        run_results (list[RunResult] | None): run results of the chain, None
+            if they were not recorded.
+
+    Returns:
+        bool: True if every position in the chain ran ok and all outputs
+            exist.
+    """
+    if run_results is None:
+        return False
+
+    return (all(rr.status == RUN_OK for rr in run_results)
+            and _outputs_exist(output_list))
+
+
+def _get_cached_results(cached_outputs: list[Path | None]) -> list[RunResult]:
+    """_get_cached_results: helper function to create the run results for a
+    simulation chain whose outputs were found in the cache.
+
+    Args:
+        cached_outputs (list[Path | None]): paths to the cached outputs.
+
+    Returns:
+        list[RunResult]: run result for each position in the chain.
+    """
+    cached_results = list([])
+    for oo in cached_outputs:
+        cached_results.append(RunResult(wall_time=0.0))
+        cached_results[-1].check_output(oo)
+
+    return cached_results
+
+
+def _get_cancelled_results(n_runners: int) -> list[RunResult]:
+    """_get_cancelled_results: helper function to create the run results for
+    a simulation chain that was cancelled because the sweep was stopped.
+
+    Args:
+        n_runners (int): number of runners in the chain.
+
+    Returns:
+        list[RunResult]: run result for each position in the chain.
+    """
+    return [RunResult(status=RUN_CANCELLED) for _ in range(n_runners)]
+
+
+def _add_render_times(run_results: list[RunResult],
+                      render_times: list[float]) -> None:
+    """_add_render_times: helper function that records the time taken to write
+    the input file for each position in the chain, see
+    MooseHerd.set_profile_flag. Does nothing if profiling is turned off as the
+    render times are then empty.
+
+    Args:
+        run_results (list[RunResult]): run result for each position in the
+            chain.
+        render_times (list[float]): time in seconds to write each input file.
+    """
+    for rr,tt in zip(run_results,render_times):
+        rr.timings['render'] = tt
+
+
+def _read_chain(read_func: Callable,
+                output_list: list[Path | None],
+                run_results: list[RunResult],
+                profile: bool) -> Any:
+    """_read_chain: helper function that calls the read function on the
+    outputs of a chain. When profiling is turned on the time taken and the
+    time spent in each ExodusReader read method are recorded in the run result
+    of the last position in the chain, see MooseHerd.set_profile_flag.
+
+    Args:
+        read_func (Callable): function to read the chain outputs.
+        output_list (list[Path | None]): paths to the chain outputs.
+        run_results (list[RunResult]): run results of the chain.
+        profile (bool): True if profiling is turned on.
+
+    Returns:
+        Any: the result of the read function.
+    """
+    if not profile:
+        return read_func(output_list)
+
+    pop_read_times()
+    set_read_profiling(True)
+    start_time = time.perf_counter()
+    try:
+        read_data = read_func(output_list)
+    finally:
+        set_read_profiling(False)
+
+    timings = run_results[-1].timings
+    timings['read'] = time.perf_counter() - start_time
+    for kk,tt in pop_read_times().items():
+        timings[f'read:{kk}'] = tt
+
+    return read_data
+
+
+class _ChainCancelled(BaseException):
+    """_ChainCancelled: raised in a run_para worker by the stop signal to kill
+    the running simulation chain. Derives from BaseException so that runners
+    clean up their process group and re-raise it as for KeyboardInterrupt.
+    """
+
+
+_worker_herd = None
+""" Copy of the herd held by each worker process started by run_para.
+"""
+
+_worker_stop = None
+""" Event set by the herd to stop the sweep early, see MooseHerd.run_para.
+"""
+
+_worker_in_chain = False
+""" True while the worker is running a job that the stop signal can kill.
+"""
+
+_worker_starts = None
+""" Queue the worker puts the start of each chain on for the telemetry.
+"""
+
+def _init_worker(herd: MooseHerd,
+                 worker_nums: Any,
+                 stop_event: Any = None,
+                 kill_running: bool = False,
+                 start_queue: Any = None) -> None:
+    """_init_worker: initialises a run_para worker process by storing the herd
+    and assigning the worker a fixed number which sets its working directory
+    and cpu set. If running chains are to be killed when the sweep is stopped
+    a thread is started that signals the worker once the stop event is set.
+    The pool terminates its workers with SIGTERM (e.g. when run_iter is closed
+    early) so the worker exits through the runners, which kill the process
+    groups of the running simulations.
+
+    Args:
+        herd (MooseHerd): the herd that started the worker.
+        worker_nums (mp.Queue): queue of worker numbers to assign.
+        stop_event (mp.Event | None, optional): event used to stop the sweep
+            early. Defaults to None.
+        kill_running (bool, optional): kill the running chain when the stop
+            event is set. Defaults to False.
+        start_queue (mp.Queue | None, optional): queue to put the start of
+            each chain on for the telemetry. Defaults to None.
+    """
+    global _worker_herd, _worker_stop, _worker_starts # pylint: disable=global-statement
+    _worker_herd = herd
+    _worker_herd._worker_num = worker_nums.get() # pylint: disable=protected-access
+    _worker_herd._bind_worker() # pylint: disable=protected-access
+
+    _worker_stop = stop_event
+    _worker_starts = start_queue
+    signal.signal(signal.SIGTERM,_exit_worker)
+    if stop_event is not None and kill_running and hasattr(signal,'SIGUSR1'):
+        signal.signal(signal.SIGUSR1,_cancel_chain)
+        threading.Thread(target=_watch_stop,args=(stop_event,),
+                         daemon=True).start()
+
+
+def _exit_worker(signum: int, frame: Any) -> None: # pylint: disable=unused-argument
+    """_exit_worker: signal handler that exits the worker. The simulations are
+    started in their own sessions so they do not get the signal, raising
+    SystemExit lets the runner kill them before the worker exits.
+    """
+    raise SystemExit(128+signum)
+
+
+def _watch_stop(stop_event: Any) -> None:
+    """_watch_stop: waits in a worker thread for the stop event and then
+    signals the worker so the running chain is killed in the main thread.
+
+    Args:
+        stop_event (mp.Event): event used to stop the sweep early.
+    """
+    stop_event.wait()
+    os.kill(os.getpid(),signal.SIGUSR1)
+
+
+def _cancel_chain(signum: int, frame: Any) -> None: # pylint: disable=unused-argument
+    """_cancel_chain: signal handler that kills the running chain. The signal
+    is ignored between jobs as the next job checks the stop event.
+    """
+    if _worker_in_chain:
+        raise _ChainCancelled()
+
+
+def _run_unless_stopped(run_func: Callable[[],Any],
+                        sweep_inds: list[int]) -> tuple[bool,Any]:
+    """_run_unless_stopped: helper function that runs a job in a run_para
+    worker unless the sweep has been stopped, allowing the job to be killed by
+    the stop signal while it runs.
+
+    Args:
+        run_func (Callable[[],Any]): function that runs the job.
+        sweep_inds (list[int]): index in the sweep of the chains started by
+            the job, reported to the telemetry.
+
+    Returns:
+        tuple[bool,Any]: False if the job was cancelled and the return value
+            of run_func.
+    """
+    global _worker_in_chain # pylint: disable=global-statement
+    try:
+        _worker_in_chain = True
+        if _worker_stop is not None and _worker_stop.is_set():
+            _worker_in_chain = False
+            return (False,None)
+
+        if _worker_starts is not None:
+            for ii in sweep_inds:
+                _worker_starts.put((ii,time.time(),
+                                    _worker_herd._worker_num)) # type: ignore # pylint: disable=protected-access
+
+        result = run_func()
+        _worker_in_chain = False
+        return (True,result)
+    except _ChainCancelled:
+        _worker_in_chain = False
+        return (False,None)
+
+
+def _run_worker(job: tuple[int,int,list[dict | None],Callable | None]
+                ) -> tuple[int,list[Path | None],float,Any,list[RunResult]]:
+    """_run_worker: runs a single simulation chain in a run_para worker.
+
+    Args:
+        job (tuple[int,int,list[dict | None],Callable | None]): index of the
+            chain in the variable sweep, simulation iteration, list of
+            variables and optional function to read the outputs.
+
+    Returns:
+        tuple[int,list[Path | None],float,Any,list[RunResult]]: index of the
+            chain in the variable sweep, the list of paths to the simulation
+            output, the chain run time, the result of the read function and the
+            run result of each runner in the chain.
+    """
+    (sweep_ind,sim_iter,var_list,read_func) = job
+    (ran,output_list) = _run_unless_stopped(
+        lambda: _worker_herd.run_once(sim_iter,var_list), # type: ignore
+        [sweep_ind])
+    if not ran:
+        return (sweep_ind,[None]*len(var_list),0.0,None,
+                _get_cancelled_results(len(var_list)))
+
+    run_time = _worker_herd.get_iter_time() # type: ignore
+
+    run_results = _worker_herd.get_iter_results() # type: ignore
+
+    read_data = None
+    if read_func is not None:
+        read_data = _read_chain(read_func,output_list,run_results,
+                                _worker_herd._profile) # type: ignore # pylint: disable=protected-access
+
+    return (sweep_ind,output_list,run_time,read_data,run_results)
+
+
+def _chunk_jobs(jobs: Iterable[tuple[int,int,list[dict | None],
+                                     Callable | None]],
+                batch_size: int
+                ) -> Iterator[list[tuple[int,int,list[dict | None],
+                                         Callable | None]]]:
+    """_chunk_jobs: helper function that groups the jobs into batches as they
+    are taken from the job iterator.
+
+    Args:
+        jobs (Iterable[tuple[int,int,list[dict | None],Callable | None]]):
+            jobs as passed to _run_worker.
+        batch_size (int): number of jobs per batch.
+
+    Yields:
+        list[tuple[int,int,list[dict | None],Callable | None]]: batch of jobs.
+    """
+    job_iter = iter(jobs)
+    while True:
+        batch = list(itertools.islice(job_iter,batch_size))
+        if not batch:
+            return
+        yield batch
+
+
+def _run_batch_worker(batch: list[tuple[int,int,list[dict | None],
+                                        Callable | None]]
+                      ) -> list[tuple[int,list[Path | None],float,Any,
+                                      list[RunResult]]]:
+    """_run_batch_worker: runs a batch of simulation chains in a run_para
+    worker, see MooseHerd.set_batch_size().
+
+    Args:
+        batch (list[tuple[int,int,list[dict | None],Callable | None]]): jobs
+            for each chain in the batch as passed to _run_worker.
+
+    Returns:
+        list[tuple[int,list[Path | None],float,Any,list[RunResult]]]: as
+            _run_worker for each chain in the batch.
+    """
+    (ran,batch_run) = _run_unless_stopped(
+        lambda: _worker_herd.run_batch_once([jj[1] for jj in batch], # type: ignore
+                                            [jj[2] for jj in batch]),
+        [jj[0] for jj in batch])
+    if not ran:
+        return [(jj[0],[None]*len(jj[2]),0.0,None,
+                 _get_cancelled_results(len(jj[2]))) for jj in batch]
+
+    (output_lists,result_lists,run_times) = batch_run
+    batch_out = list([])
+    for jj,oo,rr,tt in zip(batch,output_lists,result_lists,run_times):
+        read_data = None
+        if jj[3] is not None:
+            read_data = _read_chain(jj[3],oo,rr,
+                                    _worker_herd._profile) # type: ignore # pylint: disable=protected-access
+        batch_out.append((jj[0],oo,tt,read_data,rr))
+
+    return batch_out
+
+
+def _run_stage_worker(job: tuple[int,int,Path,dict | None,list[Path | None],
+                                 Callable | None]
+                      ) -> tuple[int,int,Path | None,RunResult,bool,Any]:
+    """_run_stage_worker: runs a single position of a simulation chain in a
+    worker when the herd is pipelined, see MooseHerd.set_pipeline_flag().
+
+    Args:
+        job (tuple[int,int,Path,dict | None,list[Path | None],Callable | None]):
+            index of the chain in the variable sweep, position in the chain,
+            path to the input file, variables used to write the input file,
+            outputs of the earlier positions in the chain and optional
+            function to read the chain outputs once the last position has run.
+
+    Returns:
+        tuple[int,int,Path | None,RunResult,bool,Any]: index of the chain in
+            the variable sweep, position in the chain, path to the output, the
+            run result, True if degraded retry settings were used and the
+            result of the read function.
+    """
+    (sweep_ind,stage,run_file,mod_vars,prev_outputs,read_func) = job
+    (ran,stage_run) = _run_unless_stopped(
+        lambda: _worker_herd._run_retry(stage,run_file,mod_vars), # type: ignore # pylint: disable=protected-access
+        list([]))
+    if not ran:
+        return (sweep_ind,stage,None,RunResult(status=RUN_CANCELLED),False,
+                None)
+
+    (output_path,run_result,degraded) = stage_run
+
+    read_data = None
+    if read_func is not None:
+        read_data = _read_chain(read_func,prev_outputs + [output_path],
+                                [run_result],
+                                _worker_herd._profile) # type: ignore # pylint: disable=protected-access
+
+    return (sweep_ind,stage,output_path,run_result,degraded,read_data)
@@ -6,9 +6,9 @@ Authors: Lloyd Fletcher, Rory Spencer
 ===============================================================================
 '''
 import os
-import subprocess
 from pathlib import Path
-from mooseherder.simrunner import SimRunner
+from typing import Any
+from mooseherder.simrunner import SimRunner, RunResult, RUN_TIMED_OUT, run_process
 from mooseherder.mooseconfig import MooseConfig
 
 class MooseRunner(SimRunner):
@@ -29,8 +29,12 @@ class MooseRunner(SimRunner):
         self._n_threads = 1
         self._n_tasks = 1
         self._redirect_stdout = True
+        self._timing = False
         self._arg_list = list('')
         self._input_path = None
+        self._cpu_set = None
+        self._timeout = None
+        self._run_result = None
 
 
     def set_env_vars(self) -> None:
@@ -86,6 +90,18 @@ class MooseRunner(SimRunner):
         """
         self._redirect_stdout = redirect_flag
 
+    def set_timing_flag(self, timing: bool = True) -> None:
+        """set_timing_flag: runs MOOSE with '--timing' so that the PerfGraph
+        table is printed at the end of the run. When the stdout is redirected
+        the table is read after the run to break the run time down into start
+        up, setup, solve and output, see get_timings.
+
+        Args:
+            timing (bool, optional): True to turn on the MOOSE timing output.
+                Defaults to True.
+        """
+        self._timing = timing
+
     def set_run_opts(self, n_tasks: int = 1,
                     n_threads: int = 1,
                     redirect_out: bool = True) -> None:
@@ -104,6 +120,106 @@ class MooseRunner(SimRunner):
         self.set_stdout(redirect_out)
 
 
+    def set_timeout(self, timeout: float | None = None) -> None:
+        """set_timeout: sets the wall clock time after which the MOOSE run is
+        killed along with any MPI processes it started.
+
+        Args:
+            timeout (float | None, optional): timeout in seconds. Defaults to
+                None for no timeout.
+
+        Raises:
+            ValueError: the timeout is not positive.
+        """
+        if timeout is not None and timeout <= 0:
+            raise ValueError('Timeout must be positive or None.')
+
+        self._timeout = timeout
+
+
+    def get_timeout(self) -> float | None:
+        """get_timeout
+
+        Returns:
+            float | None: timeout in seconds or None for no timeout.
+        """
+        return self._timeout
+
+
+    def get_timed_out(self) -> bool:
+        """get_timed_out: whether the last run was killed because it exceeded
+        the timeout.
+
+        Returns:
+            bool: True if the last run timed out.
+        """
+        return (self._run_result is not None
+                and self._run_result.status == RUN_TIMED_OUT)
+
+
+    def get_run_result(self) -> RunResult | None:
+        """get_run_result: record of the last run including the exit code,
+        wall time, peak memory and stdout path.
+
+        Returns:
+            RunResult | None: record of the last run, None if not run yet.
+        """
+        return self._run_result
+
+
+    def get_num_cores(self) -> int:
+        """get_num_cores: number of cores used by MOOSE based on the number of
+        MPI tasks and threads per task.
+
+        Returns:
+            int: number of MPI tasks multiplied by the number of threads.
+        """
+        return self._n_tasks*self._n_threads
+
+
+    def set_cpu_set(self, cpus: list[int] | None) -> None:
+        """set_cpu_set: sets the cpus MOOSE is allowed to run on. When more
+        than one MPI task is used the cpu set is passed to mpirun (Open MPI
+        syntax) and each task is bound to n_threads cores within the set.
+
+        Args:
+            cpus (list[int] | None): list of cpu ids, if None no binding
+                options are passed to mpirun.
+        """
+        self._cpu_set = cpus
+
+
+    def get_cache_key(self) -> str:
+        """get_cache_key: string describing the MOOSE app and run options used
+        to build the hash for caching simulation outputs.
+
+        Returns:
+            str: cache key string.
+        """
+        return (f'MooseRunner:{self._config["app_name"]}:tasks={self._n_tasks}'
+                f':threads={self._n_threads}')
+
+
+    def get_timings(self) -> dict[str,float]:
+        """get_timings: breaks the last run down into sections using the
+        PerfGraph table in the redirected stdout, see set_timing_flag and
+        read_perf_graph. The sections are 'startup' (process and MPI start up
+        before the MOOSE app is timed), 'setup' (input parsing, mesh and
+        problem setup), 'solve' and 'output' (writing the outputs).
+
+        Returns:
+            dict[str,float]: time in seconds for each section, empty if timing
+                is off, the stdout is not redirected or the table is not found.
+        """
+        if (not self._timing or self._run_result is None
+            or self._run_result.stdout_path is None
+            or not self._run_result.stdout_path.is_file()):
+            return dict({})
+
+        sections = read_perf_graph(self._run_result.stdout_path)
+        return _sum_perf_graph(sections,self._run_result.wall_time)
+
+
     def get_input_file(self) -> Path | None:
         """get_input_file
 
@@ -196,11 +312,19 @@ class MooseRunner(SimRunner):
         arg_list = []
         if self._n_tasks > 1:
             arg_list = ['mpirun','-np',str(self._n_tasks)]
+            if self._cpu_set is not None:
+                arg_list = arg_list + ['--cpu-set',
+                                       ','.join([str(cc) for cc in self._cpu_set]),
+                                       '--map-by',f'slot:PE={self._n_threads}',
+                                       '--bind-to','core']
 
         arg_list = arg_list + [str(self._config['app_name']) \
                     ,f'--n-threads={self._n_threads}','-i' \
                     ,str(self._input_path.name)]
 
+        if self._timing:
+            arg_list = arg_list + ['--timing']
+
         if self._redirect_stdout:
             arg_list = arg_list + ['--redirect-stdout']
 
@@ -209,9 +333,107 @@ class MooseRunner(SimRunner):
         return self._arg_list
 
 
+    def get_run_command(self, input_file: Path
+                        ) -> tuple[list[str],Path | None,float | None]:
+        """get_run_command: sets the input file and environment variables and
+        gets the command that run would execute, see SimRunner.
+
+        Args:
+            input_file (Path): full path to the MOOSE input file.
+
+        Returns:
+            tuple[list[str],Path | None,float | None]: MOOSE command line, the
+                input file directory to run it in and the timeout.
+        """
+        self.set_input_file(input_file)
+        self.set_env_vars()
+        return (self._arg_list,input_file.parent,self._timeout)
+
+
+    def set_run_result(self, run_result: RunResult) -> None:
+        """set_run_result: sets the record of a run started by the herd using
+        the command from get_run_command filling in the stdout path.
+
+        Args:
+            run_result (RunResult): record of the run.
+        """
+        if self._redirect_stdout and self._input_path is not None:
+            run_result.stdout_path = self._input_path.parent / 'stdout.processor.0'
+        self._run_result = run_result
+
+
+    def get_batch_support(self) -> bool:
+        """get_batch_support: MOOSE input files can be batched into a single
+        MOOSE run, see run_batch.
+
+        Returns:
+            bool: True.
+        """
+        return True
+
+
+    def run_batch(self, input_files: list[Path]) -> list[RunResult]:
+        """run_batch: runs several MOOSE input files in a single MOOSE run so
+        that the app and MPI start up cost is only paid once for the batch. A
+        batch input file is written in the directory containing all of the
+        input files, which may be in different sub-directories, and MOOSE is
+        run from there. The batch runs each input file as a sub-app of a
+        FullSolveMultiApp with the output file base set so that each sub-app
+        writes the same output file as it would when run on its own. Files
+        referenced by the input files (e.g. meshes) are resolved by MOOSE
+        relative to each input file. The sub-apps are solved one after the other using the MPI
+        tasks and threads set for the runner. If a timeout is set it applies
+        to each input file so the batch is killed after the timeout multiplied
+        by the number of input files.
+
+        Args:
+            input_files (list[Path]): paths to the MOOSE input files.
+
+        Raises:
+            ValueError: no input files were given.
+            FileNotFoundError: an input file does not exist.
+
+        Returns:
+            list[RunResult]: run result for each input file. The exit code,
+                peak memory and stdout path are those of the batch and the wall
+                time of the batch is split equally between the input files. If
+                the batch fails every input file is marked as failed as the
+                failing input file cannot be identified.
+        """
+        batch_dir = get_batch_dir(input_files)
+        batch_path = batch_dir / f'batch-{input_files[0].stem}.i'
+        write_batch_input(batch_path,input_files)
+        self.set_input_file(batch_path)
+        self.set_env_vars()
+
+        timeout = None
+        if self._timeout is not None:
+            timeout = self._timeout*len(input_files)
+
+        self._run_result = run_process(self._arg_list,
+                                       cwd=batch_dir,
+                                       timeout=timeout)
+        if self._redirect_stdout:
+            self._run_result.stdout_path = batch_dir / 'stdout.processor.0'
+
+        run_results = list([])
+        for ff in input_files:
+            run_results.append(RunResult(
+                status=self._run_result.status,
+                exit_code=self._run_result.exit_code,
+                wall_time=self._run_result.wall_time/len(input_files),
+                peak_rss=self._run_result.peak_rss,
+                stdout_path=self._run_result.stdout_path))
+            if self._run_result.status != RUN_TIMED_OUT:
+                run_results[-1].check_output(get_batch_output_path(ff))
+
+        return run_results
+
+
     def run(self, input_file = None) -> None:
         """Runs MOOSE based on current options by passing run string to
-        subprocess shell.
+        subprocess shell. If a timeout is set and exceeded MOOSE and all of
+        its child processes are killed.
 
         Args:
             input_file (Path, optional): Full path to MOOSE input file, if not
@@ -226,7 +448,202 @@ class MooseRunner(SimRunner):
         self.set_env_vars()
 
         self.assemble_arg_list()
-        subprocess.run(self._arg_list,
-                       shell=False,
-                       cwd=str(self._input_path.parent),
-                       check=False)
+        self._run_result = run_process(self._arg_list,
+                                       cwd=self._input_path.parent,
+                                       timeout=self._timeout)
+        if self._redirect_stdout:
+            self._run_result.stdout_path = (self._input_path.parent /
+                                            'stdout.processor.0')
+
+
+def get_batch_dir(input_files: list[Path]) -> Path:
+    """get_batch_dir: checks the input files for a batched MOOSE run and gets
+    the directory the batch is run from, see MooseRunner.run_batch.
+
+    Args:
+        input_files (list[Path]): paths to the MOOSE input files.
+
+    Raises:
+        ValueError: no input files were given.
+        FileNotFoundError: an input file does not exist.
+
+    Returns:
+        Path: deepest directory containing all of the input files.
+    """
+    if len(input_files) == 0:
+        raise ValueError('No input files given for the batch.')
+
+    for ff in input_files:
+        if not ff.is_file():
+            raise FileNotFoundError("Input file does not exist.")
+
+    return Path(os.path.commonpath([ff.parent.absolute()
+                                    for ff in input_files]))
+
+
+def get_batch_output_path(input_path: Path) -> Path:
+    """get_batch_output_path: gets the exodus output file written by an input
+    file run as part of a batch, see MooseRunner.run_batch. This matches the
+    output path when the input file is run on its own.
+
+    Args:
+        input_path (Path): path to the MOOSE input file.
+
+    Returns:
+        Path: path to the exodus output file.
+    """
+    return input_path.parent / (input_path.stem + '_out.e')
+
+
+def write_batch_input(batch_path: Path, input_files: list[Path]) -> None:
+    """write_batch_input: writes a MOOSE input file that runs each of the
+    given input files as a sub-app of a FullSolveMultiApp. The batch input
+    has no variables to solve and writes no output, the output file base of
+    each sub-app is set on its command line to '<input file name>_out' in the
+    directory of the input file.
+
+    Args:
+        batch_path (Path): path to write the batch input file to, MOOSE must
+            be run from this directory.
+        input_files (list[Path]): paths to the input files to run as sub-apps.
+            Written relative to the batch input file directory.
+    """
+    batch_dir = batch_path.parent.absolute()
+    in_names = [os.path.relpath(ff.absolute(),batch_dir) for ff in input_files]
+    out_bases = [os.path.relpath(ff.absolute().parent / f'{ff.stem}_out',
+                                 batch_dir) for ff in input_files]
+    cli_args = [f"'Outputs/file_base={oo}'" for oo in out_bases]
+    positions = ' '.join(['0 0 0']*len(input_files))
+
+    batch_lines = ['# Batch of MOOSE input files written by the mooseherder',
+                   '[Mesh]',
+                   '  type = GeneratedMesh',
+                   '  dim = 1',
+                   '[]',
+                   '',
+                   '[Problem]',
+                   '  solve = false',
+                   '  kernel_coverage_check = false',
+                   '[]',
+                   '',
+                   '[Executioner]',
+                   '  type = Steady',
+                   '[]',
+                   '',
+                   '[MultiApps]',
+                   '  [batch]',
+                   '    type = FullSolveMultiApp',
+                   f"    input_files = '{' '.join(in_names)}'",
+                   f"    positions = '{positions}'",
+                   f"    cli_args = {' '.join(cli_args)}",
+                   '    execute_on = INITIAL',
+                   '  []',
+                   '[]',
+                   '']
+
+    with open(batch_path,'w',encoding='utf-8') as bf:
+        bf.write('\n'.join(batch_lines))
+
+
+def read_perf_graph(stdout_path: Path) -> list[dict[str,Any]]:
+    """read_perf_graph: reads the last PerfGraph table printed by MOOSE when
+    run with '--timing' or with 'perf_graph = true' in the Outputs block. The
+    column layout changes between MOOSE versions so the columns are found
+    using the table header.
+
+    Args:
+        stdout_path (Path): path to the MOOSE stdout file.
+
+    Returns:
+        list[dict[str,Any]]: one entry for each row of the table in the order
+            printed with the keys 'section', 'depth' (nesting level starting
+            from 0), 'calls', 'self_time' and 'total_time' in seconds. Empty
+            if no table is found.
+    """
+    with open(stdout_path,'r',encoding='utf-8',errors='replace') as sf:
+        lines = sf.read().splitlines()
+
+    header_inds = [ii for ii,ll in enumerate(lines)
+                   if ll.lstrip().startswith('|') and 'Section' in ll
+                   and 'Calls' in ll]
+    if len(header_inds) == 0:
+        return list([])
+
+    header = [hh.strip() for hh in lines[header_inds[-1]].split('|')]
+    calls_col = header.index('Calls')
+    self_col = header.index('Self(s)')
+    total_col = header.index('Total(s)')
+
+    sections = list([])
+    for ll in lines[header_inds[-1]+1:]:
+        if ll.strip() == '' or ll.strip().startswith('-'):
+            if len(sections) > 0:
+                break
+            continue
+        if not ll.lstrip().startswith('|'):
+            break
+
+        cols = ll.split('|')
+        name = cols[1].rstrip()
+        try:
+            sections.append({'section': name.strip(),
+                             'depth': (len(name)-len(name.lstrip())-1)//2,
+                             'calls': int(cols[calls_col]),
+                             'self_time': float(cols[self_col]),
+                             'total_time': float(cols[total_col])})
+        except (ValueError, IndexError):
+            continue
+
+    return sections
+
+
+def _sum_perf_graph(sections: list[dict[str,Any]], wall_time: float
+                    ) -> dict[str,float]:
+    """_sum_perf_graph: helper function that sums the rows of the PerfGraph
+    table into the sections returned by MooseRunner.get_timings. Output rows
+    are any row with 'output' in the section name, rows nested in an output
+    row are not counted again. Output rows inside the execute section are
+    taken off the solve time.
+
+    Args:
+        sections (list[dict[str,Any]]): rows of the table from
+            read_perf_graph.
+        wall_time (float): wall clock time of the run in seconds.
+
+    Returns:
+        dict[str,float]: time in seconds for each section.
+    """
+    if len(sections) == 0:
+        return dict({})
+
+    timings = dict({})
+    if wall_time >= 0.0:
+        timings['startup'] = max(wall_time-sections[0]['total_time'],0.0)
+
+    output_time = 0.0
+    solve_output_time = 0.0
+    output_depth = None
+    in_execute = False
+    for ss in sections:
+        if output_depth is not None and ss['depth'] > output_depth:
+            continue
+        output_depth = None
+
+        if ss['depth'] == 1:
+            in_execute = ss['section'].endswith('::execute')
+            if ss['section'].endswith('::setup'):
+                timings['setup'] = ss['total_time']
+            elif in_execute:
+                timings['solve'] = ss['total_time']
+
+        if 'output' in ss['section'].lower():
+            output_time += ss['total_time']
+            output_depth = ss['depth']
+            if in_execute:
+                solve_output_time += ss['total_time']
+
+    timings['output'] = output_time
+    if 'solve' in timings:
+        timings['solve'] = max(timings['solve']-solve_output_time,0.0)
+
+    return timings
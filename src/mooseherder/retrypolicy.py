@@ -0,0 +1,83 @@
+'''
+===============================================================================
+RetryPolicy Class
+
+Authors: Lloyd Fletcher
+===============================================================================
+'''
+from dataclasses import dataclass
+from collections.abc import Callable
+from pathlib import Path
+from mooseherder.simrunner import SimRunner, RunResult, RUN_FAILED
+
+
+@dataclass
+class RetryPolicy:
+    """ Retry policy for a position in the herd simulation chain, see
+    MooseHerd.set_retry_policies(). Failed runs are retried in the same herd
+    worker straight away, after waiting for the backoff time, so retries do not
+    need a second sweep. Callables must be picklable (i.e. module level
+    functions) so that the policy can be sent to the parallel workers.
+    """
+    max_retries: int = 1
+    """ Maximum number of times to retry the run after the first attempt.
+    """
+
+    retry_on: tuple[str,...] = (RUN_FAILED,)
+    """ Run statuses that trigger a retry e.g. ('failed','timed_out').
+    """
+
+    backoff: float = 0.0
+    """ Time in seconds to wait before the first retry.
+    """
+
+    backoff_factor: float = 2.0
+    """ Factor the wait time is multiplied by for each subsequent retry.
+    """
+
+    degrade_vars: dict | None = None
+    """ Variables to substitute into the input file for retries e.g.
+    {'time_end': 1.0}. The variables must exist in the input file. None uses
+    the same input file as the first attempt.
+    """
+
+    degrade_runner: Callable[[SimRunner,int],None] | None = None
+    """ Function called with a copy of the runner and the retry number (from 1)
+    before each retry to change the run options e.g. reduce the number of
+    threads. The runner used for the first attempt is not changed.
+    """
+
+    output_check: Callable[[Path],bool] | None = None
+    """ Function called with the path to the input file after a successful run
+    that returns False if the expected output is missing e.g. to check the
+    mesh file written by gmsh exists. The run is then recorded as failed.
+    """
+
+    def __post_init__(self) -> None:
+        if self.max_retries < 0:
+            raise ValueError('Maximum number of retries must be zero or more.')
+        if self.backoff < 0.0:
+            raise ValueError('Backoff time must be zero or more.')
+
+    def should_retry(self, run_result: RunResult, retry: int) -> bool:
+        """should_retry: whether to retry a run with the given result.
+
+        Args:
+            run_result (RunResult): result of the last attempt.
+            retry (int): number of retries already made.
+
+        Returns:
+            bool: True if the run should be retried.
+        """
+        return retry < self.max_retries and run_result.status in self.retry_on
+
+    def get_backoff(self, retry: int) -> float:
+        """get_backoff: time to wait before the given retry.
+
+        Args:
+            retry (int): retry number starting from 1.
+
+        Returns:
+            float: time to wait in seconds.
+        """
+        return self.backoff*self.backoff_factor**(retry-1)
@@ -11,7 +11,9 @@ import numpy as np
 
 @dataclass
 class SimData:
-    """ Data class for finite element simulation output.
+    """ Data class for finite element simulation output. If the data is read
+    lazily (see ExodusReader.read_lazy_sim_data) the dictionaries are replaced
+    with read-only mappings that read each variable from file on first access.
     """
     num_spat_dims: int = 3
     ''' Number of spatial dimensions in the simulation, required to determine
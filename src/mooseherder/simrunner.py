@@ -5,9 +5,137 @@ SimRunner Abstract Base Class
 Authors: Lloyd Fletcher
 ===============================================================================
 """
+import os
+import sys
+import time
+import signal
+import asyncio
+import subprocess
 from abc import ABC, abstractmethod
+from dataclasses import dataclass, field, asdict
 from pathlib import Path
 
+
+RUN_OK = 'ok'
+""" Run status recorded by the herd when a runner completes.
+"""
+RUN_TIMED_OUT = 'timed_out'
+""" Run status recorded by the herd when a runner is killed by its timeout.
+"""
+RUN_FAILED = 'failed'
+""" Run status recorded by the herd when a runner returns a non-zero exit code
+or does not write its output file.
+"""
+RUN_SKIPPED = 'skipped'
+""" Run status recorded by the herd when a runner is not run because an
+earlier runner in the simulation chain did not complete.
+"""
+RUN_CANCELLED = 'cancelled'
+""" Run status recorded by the herd when a runner is not run, or is killed,
+because the sweep was stopped early, see MooseHerd.run_para.
+"""
+
+
+@dataclass
+class RunResult:
+    """ Record of a single run of a SimRunner collected by the herd for each
+    position in the simulation chain.
+    """
+    status: str = RUN_OK
+    """ Run status: 'ok', 'failed', 'timed_out', 'skipped' or 'cancelled'.
+    """
+
+    exit_code: int | None = None
+    """ Exit code of the runner process, None if not known.
+    """
+
+    wall_time: float = -1.0
+    """ Wall clock time of the run in seconds.
+    """
+
+    peak_rss: int | None = None
+    """ Peak resident set size of the runner process and its children in bytes,
+    None if not known.
+    """
+
+    stdout_path: Path | None = None
+    """ Path to the file the runner wrote its stdout to, None if not redirected.
+    """
+
+    output_path: Path | None = None
+    """ Path to the simulation output, None if the runner has no output.
+    """
+
+    output_exists: bool = False
+    """ True if the output file exists after the run.
+    """
+
+    output_size: int = 0
+    """ Size of the output file in bytes.
+    """
+
+    attempts: int = 1
+    """ Number of attempts made by the herd including retries.
+    """
+
+    timings: dict[str,float] = field(default_factory=dict)
+    """ Stage timings in seconds recorded by the herd when profiling is turned
+    on, see MooseHerd.set_profile_flag. Keys are the stage name, optionally
+    followed by a section of that stage, e.g. 'render', 'run', 'run:solve',
+    'read' and 'read:get_node_vars'.
+    """
+
+    def check_output(self, output_path: Path | None) -> None:
+        """check_output: records the output path, whether it exists and its
+        size. Sets the status to failed if the run was ok but the exit code is
+        non-zero or the output file does not exist.
+
+        Args:
+            output_path (Path | None): path to the simulation output, None if
+                the runner has no output.
+        """
+        self.output_path = output_path
+        if output_path is not None and output_path.is_file():
+            self.output_exists = True
+            self.output_size = output_path.stat().st_size
+
+        if self.status != RUN_OK:
+            return
+
+        if ((self.exit_code is not None and self.exit_code != 0) or
+            (output_path is not None and not self.output_exists)):
+            self.status = RUN_FAILED
+
+    def to_dict(self) -> dict:
+        """to_dict: converts the record to a dictionary that can be saved as
+        json.
+
+        Returns:
+            dict: record with paths converted to strings.
+        """
+        result = asdict(self)
+        for kk in ('stdout_path','output_path'):
+            if result[kk] is not None:
+                result[kk] = str(result[kk])
+        return result
+
+    @staticmethod
+    def from_dict(result: dict) -> 'RunResult':
+        """from_dict: creates a record from a dictionary created by to_dict.
+
+        Args:
+            result (dict): record as a dictionary.
+
+        Returns:
+            RunResult: the run record.
+        """
+        result = dict(result)
+        for kk in ('stdout_path','output_path'):
+            if result.get(kk) is not None:
+                result[kk] = Path(result[kk])
+        return RunResult(**result)
+
+
 class SimRunner(ABC):
     """SimRunner: ABC for the moosherd simulation chain. A simulation has an
     input file which can be get or set. The simulation can then be run with the
@@ -36,3 +164,295 @@ class SimRunner(ABC):
         """get_output_path
         """
 
+
+    def get_num_cores(self) -> int:
+        """get_num_cores: number of cores the runner needs for one run. Used by
+        the herd to divide its core budget between parallel simulations.
+        Defaults to 1.
+        """
+        return 1
+
+
+    def set_cpu_set(self, cpus: list[int] | None) -> None:
+        """set_cpu_set: sets the cpus the runner is allowed to run on. The
+        default does nothing as processes started by the runner inherit the
+        cpu affinity of the herd worker.
+        """
+
+
+    def get_timed_out(self) -> bool:
+        """get_timed_out: whether the last run was killed because it exceeded
+        the runner timeout. Used by the herd to record the run status. Defaults
+        to False for runners without a timeout.
+        """
+        return False
+
+
+    def get_run_result(self) -> RunResult | None:
+        """get_run_result: record of the last run (exit code, wall time, peak
+        memory and stdout path). The herd fills in the output file details.
+        Defaults to None in which case the herd records the status and wall
+        time only.
+        """
+        return None
+
+
+    def get_cache_key(self) -> str:
+        """get_cache_key: string describing the runner and any run options
+        that change the output. Used by the herd to build the hash for caching
+        simulation outputs. Defaults to the class name.
+        """
+        return type(self).__name__
+
+
+    def get_timings(self) -> dict[str,float]:
+        """get_timings: breakdown of the last run into sections in seconds,
+        e.g. start up, solve and output. Used by the herd when profiling is
+        turned on, see MooseHerd.set_profile_flag. Defaults to an empty
+        dictionary in which case the herd records the total run time only.
+        """
+        return dict({})
+
+
+    def get_run_command(self, input_file: Path
+                        ) -> tuple[list[str],Path | None,float | None] | None:
+        """get_run_command: sets the input file and gets the command that run
+        would execute so the herd can start the process itself, see
+        MooseHerd.run_async. Once the process completes the herd passes the
+        run result to set_run_result. Defaults to None in which case the herd
+        calls run in a thread.
+
+        Args:
+            input_file (Path): path to the input file to run.
+
+        Returns:
+            tuple[list[str],Path | None,float | None] | None: command and
+                arguments, working directory and timeout in seconds or None if
+                the runner must be run by calling run.
+        """
+        return None
+
+
+    def set_run_result(self, run_result: RunResult) -> None:
+        """set_run_result: sets the record of a run started by the herd using
+        the command from get_run_command. The default does nothing.
+        """
+
+
+    def get_batch_support(self) -> bool:
+        """get_batch_support: whether the runner can run several input files
+        in one invocation using run_batch. Used by the herd when a batch size
+        is set. Defaults to False in which case the herd runs the input files
+        one at a time.
+        """
+        return False
+
+
+    def run_batch(self, input_files: list[Path]) -> list[RunResult]:
+        """run_batch: runs several input files in one invocation of the
+        runner and returns a run result for each input file with the output
+        file details filled in. Only called by the herd if get_batch_support
+        returns True.
+        """
+        raise NotImplementedError(
+            f'{type(self).__name__} does not support batched runs.')
+
+
+def run_process(arg_list: list[str],
+                cwd: Path | None = None,
+                timeout: float | None = None,
+                kill_wait: float = 5.0) -> RunResult:
+    """run_process: runs the command in its own process group (session) and
+    waits for it to complete. If the timeout is exceeded, or the wait is
+    interrupted, the whole process group is killed including any children
+    such as the processes started by mpirun.
+
+    Args:
+        arg_list (list[str]): command and arguments to run.
+        cwd (Path | None, optional): working directory for the command.
+            Defaults to None which uses the current working directory.
+        timeout (float | None, optional): wall clock timeout in seconds.
+            Defaults to None for no timeout.
+        kill_wait (float, optional): time in seconds to wait after sending
+            SIGTERM to the process group before sending SIGKILL. Defaults to
+            5.0.
+
+    Returns:
+        RunResult: record of the run with the status ('ok' or 'timed_out'),
+            exit code, wall time and peak memory of the process filled in.
+    """
+    start_time = time.perf_counter()
+    proc = subprocess.Popen(arg_list,
+                            shell=False,
+                            cwd=cwd,
+                            start_new_session=True)
+    try:
+        peak_rss = _wait_rusage(proc,timeout)
+        return RunResult(status=RUN_OK,
+                         exit_code=proc.returncode,
+                         wall_time=time.perf_counter() - start_time,
+                         peak_rss=peak_rss)
+    except subprocess.TimeoutExpired:
+        kill_process_group(proc,kill_wait)
+        return RunResult(status=RUN_TIMED_OUT,
+                         exit_code=proc.returncode,
+                         wall_time=time.perf_counter() - start_time)
+    except BaseException:
+        kill_process_group(proc,kill_wait)
+        raise
+
+
+def _wait_rusage(proc: subprocess.Popen, timeout: float | None) -> int | None:
+    """_wait_rusage: helper function that waits for the process to exit and
+    collects its resource usage. Polls with wait4 where available backing off
+    up to 0.1s between polls.
+
+    Args:
+        proc (subprocess.Popen): process to wait for.
+        timeout (float | None): timeout in seconds, None to wait forever.
+
+    Raises:
+        subprocess.TimeoutExpired: the process did not exit before the timeout.
+
+    Returns:
+        int | None: peak resident set size of the process and any children it
+            waited for in bytes, None if not available on this platform.
+    """
+    if not hasattr(os,'wait4'):
+        proc.wait(timeout=timeout)
+        return None
+
+    end_time = None
+    if timeout is not None:
+        end_time = time.perf_counter() + timeout
+
+    poll_time = 0.001
+    while True:
+        (pid,status,rusage) = os.wait4(proc.pid,os.WNOHANG)
+        if pid != 0:
+            proc.returncode = os.waitstatus_to_exitcode(status)
+            # ru_maxrss is in bytes on macOS and kilobytes on Linux
+            if sys.platform == 'darwin':
+                return rusage.ru_maxrss
+            return rusage.ru_maxrss*1024
+
+        if end_time is not None and time.perf_counter() >= end_time:
+            raise subprocess.TimeoutExpired(proc.args,timeout) # type: ignore
+
+        time.sleep(poll_time)
+        poll_time = min(2*poll_time,0.1)
+
+
+def kill_process_group(proc: subprocess.Popen, kill_wait: float = 5.0) -> None:
+    """kill_process_group: terminates the process group led by the given
+    process, sending SIGTERM then SIGKILL if the process has not exited after
+    kill_wait seconds. Falls back to killing the process on platforms without
+    process groups.
+
+    Args:
+        proc (subprocess.Popen): process started with start_new_session=True.
+        kill_wait (float, optional): time in seconds to wait after SIGTERM
+            before sending SIGKILL. Defaults to 5.0.
+    """
+    if not hasattr(os,'killpg'):
+        proc.kill()
+        proc.wait()
+        return
+
+    try:
+        os.killpg(proc.pid,signal.SIGTERM)
+        proc.wait(timeout=kill_wait)
+    except subprocess.TimeoutExpired:
+        pass
+    except ProcessLookupError:
+        pass
+
+    try:
+        # Children of the group leader can outlive it so always clean up
+        os.killpg(proc.pid,signal.SIGKILL)
+    except ProcessLookupError:
+        pass
+    proc.wait()
+
+
+async def run_process_async(arg_list: list[str],
+                            cwd: Path | None = None,
+                            timeout: float | None = None,
+                            kill_wait: float = 5.0) -> RunResult:
+    """run_process_async: as run_process but runs the command as an asyncio
+    subprocess so many processes can be managed from one event loop. If the
+    timeout is exceeded, or the task awaiting this coroutine is cancelled, the
+    whole process group is killed. The peak memory of the process is not
+    available as asyncio reaps the process.
+
+    Args:
+        arg_list (list[str]): command and arguments to run.
+        cwd (Path | None, optional): working directory for the command.
+            Defaults to None which uses the current working directory.
+        timeout (float | None, optional): wall clock timeout in seconds.
+            Defaults to None for no timeout.
+        kill_wait (float, optional): time in seconds to wait after sending
+            SIGTERM to the process group before sending SIGKILL. Defaults to
+            5.0.
+
+    Returns:
+        RunResult: record of the run with the status ('ok' or 'timed_out'),
+            exit code and wall time of the process filled in.
+    """
+    start_time = time.perf_counter()
+    proc = await asyncio.create_subprocess_exec(*arg_list,
+                                                cwd=cwd,
+                                                start_new_session=True)
+    try:
+        await asyncio.wait_for(proc.wait(),timeout)
+        return RunResult(status=RUN_OK,
+                         exit_code=proc.returncode,
+                         wall_time=time.perf_counter() - start_time)
+    except asyncio.TimeoutError:
+        await kill_process_group_async(proc,kill_wait)
+        return RunResult(status=RUN_TIMED_OUT,
+                         exit_code=proc.returncode,
+                         wall_time=time.perf_counter() - start_time)
+    except BaseException:
+        # The task can be cancelled again while killing (e.g. by gather and
+        # then by the herd) so keep waiting until the group has been killed
+        kill_task = asyncio.ensure_future(
+            kill_process_group_async(proc,kill_wait))
+        while not kill_task.done():
+            try:
+                await asyncio.shield(kill_task)
+            except asyncio.CancelledError:
+                pass
+        raise
+
+
+async def kill_process_group_async(proc: asyncio.subprocess.Process,
+                                   kill_wait: float = 5.0) -> None:
+    """kill_process_group_async: as kill_process_group for a process started
+    with asyncio.
+
+    Args:
+        proc (asyncio.subprocess.Process): process started with
+            start_new_session=True.
+        kill_wait (float, optional): time in seconds to wait after SIGTERM
+            before sending SIGKILL. Defaults to 5.0.
+    """
+    if not hasattr(os,'killpg'):
+        proc.kill()
+        await proc.wait()
+        return
+
+    try:
+        os.killpg(proc.pid,signal.SIGTERM)
+        await asyncio.wait_for(proc.wait(),kill_wait)
+    except asyncio.TimeoutError:
+        pass
+    except ProcessLookupError:
+        pass
+
+    try:
+        # Children of the group leader can outlive it so always clean up
+        os.killpg(proc.pid,signal.SIGKILL)
+    except ProcessLookupError:
+        pass
+    await proc.wait()
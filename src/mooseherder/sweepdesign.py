@@ -0,0 +1,507 @@
+'''
+===============================================================================
+Sweep Design Classes
+
+Authors: Lloyd Fletcher
+===============================================================================
+'''
+import math
+from abc import ABC, abstractmethod
+from collections.abc import Iterator, Sequence
+from typing import Any
+import numpy as np
+
+
+class SweepDesign(ABC):
+    """ Lazy variable sweep that can be passed to the herd in place of a
+    var_sweep list. Iterating over the design, or indexing it, gives the
+    var_list (list[dict | None]) for a simulation chain which is only created
+    when it is needed so large designs are never held in memory as dicts.
+    Slicing a design gives a list of var_lists.
+    """
+    @abstractmethod
+    def __len__(self) -> int:
+        pass
+
+
+    @abstractmethod
+    def get_var_list(self, sweep_ind: int) -> list[dict | None]:
+        """get_var_list: gets the variables for each position in the simulation
+        chain for the given index in the sweep.
+
+        Args:
+            sweep_ind (int): index of the simulation chain in the sweep.
+
+        Returns:
+            list[dict | None]: variables for each position in the simulation
+                chain, None to use the input file without modification.
+        """
+
+
+    def __getitem__(self, sweep_ind: int | slice
+                    ) -> list[dict | None] | list[list[dict | None]]:
+        if isinstance(sweep_ind,slice):
+            return [self.get_var_list(ii)
+                    for ii in range(*sweep_ind.indices(len(self)))]
+
+        if sweep_ind < 0:
+            sweep_ind += len(self)
+        if sweep_ind < 0 or sweep_ind >= len(self):
+            raise IndexError('Sweep design index out of range.')
+
+        return self.get_var_list(sweep_ind)
+
+
+    def __iter__(self) -> Iterator[list[dict | None]]:
+        for ii in range(len(self)):
+            yield self.get_var_list(ii)
+
+
+class FactorialDesign(SweepDesign):
+    """ Full factorial (Cartesian product) design over the given values of
+    every variable at every position in the simulation chain. The last
+    variable given changes fastest.
+    """
+    def __init__(self, chain_vars: list[dict[str,Sequence[Any]] | None]) -> None:
+        """__init__
+
+        Args:
+            chain_vars (list[dict[str,Sequence[Any]] | None]): for each
+                position in the simulation chain a dictionary of the values to
+                sweep for each variable e.g. [{'lc': [0.1,0.2]},
+                {'e_modulus': [1e9,2e9],'p_ratio': [0.3,0.35]}]. None to use
+                the input file at that position without modification.
+
+        Raises:
+            ValueError: a variable has no values.
+        """
+        self._chain_vars = chain_vars
+        self._keys = list([])
+        self._values = list([])
+        for jj,cv in enumerate(chain_vars):
+            if cv is None:
+                continue
+            for kk,vv in cv.items():
+                if len(vv) == 0:
+                    raise ValueError(f'No values given for variable: {kk}')
+                self._keys.append((jj,kk))
+                self._values.append(list(vv))
+
+        self._num_points = math.prod(len(vv) for vv in self._values)
+
+
+    def __len__(self) -> int:
+        return self._num_points
+
+
+    def get_var_list(self, sweep_ind: int) -> list[dict | None]:
+        """get_var_list: see SweepDesign.
+
+        Args:
+            sweep_ind (int): index of the simulation chain in the sweep.
+
+        Returns:
+            list[dict | None]: variables for each position in the simulation
+                chain.
+        """
+        val_inds = list([])
+        for vv in reversed(self._values):
+            (sweep_ind,val_ind) = divmod(sweep_ind,len(vv))
+            val_inds.append(val_ind)
+
+        var_list = _empty_var_list(self._chain_vars)
+        for (jj,kk),vv,ii in zip(self._keys,self._values,reversed(val_inds)):
+            var_list[jj][kk] = vv[ii] # type: ignore
+
+        return var_list
+
+
+class UnitCubeDesign(SweepDesign):
+    """ Base class for designs that sample points in the unit hypercube which
+    are scaled to the bounds of each variable. Variables are ordered by
+    position in the simulation chain and then by the order given.
+    """
+    def __init__(self,
+                 chain_bounds: list[dict[str,tuple[float,float]] | None],
+                 num_points: int) -> None:
+        """__init__
+
+        Args:
+            chain_bounds (list[dict[str,tuple[float,float]] | None]): for each
+                position in the simulation chain a dictionary of the lower and
+                upper bound for each variable e.g. [{'lc': (0.1,0.5)},
+                {'e_modulus': (1e9,2e9)}]. None to use the input file at that
+                position without modification.
+            num_points (int): number of points in the design.
+
+        Raises:
+            ValueError: the number of points is less than 1 or there are no
+                variables.
+        """
+        if num_points < 1:
+            raise ValueError('Number of points must be 1 or more.')
+
+        self._chain_bounds = chain_bounds
+        self._num_points = int(num_points)
+        self._keys = list([])
+        lower = list([])
+        upper = list([])
+        for jj,cb in enumerate(chain_bounds):
+            if cb is None:
+                continue
+            for kk,(ll,uu) in cb.items():
+                self._keys.append((jj,kk))
+                lower.append(ll)
+                upper.append(uu)
+
+        if len(self._keys) == 0:
+            raise ValueError('No variables given for the design.')
+
+        self._lower = np.array(lower,dtype=np.float64)
+        self._upper = np.array(upper,dtype=np.float64)
+
+
+    def __len__(self) -> int:
+        return self._num_points
+
+
+    def get_num_dims(self) -> int:
+        """get_num_dims
+
+        Returns:
+            int: number of variables in the design.
+        """
+        return len(self._keys)
+
+
+    @abstractmethod
+    def get_unit_point(self, sweep_ind: int) -> np.ndarray:
+        """get_unit_point: gets the point in the unit hypercube for the given
+        index in the sweep.
+
+        Args:
+            sweep_ind (int): index of the simulation chain in the sweep.
+
+        Returns:
+            np.ndarray: point with one coordinate in [0,1) per variable.
+        """
+
+
+    def get_var_list(self, sweep_ind: int) -> list[dict | None]:
+        """get_var_list: see SweepDesign.
+
+        Args:
+            sweep_ind (int): index of the simulation chain in the sweep.
+
+        Returns:
+            list[dict | None]: variables for each position in the simulation
+                chain.
+        """
+        point = self._lower + (self._upper-self._lower)*self.get_unit_point(
+                                                                    sweep_ind)
+        var_list = _empty_var_list(self._chain_bounds)
+        for (jj,kk),pp in zip(self._keys,point):
+            var_list[jj][kk] = float(pp) # type: ignore
+
+        return var_list
+
+
+class LatinHypercubeDesign(UnitCubeDesign):
+    """ Latin hypercube design where each variable range is split into
+    num_points equal strata and each stratum is sampled once. Only the stratum
+    permutations are stored (one integer per point per variable).
+    """
+    def __init__(self,
+                 chain_bounds: list[dict[str,tuple[float,float]] | None],
+                 num_points: int,
+                 seed: int | None = None,
+                 centred: bool = False) -> None:
+        """__init__
+
+        Args:
+            chain_bounds (list[dict[str,tuple[float,float]] | None]): see
+                UnitCubeDesign.
+            num_points (int): number of points in the design.
+            seed (int | None, optional): seed for the random number generator.
+                Defaults to None.
+            centred (bool, optional): place each point at the centre of its
+                stratum instead of at a random position within it. Defaults to
+                False.
+        """
+        super().__init__(chain_bounds,num_points)
+        # Random entropy is drawn if no seed is given
+        self._seed = np.random.SeedSequence(seed).entropy
+        self._centred = centred
+
+        rng = np.random.default_rng(self._seed)
+        self._strata = np.empty((self.get_num_dims(),self._num_points),
+                                dtype=np.min_scalar_type(self._num_points))
+        for dd in range(self.get_num_dims()):
+            self._strata[dd,:] = rng.permutation(self._num_points)
+
+
+    def get_unit_point(self, sweep_ind: int) -> np.ndarray:
+        """get_unit_point: see UnitCubeDesign.
+
+        Args:
+            sweep_ind (int): index of the simulation chain in the sweep.
+
+        Returns:
+            np.ndarray: point in the unit hypercube.
+        """
+        if self._centred:
+            offset = np.full(self.get_num_dims(),0.5)
+        else:
+            # Per point generator so points can be created in any order
+            offset = np.random.default_rng(
+                [self._seed,sweep_ind]).random(self.get_num_dims()) # type: ignore
+
+        return (self._strata[:,sweep_ind] + offset)/self._num_points
+
+
+class HaltonDesign(UnitCubeDesign):
+    """ Halton low discrepancy sequence using the radical inverse of the point
+    number in the first prime bases, one prime per variable.
+    """
+    def __init__(self,
+                 chain_bounds: list[dict[str,tuple[float,float]] | None],
+                 num_points: int,
+                 skip: int = 0) -> None:
+        """__init__
+
+        Args:
+            chain_bounds (list[dict[str,tuple[float,float]] | None]): see
+                UnitCubeDesign.
+            num_points (int): number of points in the design.
+            skip (int, optional): number of points at the start of the sequence
+                to skip. Defaults to 0.
+        """
+        super().__init__(chain_bounds,num_points)
+        self._skip = skip
+        self._bases = _first_primes(self.get_num_dims())
+
+
+    def get_unit_point(self, sweep_ind: int) -> np.ndarray:
+        """get_unit_point: see UnitCubeDesign.
+
+        Args:
+            sweep_ind (int): index of the simulation chain in the sweep.
+
+        Returns:
+            np.ndarray: point in the unit hypercube.
+        """
+        # Start from 1 as the first point of the sequence is the origin
+        return np.array([_radical_inverse(sweep_ind+self._skip+1,bb)
+                         for bb in self._bases])
+
+
+class SobolDesign(UnitCubeDesign):
+    """ Sobol low discrepancy sequence using the Joe and Kuo direction numbers
+    for up to 21 variables. The sequence has the best uniformity when the
+    number of points is a power of 2.
+    """
+    def __init__(self,
+                 chain_bounds: list[dict[str,tuple[float,float]] | None],
+                 num_points: int,
+                 skip: int = 0) -> None:
+        """__init__
+
+        Args:
+            chain_bounds (list[dict[str,tuple[float,float]] | None]): see
+                UnitCubeDesign.
+            num_points (int): number of points in the design, at most 2^30.
+            skip (int, optional): number of points at the start of the sequence
+                to skip. Defaults to 0 which includes the origin.
+
+        Raises:
+            ValueError: there are more than 21 variables or the design is
+                longer than 2^30 points.
+        """
+        super().__init__(chain_bounds,num_points)
+        if self.get_num_dims() > len(SOBOL_DIRECTIONS)+1:
+            raise ValueError('Sobol design supports at most '
+                             f'{len(SOBOL_DIRECTIONS)+1} variables.')
+        if num_points+skip > 2**SOBOL_BITS:
+            raise ValueError(f'Sobol design supports at most 2^{SOBOL_BITS} '
+                             'points.')
+
+        self._skip = skip
+        self._directions = _sobol_directions(self.get_num_dims())
+
+
+    def get_unit_point(self, sweep_ind: int) -> np.ndarray:
+        """get_unit_point: see UnitCubeDesign.
+
+        Args:
+            sweep_ind (int): index of the simulation chain in the sweep.
+
+        Returns:
+            np.ndarray: point in the unit hypercube.
+        """
+        # Gray code order as used by the standard Sobol generators
+        point_num = sweep_ind + self._skip
+        point_num ^= point_num >> 1
+        point = np.zeros(self.get_num_dims(),dtype=np.uint64)
+        bit = 0
+        while point_num > 0:
+            if point_num & 1:
+                point ^= self._directions[:,bit]
+            point_num >>= 1
+            bit += 1
+
+        return point.astype(np.float64)/2**SOBOL_BITS
+
+
+class ZipDesign(SweepDesign):
+    """ Joins designs for different positions in the simulation chain point
+    by point e.g. a gmsh design and a MOOSE design for the chain
+    [GmshRunner,MooseRunner]. The var_list for each point is the var_lists of
+    the designs joined in order.
+    """
+    def __init__(self, designs: list[SweepDesign]) -> None:
+        """__init__
+
+        Args:
+            designs (list[SweepDesign]): designs to join, all must have the
+                same length.
+
+        Raises:
+            ValueError: no designs were given or the designs have different
+                lengths.
+        """
+        if len(designs) == 0:
+            raise ValueError('No designs given to zip.')
+        if any(len(dd) != len(designs[0]) for dd in designs):
+            raise ValueError('All zipped designs must have the same length.')
+
+        self._designs = designs
+
+
+    def __len__(self) -> int:
+        return len(self._designs[0])
+
+
+    def get_var_list(self, sweep_ind: int) -> list[dict | None]:
+        """get_var_list: see SweepDesign.
+
+        Args:
+            sweep_ind (int): index of the simulation chain in the sweep.
+
+        Returns:
+            list[dict | None]: variables for each position in the simulation
+                chain.
+        """
+        var_list = list([])
+        for dd in self._designs:
+            var_list += dd.get_var_list(sweep_ind)
+        return var_list
+
+
+SOBOL_BITS = 30
+""" Number of bits used for the Sobol sequence points.
+"""
+
+SOBOL_DIRECTIONS = ((1,0,(1,)),
+                    (2,1,(1,3)),
+                    (3,1,(1,3,1)),
+                    (3,2,(1,1,1)),
+                    (4,1,(1,1,3,3)),
+                    (4,4,(1,3,5,13)),
+                    (5,2,(1,1,5,5,17)),
+                    (5,4,(1,1,5,5,5)),
+                    (5,7,(1,1,7,11,19)),
+                    (5,11,(1,1,5,1,1)),
+                    (5,13,(1,1,1,3,11)),
+                    (5,14,(1,3,5,5,31)),
+                    (6,1,(1,3,3,9,7,49)),
+                    (6,13,(1,1,1,15,21,21)),
+                    (6,16,(1,3,1,13,27,49)),
+                    (6,19,(1,1,1,15,7,5)),
+                    (6,22,(1,3,1,15,13,25)),
+                    (6,25,(1,1,5,5,19,61)),
+                    (7,1,(1,3,7,11,23,15,103)),
+                    (7,4,(1,3,7,13,13,15,69)))
+""" Joe and Kuo (new-joe-kuo-6.21201) primitive polynomial degree s,
+coefficients a and initial direction numbers m for Sobol dimensions 2 to 21.
+"""
+
+
+def _empty_var_list(chain_vars: list[dict | None]) -> list[dict | None]:
+    """_empty_var_list: helper function that creates a var_list with an empty
+    dictionary for every position in the chain that has variables.
+
+    Args:
+        chain_vars (list[dict | None]): variables for each chain position.
+
+    Returns:
+        list[dict | None]: empty dictionary or None for each chain position.
+    """
+    return [None if cv is None else dict({}) for cv in chain_vars]
+
+
+def _first_primes(num_primes: int) -> list[int]:
+    """_first_primes: helper function that gets the first prime numbers.
+
+    Args:
+        num_primes (int): number of primes.
+
+    Returns:
+        list[int]: the first num_primes prime numbers.
+    """
+    primes = list([])
+    nn = 2
+    while len(primes) < num_primes:
+        if all(nn % pp != 0 for pp in primes if pp*pp <= nn):
+            primes.append(nn)
+        nn += 1
+    return primes
+
+
+def _radical_inverse(point_num: int, base: int) -> float:
+    """_radical_inverse: helper function that reflects the digits of the
+    point number in the given base about the decimal point.
+
+    Args:
+        point_num (int): point number in the sequence.
+        base (int): base of the sequence.
+
+    Returns:
+        float: radical inverse in [0,1).
+    """
+    inverse = 0.0
+    scale = 1.0/base
+    while point_num > 0:
+        (point_num,digit) = divmod(point_num,base)
+        inverse += digit*scale
+        scale /= base
+    return inverse
+
+
+def _sobol_directions(num_dims: int) -> np.ndarray:
+    """_sobol_directions: helper function that computes the Sobol direction
+    numbers for each dimension scaled to SOBOL_BITS bits.
+
+    Args:
+        num_dims (int): number of dimensions.
+
+    Returns:
+        np.ndarray: direction numbers with shape (num_dims,SOBOL_BITS).
+    """
+    directions = np.zeros((num_dims,SOBOL_BITS),dtype=np.uint64)
+    # First dimension is the van der Corput sequence in base 2
+    for bb in range(SOBOL_BITS):
+        directions[0,bb] = 1 << (SOBOL_BITS-1-bb)
+
+    for dd in range(1,num_dims):
+        (deg,coeffs,m_init) = SOBOL_DIRECTIONS[dd-1]
+        vv = [0]*SOBOL_BITS
+        for bb in range(min(deg,SOBOL_BITS)):
+            vv[bb] = m_init[bb] << (SOBOL_BITS-1-bb)
+        for bb in range(deg,SOBOL_BITS):
+            vv[bb] = vv[bb-deg] ^ (vv[bb-deg] >> deg)
+            for kk in range(1,deg):
+                if (coeffs >> (deg-1-kk)) & 1:
+                    vv[bb] ^= vv[bb-kk]
+        directions[dd,:] = vv
+
+    return directions
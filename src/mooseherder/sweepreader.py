@@ -8,12 +8,18 @@ Authors: Lloyd Fletcher, Rory Spencer
 
 import os
 import json
+import tempfile
+from dataclasses import dataclass, fields
 from pathlib import Path
+from typing import Any
 from multiprocessing.pool import Pool
+import numpy as np
 from mooseherder.directorymanager import DirectoryManager
 import mooseherder.directorymanager as dm
 from mooseherder.exodusreader import ExodusReader
 from mooseherder.simdata import SimData, SimReadConfig
+from mooseherder.sweepstore import SweepStoreWriter
+from mooseherder.simrunner import RunResult, RUN_OK
 
 
 class SweepReader:
@@ -37,7 +43,8 @@ class SweepReader:
         self._n_para_read = num_para_read
 
 
-    def read_output_key(self, sweep_iter: int) -> list[list[Path | None]]:
+    def read_output_key(self, sweep_iter: int, skip_failed: bool = False
+                        ) -> list[list[Path | None]]:
         """read_output_key: reads the output key json file produced by running
         the variable sweep. The output key file maps which simulation were run
         in a given sub directory.
@@ -46,6 +53,11 @@ class SweepReader:
             sweep_iter (int): sweep iteration to read. This is the number that
                 is appended to the output key file e.g. output-key-2.json for
                 the 2nd call to run_seq/para in the mooseherd.
+            skip_failed (bool, optional): if True the outputs of any
+                simulation chain that did not complete are replaced with None
+                based on the run results file written by the herd so they are
+                not read. Ignored if there is no run results file. Defaults to
+                False.
 
         Returns:
             list[list[Path]]: paths to the outputs from the variable sweep the
@@ -57,15 +69,106 @@ class SweepReader:
             raise FileNotFoundError(f'Output key file for sweep iteration {sweep_iter} not found at path: {output_key}')
 
         with open(output_key, 'r', encoding='utf-8') as okf:
-            output_files = json.load(okf)
+            output_files = dm.output_str_to_paths(json.load(okf))
 
-        return dm.output_str_to_paths(output_files)
+        if (skip_failed and
+            self._dir_manager.get_run_results_file(sweep_iter).is_file()):
+            run_results = self.read_run_results(sweep_iter)
+            for ii,rr in enumerate(run_results):
+                if rr is None or any(cc.status != RUN_OK for cc in rr):
+                    output_files[ii] = [None]*len(output_files[ii])
 
+        return output_files
 
-    def read_all_output_keys(self) -> list[list[Path | None]]:
+
+    def read_run_results(self, sweep_iter: int
+                         ) -> list[list[RunResult] | None]:
+        """read_run_results: reads the run results json file written by the
+        herd alongside the output key. Each run result records the status,
+        exit code, wall time, peak memory, stdout path and output file details
+        for a position in the simulation chain.
+
+        Args:
+            sweep_iter (int): sweep iteration to read.
+
+        Raises:
+            FileNotFoundError: the run results file was not found.
+
+        Returns:
+            list[list[RunResult] | None]: outer list is the simulation
+                iteration and the inner list is the position in the simulation
+                chain.
+        """
+        results_file = self._dir_manager.get_run_results_file(sweep_iter)
+        if not results_file.is_file():
+            raise FileNotFoundError(f'Run results file for sweep iteration {sweep_iter} not found at path: {results_file}')
+
+        with open(results_file, 'r', encoding='utf-8') as rrf:
+            run_results = json.load(rrf)
+
+        return dm.run_results_from_dicts(run_results)
+
+
+    def read_timings(self, sweep_iter: int | None = None
+                     ) -> list[dict[str,Any]]:
+        """read_timings: reads the stage timings recorded by the herd when
+        profiling is turned on (see MooseHerd.set_profile_flag) from the run
+        results files as a tidy table with one row per timing. Each row has
+        the keys 'sweep_iter', 'sweep_ind' (index of the chain in the sweep),
+        'chain_pos' (position in the chain), 'status' (run status at that
+        position), 'stage' (e.g. 'render', 'run' or 'read'), 'section'
+        ('total' for the whole stage or the section of the stage e.g. 'solve')
+        and 'time' in seconds. Use aggregate_timings to summarise the table.
+
+        Args:
+            sweep_iter (int | None, optional): sweep iteration to read.
+                Defaults to None which reads all sweep iterations found in the
+                first sub-directory.
+
+        Raises:
+            FileNotFoundError: the run results file was not found.
+
+        Returns:
+            list[dict[str,Any]]: rows of the timing table, empty if profiling
+                was not turned on.
+        """
+        if sweep_iter is None:
+            key_files = self._find_files_by_str(
+                self._dir_manager.get_output_key_tag(),
+                self._dir_manager.get_run_dir(0))
+            sweep_iters = sorted(int(kk.name.split('.')[0].split('-')[-1])
+                                 for kk in key_files)
+        else:
+            sweep_iters = [sweep_iter]
+
+        timings = list([])
+        for ss in sweep_iters:
+            for ii,chain_results in enumerate(self.read_run_results(ss)):
+                if chain_results is None:
+                    continue
+                for pp,rr in enumerate(chain_results):
+                    for kk,tt in rr.timings.items():
+                        (stage,_,section) = kk.partition(':')
+                        timings.append({'sweep_iter': ss,
+                                        'sweep_ind': ii,
+                                        'chain_pos': pp,
+                                        'status': rr.status,
+                                        'stage': stage,
+                                        'section': section or 'total',
+                                        'time': tt})
+
+        return timings
+
+
+    def read_all_output_keys(self, skip_failed: bool = False
+                             ) -> list[list[Path | None]]:
         """read_all_output_keys: as read_output_keys() but finds all output key
         files in the first sub-directory and reads them.
 
+        Args:
+            skip_failed (bool, optional): as read_output_key(). Defaults to
+                False.
+
         Raises:
             FileNotFoundError: No output key files found in the first sub-
                 directory.
@@ -84,7 +187,8 @@ class SweepReader:
         output_files = list([])
         for output_path in output_paths:
             sweep_iter = output_path.name.split('.')[0].split('-')[-1]
-            output_files = output_files + self.read_output_key(int(sweep_iter))
+            output_files = output_files + self.read_output_key(int(sweep_iter),
+                                                               skip_failed)
 
         self._output_files = output_files
         return self._output_files
@@ -181,7 +285,8 @@ class SweepReader:
 
     def read_results_once(self,
                           output_files: list[Path | None],
-                          read_config: SimReadConfig | None = None
+                          read_config: SimReadConfig | None = None,
+                          lazy: bool = False
                           ) -> list[SimData | None]:
         """read_results_once: reads a specific simulation at the specified
         path based on the specified read configuration. If the read
@@ -190,6 +295,9 @@ class SweepReader:
         Args:
             output_file (Path): Path to the file to read
             read_config (SimReadConfig | None): class to specify the data to read
+            lazy (bool, optional): if True the variables are only read from
+                file when they are first accessed, see ExodusReader.
+                read_lazy_sim_data(). Defaults to False.
 
         Returns:
             list[SimData | None]: list of data classes holding the simulation
@@ -204,7 +312,9 @@ class SweepReader:
             else:
                 #TODO: replace with output reader ABC
                 reader = ExodusReader(ff)
-                if read_config is None:
+                if lazy:
+                    data_list.append(reader.read_lazy_sim_data(read_config))
+                elif read_config is None:
                     data_list.append(reader.read_all_sim_data())
                 else:
                     data_list.append(reader.read_sim_data(read_config))
@@ -214,7 +324,8 @@ class SweepReader:
 
     def read_results_sequential(self,
                                 sweep_iter: int | None = None,
-                                read_config: SimReadConfig | None = None
+                                read_config: SimReadConfig | None = None,
+                                lazy: bool = False
                                 ) -> list[list[SimData]]:
         """read_results_sequential: reads the variable sweep results
         sequentially. Can read a specific iteration with a specific read config
@@ -226,6 +337,9 @@ class SweepReader:
             read_config (SimReadConfig | None, optional): object for specifying
                 which variables are to be extracted from the output. Defaults
                 to None.
+            lazy (bool, optional): if True the variables are only read from
+                file when they are first accessed, see ExodusReader.
+                read_lazy_sim_data(). Defaults to False.
 
         Returns:
             list[list[SimData]]: list of lists of SimData objects containing the
@@ -236,14 +350,16 @@ class SweepReader:
 
         sweep_results = list([])
         for ii,ff in enumerate(self._output_files):
-            sweep_results.append(self.read_results_once(ff,read_config))
+            sweep_results.append(self.read_results_once(ff,read_config,lazy))
 
         return sweep_results
 
 
     def read_results_para(self,
                           sweep_iter: int | None = None,
-                          read_config: SimReadConfig | None = None
+                          read_config: SimReadConfig | None = None,
+                          lazy: bool = False,
+                          mem_map: bool = False
                           ) -> list[list[SimData]]:
         """read_results_para: reads the variable sweep results in parallel
         Can read a specific iteration with a specific read config but defaults
@@ -255,6 +371,14 @@ class SweepReader:
             read_config (SimReadConfig | None, optional): object for specifying
                 which variables are to be extracted from the output. Defaults
                 to None.
+            lazy (bool, optional): if True the variables are only read from
+                file when they are first accessed, see ExodusReader.
+                read_lazy_sim_data(). Defaults to False.
+            mem_map (bool, optional): if True the workers write the arrays to
+                scratch files which are memory mapped by the main process
+                instead of pickling the arrays back to the main process. The
+                returned arrays are copy-on-write memory maps. Defaults to
+                False.
 
         Returns:
             list[list[SimData]]: list of lists of SimData objects containing the
@@ -263,17 +387,132 @@ class SweepReader:
         """
         self._start_read_output_keys(sweep_iter)
 
+        if mem_map:
+            return self._read_results_para_mem_map(read_config,lazy)
+
         with Pool(self._n_para_read) as pool:
             processes = list([])
             for ff in self._output_files:
                     processes.append(pool.apply_async(
-                        self.read_results_once, args=(ff,read_config)))
+                        self.read_results_once, args=(ff,read_config,lazy)))
 
             sweep_results = [pp.get() for pp in processes]
 
         return sweep_results
 
 
+    def _read_results_para_mem_map(self,
+                                   read_config: SimReadConfig | None,
+                                   lazy: bool) -> list[list[SimData]]:
+        """_read_results_para_mem_map: helper function for read_results_para
+        that transfers the arrays from the workers using memory mapped scratch
+        files. The scratch files are deleted once they have been mapped.
+
+        Args:
+            read_config (SimReadConfig | None): object for specifying which
+                variables are to be extracted from the output.
+            lazy (bool): read the variables lazily on first access.
+
+        Returns:
+            list[list[SimData]]: as read_results_para.
+        """
+        with tempfile.TemporaryDirectory(ignore_cleanup_errors=True) as scratch:
+            with Pool(self._n_para_read) as pool:
+                processes = list([])
+                for ii,ff in enumerate(self._output_files):
+                    processes.append(pool.apply_async(
+                        self._read_results_once_to_npy,
+                        args=(ff,read_config,lazy,Path(scratch),f'sim-{ii+1}')))
+
+                sweep_results = [pp.get() for pp in processes]
+
+            for rr in sweep_results:
+                for dd in rr:
+                    if dd is not None:
+                        sim_data_from_npy(dd)
+
+        return sweep_results
+
+
+    def _read_results_once_to_npy(self,
+                                  output_files: list[Path | None],
+                                  read_config: SimReadConfig | None,
+                                  lazy: bool,
+                                  save_dir: Path,
+                                  file_tag: str) -> list[SimData | None]:
+        """_read_results_once_to_npy: as read_results_once but the arrays in
+        each SimData object are written to npy files in the specified directory
+        and replaced with references to the files.
+
+        Args:
+            output_files (list[Path | None]): paths to the files to read.
+            read_config (SimReadConfig | None): class to specify the data to
+                read.
+            lazy (bool): read the variables lazily on first access.
+            save_dir (Path): directory to write the npy files to.
+            file_tag (str): unique string used to name the npy files.
+
+        Returns:
+            list[SimData | None]: as read_results_once but with the arrays
+                replaced by references to npy files.
+        """
+        data_list = self.read_results_once(output_files,read_config,lazy)
+
+        for ii,dd in enumerate(data_list):
+            if dd is not None:
+                sim_data_to_npy(dd,save_dir,f'{file_tag}-{ii+1}')
+
+        return data_list
+
+
+    def write_sweep_store(self,
+                          store_path: Path,
+                          sweep_iter: int | None = None,
+                          read_config: SimReadConfig | None = None,
+                          chain_pos: int = -1,
+                          comp_level: int = 4) -> Path:
+        """write_sweep_store: consolidates the variable sweep results and the
+        sweep variables into a single compressed netCDF4 file with a leading
+        simulation dimension, see mooseherder.sweepstore. The simulations are
+        read and written one at a time so the whole sweep is never held in
+        memory. Sidesets are not included in the store.
+
+        Args:
+            store_path (Path): path and file name of the store to create.
+            sweep_iter (int | None, optional): sweep iteration number to
+                consolidate. Defaults to None which consolidates all sweep
+                iterations found.
+            read_config (SimReadConfig | None, optional): object for specifying
+                which variables are to be extracted from the output. Defaults
+                to None which extracts everything.
+            chain_pos (int, optional): position in the simulation chain of the
+                output to consolidate. Defaults to -1 which is the last
+                simulation in the chain.
+            comp_level (int, optional): zlib compression level from 0 to 9.
+                Defaults to 4.
+
+        Returns:
+            Path: path to the store file.
+        """
+        if sweep_iter is None:
+            output_files = self.read_all_output_keys()
+            sweep_vars = self.read_all_sweep_var_files()
+        else:
+            output_files = self.read_output_key(sweep_iter)
+            sweep_vars = self.read_sweep_var_file(sweep_iter)
+
+        with SweepStoreWriter(store_path,len(output_files),comp_level) as store:
+            for ii,ff in enumerate(output_files):
+                data = self.read_results_once([ff[chain_pos]],read_config)[0]
+                if data is not None:
+                    data.side_sets = None
+                    store.write_sim(ii,data)
+
+            store.write_sweep_vars(sweep_vars)
+
+        return store_path
+
+
     def _start_read_output_keys(self, sweep_iter: int | None):
         """_start_read: helper function to read the output keys for a specific
         simulation iteration prior to reading the simulation outputs.
@@ -289,3 +528,123 @@ class SweepReader:
             self.read_all_output_keys()
 
 
+def aggregate_timings(timings: list[dict[str,Any]],
+                      group_by: tuple[str,...] = ('chain_pos','stage',
+                                                  'section')
+                      ) -> list[dict[str,Any]]:
+    """aggregate_timings: summarises the timing table from
+    SweepReader.read_timings by grouping the rows on the given columns.
+
+    Args:
+        timings (list[dict[str,Any]]): rows of the timing table.
+        group_by (tuple[str,...], optional): columns to group the rows by.
+            Defaults to ('chain_pos','stage','section').
+
+    Returns:
+        list[dict[str,Any]]: one row per group in the order the groups first
+            appear with the group columns and the 'count', 'total', 'mean',
+            'min' and 'max' of the times in seconds.
+    """
+    groups = dict({})
+    for tt in timings:
+        group = tuple(tt[gg] for gg in group_by)
+        groups.setdefault(group,list([])).append(tt['time'])
+
+    summary = list([])
+    for group,times in groups.items():
+        row = dict(zip(group_by,group))
+        row.update({'count': len(times),
+                    'total': float(np.sum(times)),
+                    'mean': float(np.mean(times)),
+                    'min': float(np.min(times)),
+                    'max': float(np.max(times))})
+        summary.append(row)
+
+    return summary
+
+
+@dataclass
+class NpyArrayRef:
+    """ Reference to an array that has been saved to a npy file, used to
+    transfer arrays between processes without pickling the array data.
+    """
+    path: Path
+
+
+def sim_data_to_npy(data: SimData, save_dir: Path, file_tag: str) -> SimData:
+    """sim_data_to_npy: saves all numpy arrays in the SimData object to npy
+    files and replaces them in place with NpyArrayRef objects. Only arrays
+    held directly in the SimData fields or in dictionary fields are saved,
+    lazily read mappings are left unchanged.
+
+    Args:
+        data (SimData): simulation data to save.
+        save_dir (Path): directory to save the npy files in.
+        file_tag (str): unique string used to name the npy files.
+
+    Returns:
+        SimData: the input SimData object with the arrays replaced.
+    """
+    file_num = 0
+    for ff in fields(data):
+        value = getattr(data,ff.name)
+        if isinstance(value,np.ndarray):
+            file_num += 1
+            setattr(data,ff.name,
+                    _save_npy(value,save_dir / f'{file_tag}-{file_num}.npy'))
+        elif isinstance(value,dict):
+            for kk,vv in value.items():
+                if isinstance(vv,np.ndarray):
+                    file_num += 1
+                    value[kk] = _save_npy(vv,
+                                          save_dir / f'{file_tag}-{file_num}.npy')
+
+    return data
+
+
+def sim_data_from_npy(data: SimData) -> SimData:
+    """sim_data_from_npy: reverses sim_data_to_npy by replacing the NpyArrayRef
+    objects in place with copy-on-write memory maps of the npy files.
+
+    Args:
+        data (SimData): simulation data containing NpyArrayRef objects.
+
+    Returns:
+        SimData: the input SimData object with memory mapped arrays.
+    """
+    for ff in fields(data):
+        value = getattr(data,ff.name)
+        if isinstance(value,NpyArrayRef):
+            setattr(data,ff.name,_load_npy(value))
+        elif isinstance(value,dict):
+            for kk,vv in value.items():
+                if isinstance(vv,NpyArrayRef):
+                    value[kk] = _load_npy(vv)
+
+    return data
+
+
+def _save_npy(array: np.ndarray, save_path: Path) -> NpyArrayRef:
+    """_save_npy: helper function to save an array to a npy file.
+
+    Args:
+        array (np.ndarray): array to save.
+        save_path (Path): path and file name with extension .npy.
+
+    Returns:
+        NpyArrayRef: reference to the saved array.
+    """
+    np.save(save_path,array)
+    return NpyArrayRef(save_path)
+
+
+def _load_npy(array_ref: NpyArrayRef) -> np.ndarray:
+    """_load_npy: helper function to memory map a saved npy file.
+
+    Args:
+        array_ref (NpyArrayRef): reference to the saved array.
+
+    Returns:
+        np.ndarray: copy-on-write memory map of the saved array.
+    """
+    return np.load(array_ref.path,mmap_mode='c')
@@ -0,0 +1,292 @@
+'''
+===============================================================================
+SweepStore Class
+
+Authors: Lloyd Fletcher
+===============================================================================
+'''
+from pathlib import Path
+from typing import Any
+import netCDF4 as nc
+import numpy as np
+from mooseherder.simdata import SimData
+
+
+class SweepStoreWriter:
+    """ Consolidates the output of a variable sweep into a single chunked and
+    compressed netCDF4 (HDF5) file with a leading simulation dimension. Meshes
+    and the number of time steps can differ between simulations in the sweep so
+    the time, node and element dimensions are unlimited and each simulation is
+    padded with the fill value (NaN or -1 for integers) up to the largest size
+    found. The actual size for each simulation is stored in the 'num_*'
+    variables. The sweep variables are stored in one group per position in the
+    simulation chain ('sweep_vars_1', 'sweep_vars_2' etc.) with one variable
+    per sweep variable name indexed by the simulation dimension.
+    """
+    def __init__(self,
+                 store_path: Path,
+                 num_sims: int,
+                 comp_level: int = 4) -> None:
+        """__init__: creates the netCDF4 file for the store, overwriting any
+        existing file.
+
+        Args:
+            store_path (Path): path and file name of the store to create,
+                usually with the extension '.nc'.
+            num_sims (int): number of simulations in the sweep.
+            comp_level (int, optional): zlib compression level from 0 (no
+                compression) to 9. Defaults to 4.
+
+        Raises:
+            FileNotFoundError: the parent directory of the store does not exist.
+        """
+        if not store_path.parent.is_dir():
+            raise FileNotFoundError(
+                'Parent directory for the sweep store does not exist.')
+
+        self._store_path = store_path
+        self._comp_level = comp_level
+        self._num_sims = num_sims
+
+        self._data = nc.Dataset(str(store_path),'w',format='NETCDF4')
+        self._data.createDimension('sim',num_sims)
+        self._data.createDimension('time_step',None)
+        self._data.createDimension('node',None)
+        self._data.createDimension('coord',3)
+
+
+    def __enter__(self) -> 'SweepStoreWriter':
+        return self
+
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+
+    def close(self) -> None:
+        """close: closes the store file. Must be called once all simulations
+        have been written.
+        """
+        if self._data.isopen():
+            self._data.close()
+
+
+    def get_store_path(self) -> Path:
+        """get_store_path
+
+        Returns:
+            Path: path to the store file.
+        """
+        return self._store_path
+
+
+    def _get_var(self,
+                 name: str,
+                 dims: tuple[str,...],
+                 dtype: Any = 'f8') -> nc.Variable:
+        """_get_var: helper function that gets a variable from the store or
+        creates it with compression and chunking based on one simulation and
+        one time step per chunk if it does not exist.
+
+        Args:
+            name (str): name of the variable in the store.
+            dims (tuple[str,...]): dimension names of the variable.
+            dtype (Any, optional): netCDF data type. Defaults to 'f8'.
+
+        Returns:
+            nc.Variable: variable in the store.
+        """
+        if name in self._data.variables:
+            return self._data.variables[name]
+
+        chunks = list([])
+        for dd in dims:
+            if dd in ('sim','time_step'):
+                chunks.append(1)
+            elif dd == 'coord' or 'node_per_elem' in dd:
+                chunks.append(self._data.dimensions[dd].size)
+            else:
+                chunks.append(2**16)
+
+        if np.dtype(dtype).kind in ('i','u'):
+            fill_value = -1
+        else:
+            fill_value = np.nan
+
+        return self._data.createVariable(name,dtype,dims,
+                                         zlib=self._comp_level > 0,
+                                         complevel=self._comp_level,
+                                         chunksizes=chunks,
+                                         fill_value=fill_value)
+
+
+    def _get_elem_dim(self, block: int | str) -> str:
+        """_get_elem_dim: helper function to get the name of the unlimited
+        element dimension for the given block creating it if required.
+
+        Args:
+            block (int | str): element block number.
+
+        Returns:
+            str: name of the element dimension.
+        """
+        dim = f'elem_eb{block}'
+        if dim not in self._data.dimensions:
+            self._data.createDimension(dim,None)
+        return dim
+
+
+    def write_sim(self, sim_ind: int, data: SimData) -> None:
+        """write_sim: writes the data for one simulation into the store at the
+        given position along the simulation dimension. Nodal variables are
+        stored as 'node_<name>', element variables as 'elem_<name>_eb<block>'
+        and global variables as 'glob_<name>' with dimensions ordered as
+        (sim,time_step,node/elem).
+
+        Args:
+            sim_ind (int): index of the simulation in the sweep.
+            data (SimData): simulation data to write.
+        """
+        if data.time is not None:
+            num_steps = data.time.shape[0]
+            self._get_var('time',('sim','time_step'))[sim_ind,:num_steps] = \
+                data.time
+            self._get_var('num_time_steps',('sim',),'i8')[sim_ind] = num_steps
+
+        if data.coords is not None:
+            num_nodes = data.coords.shape[0]
+            self._get_var('coords',('sim','node','coord'))[
+                sim_ind,:num_nodes,:] = data.coords
+            self._get_var('num_nodes',('sim',),'i8')[sim_ind] = num_nodes
+
+        if data.connect is not None:
+            for cc in data.connect:
+                self._write_connect(sim_ind,str(cc),data.connect[cc])
+
+        if data.node_vars is not None:
+            for nn in data.node_vars:
+                var = data.node_vars[nn]
+                self._get_var(f'node_{nn}',('sim','time_step','node'))[
+                    sim_ind,:var.shape[1],:var.shape[0]] = var.T
+
+        if data.elem_vars is not None:
+            for ee in data.elem_vars:
+                var = data.elem_vars[ee]
+                elem_dim = self._get_elem_dim(ee[1])
+                self._get_var(f'elem_{ee[0]}_eb{ee[1]}',
+                              ('sim','time_step',elem_dim))[
+                    sim_ind,:var.shape[1],:var.shape[0]] = var.T
+
+        if data.glob_vars is not None:
+            for gg in data.glob_vars:
+                var = data.glob_vars[gg]
+                self._get_var(f'glob_{gg}',('sim','time_step'))[
+                    sim_ind,:var.shape[0]] = var
+
+
+    def _write_connect(self, sim_ind: int, key: str, connect: np.ndarray
+                       ) -> None:
+        """_write_connect: helper function to write a connectivity table. The
+        table is stored transposed as (sim,elem,node_per_elem) as in the
+        exodus file.
+
+        Args:
+            sim_ind (int): index of the simulation in the sweep.
+            key (str): connectivity key e.g. 'connect1'.
+            connect (np.ndarray): connectivity table as n_e by E where E is
+                the number of elements and n_e is the number of nodes per
+                element.
+        """
+        block = key.replace('connect','')
+        elem_dim = self._get_elem_dim(block)
+        node_dim = f'node_per_elem_eb{block}'
+        if node_dim not in self._data.dimensions:
+            self._data.createDimension(node_dim,connect.shape[0])
+
+        self._get_var(key,('sim',elem_dim,node_dim),'i8')[
+            sim_ind,:connect.shape[1],:] = connect.T
+        self._get_var(f'num_elems_eb{block}',('sim',),'i8')[sim_ind] = \
+            connect.shape[1]
+
+
+    def write_sweep_vars(self, sweep_vars: list[list[dict | None]]) -> None:
+        """write_sweep_vars: writes the sweep variables as passed to the herd
+        into one group per position in the simulation chain. Numeric variables
+        are stored as floats and any others as strings. Missing values are
+        stored as NaN or an empty string.
+
+        Args:
+            sweep_vars (list[list[dict | None]]): outer list is the simulation
+                iteration, inner list is the position in the simulation chain.
+        """
+        chain_vars = dict({})
+        for ii,sim_vars in enumerate(sweep_vars):
+            for jj,vv in enumerate(sim_vars):
+                if vv is None:
+                    continue
+                for kk in vv:
+                    chain_vars.setdefault((jj,kk),dict({}))[ii] = vv[kk]
+
+        for (jj,kk),values in chain_vars.items():
+            group_name = f'sweep_vars_{jj+1}'
+            if group_name not in self._data.groups:
+                self._data.createGroup(group_name)
+            group = self._data.groups[group_name]
+
+            is_num = all(isinstance(vv,(int,float)) and not isinstance(vv,bool)
+                         for vv in values.values())
+            if is_num:
+                var = group.createVariable(kk,'f8',('sim',),fill_value=np.nan)
+                var_data = np.full(self._num_sims,np.nan)
+            else:
+                var = group.createVariable(kk,str,('sim',))
+                var_data = np.full(self._num_sims,'',dtype=object)
+
+            for ii,vv in values.items():
+                var_data[ii] = vv if is_num else str(vv)
+
+            var[:] = var_data
+
+
+def read_sweep_store(store_path: Path
+                     ) -> tuple[dict[str,np.ndarray],list[dict[str,np.ndarray]]]:
+    """read_sweep_store: reads all variables in a sweep store created by the
+    SweepStoreWriter. Padded entries are returned as NaN for floating point
+    variables and -1 for integer variables.
+
+    Args:
+        store_path (Path): path to the store file.
+
+    Raises:
+        FileNotFoundError: the store file does not exist.
+
+    Returns:
+        tuple[dict[str,np.ndarray],list[dict[str,np.ndarray]]]: the first
+            dictionary contains the simulation data keyed by the variable
+            name in the store. The list contains a dictionary of sweep
+            variables keyed by name for each position in the simulation chain.
+    """
+    if not store_path.is_file():
+        raise FileNotFoundError(f'Sweep store not found at: {store_path}')
+
+    with nc.Dataset(str(store_path),'r') as store:
+        sim_data = dict({})
+        for vv in store.variables:
+            sim_data[vv] = np.ma.filled(store.variables[vv][:])
+
+        sweep_vars = list([])
+        num_chain = 0
+        for gg in store.groups:
+            if 'sweep_vars_' in gg:
+                num_chain = max(num_chain,int(gg.split('_')[-1]))
+
+        for jj in range(num_chain):
+            group_name = f'sweep_vars_{jj+1}'
+            chain_vars = dict({})
+            if group_name in store.groups:
+                group = store.groups[group_name]
+                for vv in group.variables:
+                    chain_vars[vv] = np.ma.filled(group.variables[vv][:])
+            sweep_vars.append(chain_vars)
+
+    return (sim_data,sweep_vars)
@@ -0,0 +1,439 @@
+'''
+===============================================================================
+SweepTelemetry Class
+
+Authors: Lloyd Fletcher
+===============================================================================
+'''
+import time
+import queue
+import threading
+from typing import Any
+from collections.abc import Callable
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from mooseherder.simrunner import RunResult, RUN_OK
+from mooseherder.directorymanager import DirectoryManager
+
+
+class SweepTelemetry:
+    """ Live progress of the sweep being run by a herd, see
+    MooseHerd.set_telemetry. Records the start and end time of each
+    simulation chain, the number of chains running and queued, the number of
+    chains completed per minute and an estimate of the time remaining. The
+    status is written as json to the status file in the base directory of the
+    DirectoryManager, passed to an optional callback and can be served in the
+    Prometheus text format on a local port. Times are seconds since the epoch
+    so they can be compared between processes.
+    """
+    def __init__(self,
+                 callback: Callable[[dict],None] | None = None,
+                 write_status: bool = True,
+                 update_time: float = 10.0,
+                 metrics_port: int | None = None,
+                 metrics_host: str = '127.0.0.1') -> None:
+        """__init__
+
+        Args:
+            callback (Callable[[dict],None] | None, optional): function called
+                with the status dictionary (see get_status) each time the
+                status is updated. Can be called from the telemetry thread.
+                Defaults to None.
+            write_status (bool, optional): write the status file in the base
+                directory of the DirectoryManager. Defaults to True.
+            update_time (float, optional): minimum time in seconds between
+                status updates, the status is also updated at this interval
+                while no chains complete. Defaults to 10.0.
+            metrics_port (int | None, optional): port to serve the Prometheus
+                metrics on at '/metrics', 0 picks a free port (see
+                get_metrics_port). Defaults to None for no server.
+            metrics_host (str, optional): address to serve the metrics on.
+                Defaults to '127.0.0.1'.
+        """
+        self._callback = callback
+        self._write_status = write_status
+        self._update_time = update_time
+        self._metrics_port = metrics_port
+        self._metrics_host = metrics_host
+
+        self._lock = threading.RLock()
+        self._dir_manager = None
+        self._start_queue = None
+        self._updater = None
+        self._updater_stop = threading.Event()
+        self._server = None
+        self._last_update = 0.0
+
+        self._state = 'idle'
+        self._sweep_iter = 0
+        self._num_chains = 0
+        self._num_workers = 0
+        self._start_time = None
+        self._end_time = None
+        self._chains = dict({})
+        self._num_running = 0
+        self._status_counts = dict({})
+
+
+    def __enter__(self) -> 'SweepTelemetry':
+        return self
+
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+
+    def start_sweep(self,
+                    dir_manager: DirectoryManager,
+                    sweep_iter: int,
+                    num_chains: int,
+                    num_workers: int,
+                    start_queue: Any = None) -> None:
+        """start_sweep: called by the herd at the start of a sweep. Resets the
+        status, starts the metrics server if it is not running and starts the
+        thread that updates the status while the sweep runs.
+
+        Args:
+            dir_manager (DirectoryManager): directory manager of the herd.
+            sweep_iter (int): sweep iteration being run.
+            num_chains (int): number of simulation chains in the sweep.
+            num_workers (int): number of chains the herd runs at once.
+            start_queue (mp.Queue | None, optional): queue the herd workers
+                put (sweep index, start time, worker number) on as they start
+                each chain. Defaults to None.
+        """
+        with self._lock:
+            self._dir_manager = dir_manager
+            self._start_queue = start_queue
+            self._state = 'running'
+            self._sweep_iter = sweep_iter
+            self._num_chains = num_chains
+            self._num_workers = num_workers
+            self._start_time = time.time()
+            self._end_time = None
+            self._chains = dict({})
+            self._num_running = 0
+            self._status_counts = dict({})
+
+        if self._metrics_port is not None and self._server is None:
+            self._start_server()
+
+        self._updater_stop.clear()
+        self._updater = threading.Thread(target=self._run_updater,daemon=True)
+        self._updater.start()
+        self.update()
+
+
+    def chain_started(self,
+                      sweep_ind: int,
+                      worker: str | None = None,
+                      start_time: float | None = None) -> None:
+        """chain_started: records the start of a simulation chain.
+
+        Args:
+            sweep_ind (int): index of the chain in the sweep.
+            worker (str | None, optional): number of the worker running the
+                chain. Defaults to None.
+            start_time (float | None, optional): start time of the chain.
+                Defaults to None which uses the current time.
+        """
+        if start_time is None:
+            start_time = time.time()
+
+        with self._lock:
+            chain = self._chains.setdefault(sweep_ind,_new_chain(sweep_ind))
+            if chain['start_time'] is not None:
+                return
+            chain['worker'] = worker
+            chain['start_time'] = start_time
+            if chain['end_time'] is None:
+                self._num_running += 1
+
+
+    def chain_ended(self,
+                    sweep_ind: int,
+                    run_results: list[RunResult],
+                    end_time: float | None = None) -> None:
+        """chain_ended: records the end of a simulation chain and updates the
+        status if the update time has passed since the last update.
+
+        Args:
+            sweep_ind (int): index of the chain in the sweep.
+            run_results (list[RunResult]): run result of each position in the
+                chain.
+            end_time (float | None, optional): end time of the chain.
+                Defaults to None which uses the current time.
+        """
+        if end_time is None:
+            end_time = time.time()
+
+        self._drain_start_queue()
+        with self._lock:
+            chain = self._chains.setdefault(sweep_ind,_new_chain(sweep_ind))
+            if chain['end_time'] is not None:
+                return
+            if chain['start_time'] is not None:
+                self._num_running -= 1
+            chain['end_time'] = end_time
+            chain['status'] = get_chain_status(run_results)
+            self._status_counts[chain['status']] = \
+                self._status_counts.get(chain['status'],0) + 1
+
+        self._update_due()
+
+
+    def end_sweep(self, stopped: bool = False) -> None:
+        """end_sweep: called by the herd at the end of a sweep. Stops the
+        update thread and writes the final status.
+
+        Args:
+            stopped (bool, optional): the sweep was stopped early. Defaults to
+                False.
+        """
+        self._updater_stop.set()
+        if self._updater is not None:
+            self._updater.join()
+            self._updater = None
+
+        with self._lock:
+            self._state = 'stopped' if stopped else 'done'
+            self._end_time = time.time()
+        self.update()
+
+
+    def close(self) -> None:
+        """close: stops the update thread and the metrics server.
+        """
+        self._updater_stop.set()
+        if self._updater is not None:
+            self._updater.join()
+            self._updater = None
+
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+
+    def get_metrics_port(self) -> int | None:
+        """get_metrics_port
+
+        Returns:
+            int | None: port the metrics are served on, None if the server is
+                not running.
+        """
+        if self._server is None:
+            return None
+        return self._server.server_address[1]
+
+
+    def get_status(self, chain_records: bool = True) -> dict:
+        """get_status: gets the status of the sweep.
+
+        Args:
+            chain_records (bool, optional): include the record of each started
+                chain. Defaults to True.
+
+        Returns:
+            dict: status with the keys: 'state' ('idle', 'running', 'done' or
+                'stopped'), 'sweep_iter', 'num_chains', 'num_workers',
+                'num_completed', 'num_running', 'queue_depth',
+                'status_counts' (completed chains by status), 'start_time',
+                'end_time', 'update_time', 'elapsed', 'completed_per_min',
+                'eta' (seconds remaining, None until a chain completes) and
+                'chains' (sweep_ind, worker, start_time, end_time, run_time
+                and status of each started chain by start time).
+        """
+        self._drain_start_queue()
+        with self._lock:
+            update_time = time.time()
+            num_completed = sum(self._status_counts.values())
+
+            elapsed = 0.0
+            if self._start_time is not None:
+                end_time = self._end_time
+                if end_time is None:
+                    end_time = update_time
+                elapsed = end_time - self._start_time
+
+            completed_per_min = 0.0
+            eta = None
+            if num_completed > 0 and elapsed > 0.0:
+                completed_per_min = 60.0*num_completed/elapsed
+                eta = (self._num_chains-num_completed)*elapsed/num_completed
+
+            status = {'state': self._state,
+                      'sweep_iter': self._sweep_iter,
+                      'num_chains': self._num_chains,
+                      'num_workers': self._num_workers,
+                      'num_completed': num_completed,
+                      'num_running': self._num_running,
+                      'queue_depth': max(self._num_chains - num_completed
+                                         - self._num_running,0),
+                      'status_counts': dict(self._status_counts),
+                      'start_time': self._start_time,
+                      'end_time': self._end_time,
+                      'update_time': update_time,
+                      'elapsed': elapsed,
+                      'completed_per_min': completed_per_min,
+                      'eta': eta}
+
+            if chain_records:
+                chains = list([])
+                for cc in self._chains.values():
+                    if cc['start_time'] is None:
+                        continue
+                    chain = dict(cc)
+                    if chain['end_time'] is not None:
+                        chain['run_time'] = chain['end_time']-chain['start_time']
+                    chains.append(chain)
+                status['chains'] = sorted(chains,key=lambda cc: cc['start_time'])
+
+        return status
+
+
+    def get_metrics_text(self) -> str:
+        """get_metrics_text: gets the sweep status in the Prometheus text
+        exposition format.
+
+        Returns:
+            str: metrics text.
+        """
+        status = self.get_status(chain_records=False)
+        eta = status['eta'] if status['eta'] is not None else float('nan')
+        gauges = (('sweep_iter','Sweep iteration being run.',
+                   status['sweep_iter']),
+                  ('chains_total','Number of simulation chains in the sweep.',
+                   status['num_chains']),
+                  ('workers','Number of chains the herd runs at once.',
+                   status['num_workers']),
+                  ('chains_running','Number of chains running.',
+                   status['num_running']),
+                  ('queue_depth','Number of chains waiting to start.',
+                   status['queue_depth']),
+                  ('elapsed_seconds','Time since the sweep started.',
+                   status['elapsed']),
+                  ('completed_per_minute','Chains completed per minute.',
+                   status['completed_per_min']),
+                  ('eta_seconds','Estimated time until the sweep completes.',
+                   eta),
+                  ('sweep_running','1 while a sweep is running.',
+                   int(status['state'] == 'running')))
+
+        lines = list([])
+        for (name,help_str,value) in gauges:
+            lines.append(f'# HELP mooseherd_{name} {help_str}')
+            lines.append(f'# TYPE mooseherd_{name} gauge')
+            lines.append(f'mooseherd_{name} {value}')
+
+        lines.append('# HELP mooseherd_chains_completed Number of completed '
+                     'chains by status.')
+        lines.append('# TYPE mooseherd_chains_completed gauge')
+        for ss,nn in sorted(status['status_counts'].items()):
+            lines.append(f'mooseherd_chains_completed{{status="{ss}"}} {nn}')
+
+        return '\n'.join(lines) + '\n'
+
+
+    def update(self) -> None:
+        """update: writes the status file and calls the callback with the
+        current status. Updates from the update thread and the herd are run
+        one at a time.
+        """
+        with self._lock:
+            self._last_update = time.time()
+            if not self._write_status and self._callback is None:
+                return
+
+            status = self.get_status()
+            if self._write_status and self._dir_manager is not None:
+                self._dir_manager.write_status(status)
+            if self._callback is not None:
+                self._callback(status)
+
+
+    def _update_due(self) -> None:
+        """_update_due: helper function that updates the status if the update
+        time has passed since the last update.
+        """
+        with self._lock:
+            if time.time() - self._last_update >= self._update_time:
+                self.update()
+
+
+    def _drain_start_queue(self) -> None:
+        """_drain_start_queue: helper function that records the chain starts
+        put on the start queue by the herd workers.
+        """
+        if self._start_queue is None:
+            return
+
+        while True:
+            try:
+                (sweep_ind,start_time,worker) = self._start_queue.get_nowait()
+            except (queue.Empty,OSError,ValueError):
+                return
+            self.chain_started(sweep_ind,worker,start_time)
+
+
+    def _run_updater(self) -> None:
+        """_run_updater: helper function run by the update thread.
+        """
+        while not self._updater_stop.wait(max(self._update_time,0.1)):
+            self._update_due()
+
+
+    def _start_server(self) -> None:
+        """_start_server: helper function that starts the metrics server in a
+        daemon thread.
+        """
+        telemetry = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            """MetricsHandler: serves the sweep metrics at '/metrics'.
+            """
+            def do_GET(self) -> None: # pylint: disable=invalid-name
+                if self.path.split('?')[0] != '/metrics':
+                    self.send_error(404)
+                    return
+                body = telemetry.get_metrics_text().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type',
+                                 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length',str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args) -> None: # pylint: disable=arguments-differ
+                pass
+
+        self._server = ThreadingHTTPServer((self._metrics_host,
+                                            self._metrics_port),
+                                            MetricsHandler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever,daemon=True).start()
+
+
+def get_chain_status(run_results: list[RunResult]) -> str:
+    """get_chain_status: gets the status of a simulation chain, the status of
+    the first runner that did not complete or 'ok'.
+
+    Args:
+        run_results (list[RunResult]): run result of each position in the
+            chain.
+
+    Returns:
+        str: status of the chain.
+    """
+    for rr in run_results:
+        if rr.status != RUN_OK:
+            return rr.status
+    return RUN_OK
+
+
+def _new_chain(sweep_ind: int) -> dict[str,Any]:
+    return {'sweep_ind': sweep_ind,
+            'worker': None,
+            'start_time': None,
+            'end_time': None,
+            'run_time': None,
+            'status': None}
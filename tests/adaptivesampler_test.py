@@ -0,0 +1,162 @@
+'''
+==============================================================================
+TEST: AdaptiveSampler
+
+Authors: Lloyd Fletcher
+==============================================================================
+'''
+from pathlib import Path
+import numpy as np
+import pytest
+from mooseherder.mooseherd import MooseHerd
+from mooseherder.inputmodifier import InputModifier
+from mooseherder.directorymanager import DirectoryManager
+from mooseherder.exodusreader import ExodusReader
+from mooseherder.adaptivesampler import AdaptiveSampler, read_glob_vars
+import tests.herdchecker as hct
+
+
+BOUNDS = [{'e_modulus': (1e9,2e9),'p_ratio': (0.2,0.4)}]
+
+
+@pytest.fixture
+def dir_manager() -> DirectoryManager:
+    return DirectoryManager(hct.NUM_DIRS)
+
+
+@pytest.fixture()
+def herd_fake(dir_manager) -> MooseHerd:
+    herd = hct.create_fake_herd(dir_manager)
+    herd.set_num_para_sims(hct.NUM_PARA)
+    return herd
+
+
+@pytest.fixture(autouse=True)
+def setup_teardown(dir_manager):
+    # Setup here
+    dir_manager.set_base_dir(hct.BASE_DIR)
+    dir_manager.create_dirs()
+    yield
+    # Teardown here
+    dir_manager.clear_dirs()
+    dir_manager.clear_cache()
+
+
+def read_fake_vars(output_list: list[Path | None]) -> tuple[float,float]:
+    mod_vars = InputModifier(output_list[0],'#','').get_vars() # type: ignore
+    return (float(mod_vars['e_modulus'])/1e9,float(mod_vars['p_ratio']))
+
+
+def read_fake_peak(output_list: list[Path | None]) -> np.ndarray:
+    (ee,pp) = read_fake_vars(output_list)
+    return np.array([np.exp(-50.0*((ee-1.2)**2+(pp-0.35)**2/0.04)),ee*pp])
+
+
+def read_fake_linear(output_list: list[Path | None]) -> np.ndarray:
+    (ee,pp) = read_fake_vars(output_list)
+    return np.array([2.0*ee-3.0*pp])
+
+
+def read_fake_failed(output_list: list[Path | None]) -> np.ndarray | None:
+    (ee,pp) = read_fake_vars(output_list)
+    if ee > 1.5:
+        return None
+    return np.array([ee+pp])
+
+
+def test_adaptive_sampler_err(herd_fake: MooseHerd) -> None:
+    with pytest.raises(ValueError):
+        AdaptiveSampler(herd_fake,BOUNDS)
+    with pytest.raises(ValueError):
+        AdaptiveSampler(herd_fake,BOUNDS,read_func=read_fake_linear,
+                        batch_size=0)
+    with pytest.raises(ValueError):
+        AdaptiveSampler(herd_fake,BOUNDS,
+                        read_func=read_fake_linear).predict([[None]])
+
+
+def test_adaptive_sampler_run(herd_fake: MooseHerd) -> None:
+    sampler = AdaptiveSampler(herd_fake,BOUNDS,read_func=read_fake_peak,
+                              num_init=8,batch_size=4,seed=3)
+    (var_lists,responses) = sampler.run(16)
+
+    assert len(var_lists) == 16
+    assert responses.shape == (16,2)
+    assert sampler.get_error_estimates().shape == (16,)
+    # Initial batch plus two adaptive batches, each is a new herd sweep
+    assert herd_fake.get_sweep_iter() == 3
+    for vv,rr in zip(var_lists,responses):
+        assert 1e9 <= vv[0]['e_modulus'] <= 2e9 # type: ignore
+        assert 0.2 <= vv[0]['p_ratio'] <= 0.4 # type: ignore
+        assert rr[1] == pytest.approx(vv[0]['e_modulus']/1e9 # type: ignore
+                                      *vv[0]['p_ratio']) # type: ignore
+
+    # The surrogate interpolates the sampled responses
+    assert np.allclose(sampler.predict(var_lists),responses,atol=1e-6)
+
+    # Sampling continues from where it stopped
+    (var_lists,_) = sampler.run(20)
+    assert len(var_lists) == 20
+    assert herd_fake.get_sweep_iter() == 4
+
+
+def test_adaptive_sampler_no_keep(herd_fake: MooseHerd) -> None:
+    herd_fake.set_keep_flag(False)
+    sampler = AdaptiveSampler(herd_fake,BOUNDS,read_func=read_fake_peak,
+                              num_init=4,batch_size=2,seed=3)
+    (var_lists,responses) = sampler.run(8)
+
+    # Each adaptive batch is a shorter sweep than the initial batch
+    assert len(var_lists) == 8
+    assert responses.shape == (8,2)
+    for vv,rr in zip(var_lists,responses):
+        assert rr[1] == pytest.approx(vv[0]['e_modulus']/1e9 # type: ignore
+                                      *vv[0]['p_ratio']) # type: ignore
+
+
+def test_adaptive_sampler_tol(herd_fake: MooseHerd) -> None:
+    sampler = AdaptiveSampler(herd_fake,BOUNDS,read_func=read_fake_linear,
+                              num_init=6,seed=3)
+    (var_lists,_) = sampler.run(20,tol=1e-3)
+
+    # The surrogate is exact for a linear response so no batches are added
+    assert len(var_lists) == 6
+    assert np.max(sampler.get_error_estimates()) < 1e-3
+
+
+def test_adaptive_sampler_failed(herd_fake: MooseHerd) -> None:
+    sampler = AdaptiveSampler(herd_fake,BOUNDS,read_func=read_fake_failed,
+                              num_init=8,seed=3)
+    (var_lists,responses) = sampler.run(12)
+
+    assert len(var_lists) + sampler.get_num_failed() == 12
+    assert sampler.get_num_failed() > 0
+    assert responses.shape == (len(var_lists),1)
+    assert all(vv[0]['e_modulus'] <= 1.5e9 for vv in var_lists) # type: ignore
+
+
+def test_propose(herd_fake: MooseHerd) -> None:
+    sampler = AdaptiveSampler(herd_fake,BOUNDS,read_func=read_fake_peak,
+                              num_init=8,seed=3)
+    sampler.run(8)
+    points = sampler.propose(4)
+
+    assert points.shape == (4,2)
+    assert np.all((points >= 0.0) & (points < 1.0))
+    assert len(np.unique(points,axis=0)) == 4
+
+
+def test_read_glob_vars() -> None:
+    output_path = hct.OUTPUT_PATH / 'moose-mech-outtest_out.e'
+    reader = ExodusReader(output_path)
+    names = [str(nn) for nn in reader.get_glob_var_names()] # type: ignore
+    glob_vars = reader.get_all_glob_vars()
+
+    values = read_glob_vars([None,output_path],names[:2])
+    assert values is not None
+    assert np.allclose(values,[glob_vars[nn][-1] for nn in names[:2]]) # type: ignore
+
+    values = read_glob_vars([output_path],names[1:2],time_ind=0)
+    assert np.allclose(values,[glob_vars[names[1]][0]]) # type: ignore
+
+    assert read_glob_vars([output_path,None],names) is None
@@ -6,9 +6,13 @@ Authors: Lloyd Fletcher
 ==============================================================================
 '''
 
+import json
 from pathlib import Path
 import pytest
-from mooseherder.directorymanager import DirectoryManager
+from mooseherder.directorymanager import (DirectoryManager,
+                                          run_results_to_dicts,
+                                          run_results_from_dicts)
+from mooseherder.simrunner import RunResult, RUN_TIMED_OUT, RUN_SKIPPED
 import tests.herdchecker as hc
 
 
@@ -77,4 +81,95 @@ def test_get_run_dir(dir_num: int,
                      expected: int,
                      dir_manager: DirectoryManager) -> None:
     check_path = dir_manager.get_run_dir(dir_num)
-    assert check_path == dir_manager._run_dirs[expected]
\ No newline at end of file
+    assert check_path == dir_manager._run_dirs[expected]
+
+def test_write_find_cached_outputs(dir_manager: DirectoryManager,
+                                   tmp_path: Path) -> None:
+    dir_manager.set_base_dir(tmp_path)
+    output_path = tmp_path / 'sim-1_out.e'
+    with open(output_path,'w',encoding='utf-8') as of:
+        of.write('output')
+
+    assert dir_manager.find_cached_outputs('abc') is None
+    assert dir_manager.write_cached_outputs('abc',[None,output_path])
+    assert not dir_manager.write_cached_outputs('abc',[None,output_path])
+
+    cached = dir_manager.find_cached_outputs('abc')
+    assert cached is not None
+    assert cached[0] is None
+    assert cached[1] == dir_manager.get_cache_dir() / 'abc' / output_path.name
+    assert cached[1].is_file()
+
+    dir_manager.clear_cache()
+    assert not dir_manager.get_cache_dir().is_dir()
+
+
+def test_write_cached_outputs_missing(dir_manager: DirectoryManager,
+                                      tmp_path: Path) -> None:
+    dir_manager.set_base_dir(tmp_path)
+    assert not dir_manager.write_cached_outputs('abc',[tmp_path / 'no_exist.e'])
+    assert dir_manager.find_cached_outputs('abc') is None
+
+
+def test_write_read_journal(dir_manager: DirectoryManager,
+                            tmp_path: Path) -> None:
+    dir_manager.set_base_dir(tmp_path)
+    dir_manager.create_dirs()
+
+    with pytest.raises(FileNotFoundError):
+        dir_manager.read_journal(1)
+
+    dir_manager.start_journal(1,4)
+    ok_results = [RunResult(),RunResult(exit_code=0,wall_time=1.0)]
+    timed_out_results = [RunResult(status=RUN_TIMED_OUT),
+                         RunResult(status=RUN_SKIPPED)]
+    dir_manager.append_journal(1,1,[None,tmp_path / 'sim-5_out.e'],ok_results)
+    dir_manager.append_journal(1,0,[None,None],timed_out_results)
+    # Simulate a crash part way through writing a line
+    with open(dir_manager.get_journal_file(1),'a',encoding='utf-8') as jf:
+        jf.write('{"sweep_ind": 2, "outp')
+
+    (sim_iter_start,completed,results) = dir_manager.read_journal(1)
+    assert sim_iter_start == 4
+    assert completed == {0: [None,None],
+                         1: [None,tmp_path / 'sim-5_out.e']}
+    assert results == {0: timed_out_results,
+                       1: ok_results}
+
+
+def test_write_run_results(dir_manager: DirectoryManager,
+                           tmp_path: Path) -> None:
+    dir_manager.set_base_dir(tmp_path)
+    dir_manager.create_dirs()
+
+    run_results = [[RunResult(exit_code=0,stdout_path=tmp_path / 'stdout')],
+                   None]
+    dir_manager.write_run_results(run_results,2)
+    with open(dir_manager.get_run_results_file(2),'r',encoding='utf-8') as rrf:
+        assert json.load(rrf) == run_results_to_dicts(run_results)
+    assert run_results_from_dicts(run_results_to_dicts(run_results)) == \
+        run_results
+
+
+def test_write_read_sweep_vars(dir_manager: DirectoryManager,
+                               tmp_path: Path) -> None:
+    dir_manager.set_base_dir(tmp_path)
+    dir_manager.create_dirs()
+
+    with pytest.raises(FileNotFoundError):
+        dir_manager.read_sweep_vars(1)
+
+    sweep_vars = [[{'n_elem_y': 2},None],[{'n_elem_y': 3},None]]
+    dir_manager.write_sweep_vars(sweep_vars,1)
+    assert dir_manager.read_sweep_vars(1) == sweep_vars
+
+
+def test_write_status(dir_manager: DirectoryManager, tmp_path: Path) -> None:
+    dir_manager.set_base_dir(tmp_path)
+    assert dir_manager.get_status_file() == tmp_path / 'sweep-status.json'
+
+    dir_manager.write_status({'state': 'running','num_completed': 1})
+    dir_manager.write_status({'state': 'done','num_completed': 2})
+    with open(dir_manager.get_status_file(),'r',encoding='utf-8') as sf:
+        assert json.load(sf) == {'state': 'done','num_completed': 2}
+    assert list(tmp_path.iterdir()) == [dir_manager.get_status_file()]
@@ -5,12 +5,16 @@ TEST: ExodusReader
 Authors: Lloyd Fletcher
 ==============================================================================
 '''
+import time
+import pickle
 from pathlib import Path
 from dataclasses import fields
 import pytest
 import numpy as np
 import numpy.typing as npt
-from mooseherder.exodusreader import ExodusReader
+from mooseherder.exodusreader import (ExodusReader,
+                                      set_read_profiling,
+                                      pop_read_times)
 from mooseherder.simdata import SimData
 import tests.herdchecker as hc
 
@@ -108,6 +112,31 @@ def test_get_names_no_key(reader: ExodusReader) -> None:
     assert check_names is None
 
 
+def test_get_names_cached(reader: ExodusReader) -> None:
+    check_names = reader.get_names('name_nod_var')
+    assert 'name_nod_var' in reader._names
+
+    check_names[0] = 'overwritten' # type: ignore
+    assert (reader.get_names('name_nod_var') == NODE_VAR_NAMES).all()
+
+
+@pytest.mark.parametrize(
+    ('keys','expected'),
+    (
+        (('top','ss_names','node_ns'),'node_ns3'),
+        (('disp_y','name_nod_var','vals_nod_var'),'vals_nod_var2'),
+        (('stress_xx','name_elem_var','vals_elem_var'),'vals_elem_var5'),
+        (('react_y','name_glo_var','vals_glo_var'),'vals_glo_var4'),
+        (('no_exist','name_nod_var','vals_nod_var'),None),
+    )
+)
+def test_get_name_key(keys: tuple[str,str,str],
+                      expected: str | None,
+                      reader: ExodusReader) -> None:
+    key = reader._get_name_key(keys[0],keys[1],keys[2])
+    assert key == expected
+
+
 def test_get_var(reader: ExodusReader) -> None:
     key = 'coordx'
     check_var = reader.get_var(key)
@@ -326,3 +355,190 @@ def check_sim_data(data: SimData) -> None:
     for gg in data.glob_vars:
         data.glob_vars[gg].shape == (NUM_TIME_STEPS,)
 
+
+
+@pytest.mark.parametrize(
+    ('time_inds','spat_inds'),
+    (
+        (None,None),
+        (np.array([NUM_TIME_STEPS-1]),None),
+        (None,np.array([0,10,20])),
+        (np.array([0,2]),np.array([5,1])),
+    )
+)
+def test_get_var_hyperslab(time_inds: npt.NDArray | None,
+                           spat_inds: npt.NDArray | None,
+                           reader: ExodusReader) -> None:
+    key = 'vals_nod_var1'
+    expected = reader.get_var(key)
+    if spat_inds is not None:
+        expected = expected[spat_inds,:]
+    if time_inds is not None:
+        expected = expected[:,time_inds]
+
+    check_var = reader.get_var(key,time_inds,spat_inds)
+    assert check_var.shape == expected.shape
+    assert (check_var == expected).all()
+
+
+def test_get_var_hyperslab_no_time(reader: ExodusReader) -> None:
+    spat_inds = np.array([0,10,20])
+    check_var = reader.get_var('coordx',np.array([0]),spat_inds)
+    assert check_var.shape == (spat_inds.shape[0],)
+    assert (check_var == reader.get_var('coordx')[spat_inds]).all()
+
+
+def test_get_node_vars_time_node_inds(reader: ExodusReader) -> None:
+    time_inds = np.array([NUM_TIME_STEPS-1])
+    node_inds = np.array([0,100,200])
+    node_vars = reader.get_node_vars(np.array(NODE_VAR_NAMES),
+                                     time_inds,
+                                     node_inds)
+    all_node_vars = reader.get_all_node_vars()
+    assert node_vars is not None and all_node_vars is not None
+    for nn in node_vars:
+        assert node_vars[nn].shape == (node_inds.shape[0],time_inds.shape[0])
+        assert (node_vars[nn] ==
+                all_node_vars[nn][node_inds,:][:,time_inds]).all()
+
+
+def test_get_elem_vars_time_elem_inds(reader: ExodusReader) -> None:
+    time_inds = np.array([1,NUM_TIME_STEPS-1])
+    elem_inds = np.array([0,50])
+    elem_vars = reader.get_elem_vars(reader.get_elem_var_names_and_blocks(),
+                                     time_inds,
+                                     elem_inds)
+    all_elem_vars = reader.get_all_elem_vars()
+    assert elem_vars is not None and all_elem_vars is not None
+    for ee in elem_vars:
+        assert elem_vars[ee].shape == (elem_inds.shape[0],time_inds.shape[0])
+        assert (elem_vars[ee] ==
+                all_elem_vars[ee][elem_inds,:][:,time_inds]).all()
+
+
+def test_get_glob_vars_time_inds(reader: ExodusReader) -> None:
+    time_inds = np.array([NUM_TIME_STEPS-1])
+    glob_vars = reader.get_glob_vars(np.array(GLO_VAR_NAMES),time_inds)
+    all_glob_vars = reader.get_all_glob_vars()
+    assert glob_vars is not None and all_glob_vars is not None
+    for gg in glob_vars:
+        assert glob_vars[gg].shape == (time_inds.shape[0],)
+        assert (glob_vars[gg] == all_glob_vars[gg][time_inds]).all()
+
+
+def test_get_time_inds(reader: ExodusReader) -> None:
+    time_inds = np.array([0,NUM_TIME_STEPS-1])
+    check_time = reader.get_time(time_inds)
+    assert check_time.shape == (time_inds.shape[0],)
+    assert (check_time == reader.get_time()[time_inds]).all()
+
+
+def test_get_glob_vars_array(reader: ExodusReader) -> None:
+    names = np.array(GLO_VAR_NAMES[::-1])
+    glob_array = reader.get_glob_vars_array(names)
+    assert glob_array is not None
+
+    (data,col_inds) = glob_array
+    assert data.shape == (NUM_TIME_STEPS,NUM_GLO_VARS)
+    assert tuple(col_inds.keys()) == tuple(names)
+
+    all_glob_vars = reader.get_all_glob_vars()
+    assert all_glob_vars is not None
+    for gg in GLO_VAR_NAMES:
+        assert (data[:,col_inds[gg]] == all_glob_vars[gg]).all()
+
+
+def test_get_glob_vars_array_time_inds(reader: ExodusReader) -> None:
+    time_inds = np.array([0,NUM_TIME_STEPS-1])
+    names = np.array(['react_y'])
+    glob_array = reader.get_glob_vars_array(names,time_inds)
+    assert glob_array is not None
+
+    (data,col_inds) = glob_array
+    assert data.shape == (time_inds.shape[0],1)
+    assert col_inds == {'react_y': 0}
+
+
+def test_get_glob_vars_array_none(reader: ExodusReader) -> None:
+    assert reader.get_glob_vars_array(None) is None
+
+
+def test_read_lazy_sim_data(reader: ExodusReader) -> None:
+    data = reader.read_lazy_sim_data()
+    assert not data.node_vars.is_cached('disp_x') # type: ignore
+    check_sim_data(data)
+    assert data.node_vars.is_cached('disp_x') # type: ignore
+
+
+def test_read_lazy_sim_data_matches(reader: ExodusReader) -> None:
+    config = reader.get_read_config()
+    config.time_inds = np.array([NUM_TIME_STEPS-1])
+    lazy_data = reader.read_lazy_sim_data(config)
+    data = reader.read_sim_data(config)
+
+    for ss in data.side_sets: # type: ignore
+        assert (lazy_data.side_sets[ss] == data.side_sets[ss]).all() # type: ignore
+    for nn in data.node_vars: # type: ignore
+        assert (lazy_data.node_vars[nn] == data.node_vars[nn]).all() # type: ignore
+    for ee in data.elem_vars: # type: ignore
+        assert (lazy_data.elem_vars[ee] == data.elem_vars[ee]).all() # type: ignore
+    for gg in data.glob_vars: # type: ignore
+        assert (lazy_data.glob_vars[gg] == data.glob_vars[gg]).all() # type: ignore
+
+
+def test_read_lazy_sim_data_key_err(reader: ExodusReader) -> None:
+    data = reader.read_lazy_sim_data()
+    with pytest.raises(KeyError):
+        data.node_vars['no_exist'] # type: ignore
+
+
+def test_read_lazy_sim_data_clear_cache(reader: ExodusReader) -> None:
+    data = reader.read_lazy_sim_data()
+    data.glob_vars['react_y'] # type: ignore
+    assert data.glob_vars.is_cached('react_y') # type: ignore
+    data.glob_vars.clear_cache() # type: ignore
+    assert not data.glob_vars.is_cached('react_y') # type: ignore
+
+
+def test_reader_pickle(reader: ExodusReader) -> None:
+    data = reader.read_lazy_sim_data()
+    check_data = pickle.loads(pickle.dumps(data))
+    assert (check_data.node_vars['disp_x'] == data.node_vars['disp_x']).all() # type: ignore
+
+
+def test_read_profiling(exodus_path: Path) -> None:
+    pop_read_times()
+    ExodusReader(exodus_path).read_all_sim_data()
+    assert pop_read_times() == dict({})
+
+    set_read_profiling(True)
+    try:
+        start_time = time.perf_counter()
+        ExodusReader(exodus_path).read_all_sim_data()
+        read_time = time.perf_counter() - start_time
+    finally:
+        set_read_profiling(False)
+
+    read_times = pop_read_times()
+    assert {'open','read_all_sim_data','get_time','get_coords',
+            'get_all_node_vars','get_all_elem_vars'} <= set(read_times)
+    assert all(tt >= 0.0 for tt in read_times.values())
+    # Self times of nested reads add up to the total read time
+    assert sum(read_times.values()) <= read_time
+    assert pop_read_times() == dict({})
+
+
+def test_get_glob_vars_array_time_ind(reader: ExodusReader) -> None:
+    names = np.array(GLO_VAR_NAMES)
+    glob_array = reader.get_glob_vars_array(names,-1) # type: ignore
+    assert glob_array is not None
+
+    (data,col_inds) = glob_array
+    assert data.shape == (NUM_GLO_VARS,)
+
+    glob_vars = reader.get_glob_vars(names,-1) # type: ignore
+    all_glob_vars = reader.get_all_glob_vars()
+    assert glob_vars is not None and all_glob_vars is not None
+    for gg in GLO_VAR_NAMES:
+        assert data[col_inds[gg]] == all_glob_vars[gg][-1]
+        assert glob_vars[gg] == all_glob_vars[gg][-1]
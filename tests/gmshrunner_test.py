@@ -6,6 +6,7 @@ Authors: Lloyd Fletcher
 ==============================================================================
 '''
 import os
+import sys
 from pathlib import Path
 import pytest
 from mooseherder.gmshrunner import GmshRunner
@@ -92,6 +93,17 @@ def test_set_input_err_exist(runner: GmshRunner) -> None:
     assert msg == 'Specified gmsh geo file does not exist.'
 
 
+def test_set_timeout() -> None:
+    runner = GmshRunner()
+    assert runner.get_timeout() is None
+    runner.set_timeout(10.0)
+    assert runner.get_timeout() == 10.0
+    assert not runner.get_timed_out()
+
+    with pytest.raises(ValueError):
+        runner.set_timeout(0.0)
+
+
 def test_run(runner: GmshRunner, input_file: Path) -> None:
     runner.set_input_file(input_file)
     runner.run()
@@ -116,3 +128,125 @@ def test_run_err_no_geo(runner: GmshRunner) -> None:
         runner.run()
     msg, = err_info.value.args
     assert msg == "Specify input *.geo file before running gmsh."
+
+
+FAKE_GMSH = """#!{exe}
+import re
+import sys
+from pathlib import Path
+if '--version' in sys.argv:
+    print('4.11.1-fake')
+    sys.exit(0)
+geo_path = Path(sys.argv[-1])
+msh_name = re.search(r'filename = "(.*)";',geo_path.read_text()).group(1)
+(geo_path.parent / msh_name).write_text('mesh:' + geo_path.read_text())
+with open(Path(sys.argv[0]).parent / 'count.txt','a') as cf:
+    cf.write('run\\n')
+"""
+
+@pytest.fixture()
+def fake_gmsh(tmp_path: Path) -> Path:
+    fake_path = tmp_path / 'gmsh'
+    fake_path.write_text(FAKE_GMSH.format(exe=sys.executable))
+    fake_path.chmod(0o755)
+    return fake_path
+
+
+def write_geo(geo_dir: Path, mesh_size: float) -> Path:
+    geo_dir.mkdir(parents=True,exist_ok=True)
+    geo_path = geo_dir / 'part.geo'
+    geo_path.write_text(f'filename = "part.msh";\nlc = {mesh_size};\n')
+    return geo_path
+
+
+def count_runs(fake_gmsh: Path) -> int:
+    count_file = fake_gmsh.parent / 'count.txt'
+    if not count_file.is_file():
+        return 0
+    return len(count_file.read_text().splitlines())
+
+
+def test_set_mesh_cache(tmp_path: Path) -> None:
+    runner = GmshRunner()
+    assert runner.get_mesh_cache() is None
+    runner.set_mesh_cache(tmp_path)
+    assert runner.get_mesh_cache() == tmp_path
+
+    with pytest.raises(ValueError):
+        runner.set_mesh_cache(tmp_path,'copy')
+
+
+def test_get_gmsh_version(fake_gmsh: Path) -> None:
+    runner = GmshRunner(fake_gmsh)
+    assert runner.get_gmsh_version() == '4.11.1-fake'
+
+
+def test_mesh_cache_hit(fake_gmsh: Path, tmp_path: Path) -> None:
+    cache_dir = tmp_path / 'mesh-cache'
+    runner = GmshRunner(fake_gmsh)
+    runner.set_mesh_cache(cache_dir)
+
+    runner.run(write_geo(tmp_path / 'run-1',0.1))
+    assert count_runs(fake_gmsh) == 1
+    assert runner.get_run_result().status == 'ok' # type: ignore
+
+    runner.run(write_geo(tmp_path / 'run-2',0.1))
+    assert count_runs(fake_gmsh) == 1
+    assert runner.get_run_result().exit_code == 0 # type: ignore
+
+    cached = list(cache_dir.glob('*/part.msh'))
+    mesh_path = tmp_path / 'run-2' / 'part.msh'
+    assert len(cached) == 1
+    assert mesh_path.samefile(cached[0])
+    assert mesh_path.read_text() == (tmp_path / 'run-1' / 'part.msh').read_text()
+
+
+def test_mesh_cache_symbolic(fake_gmsh: Path, tmp_path: Path) -> None:
+    runner = GmshRunner(fake_gmsh)
+    runner.set_mesh_cache(tmp_path / 'mesh-cache','symbolic')
+
+    runner.run(write_geo(tmp_path / 'run-1',0.1))
+    runner.run(write_geo(tmp_path / 'run-2',0.1))
+    assert count_runs(fake_gmsh) == 1
+    assert (tmp_path / 'run-2' / 'part.msh').is_symlink()
+
+
+def test_mesh_cache_miss_keeps_cache(fake_gmsh: Path, tmp_path: Path) -> None:
+    cache_dir = tmp_path / 'mesh-cache'
+    runner = GmshRunner(fake_gmsh)
+    runner.set_mesh_cache(cache_dir)
+    run_dir = tmp_path / 'run-1'
+
+    runner.run(write_geo(run_dir,0.1))
+    runner.run(write_geo(run_dir,0.1))
+    assert count_runs(fake_gmsh) == 1
+
+    # Changed geo file in the same directory as a linked mesh
+    runner.run(write_geo(run_dir,0.2))
+    assert count_runs(fake_gmsh) == 2
+    assert 'lc = 0.2' in (run_dir / 'part.msh').read_text()
+    cached = sorted(cc.read_text() for cc in cache_dir.glob('*/part.msh'))
+    assert len(cached) == 2
+    assert 'lc = 0.1' in cached[0] and 'lc = 0.2' in cached[1]
+
+
+def test_mesh_cache_miss_keeps_user_links(fake_gmsh: Path,
+                                          tmp_path: Path) -> None:
+    runner = GmshRunner(fake_gmsh)
+    runner.set_mesh_cache(tmp_path / 'mesh-cache')
+    run_dir = tmp_path / 'run-1'
+    runner.run(write_geo(run_dir,0.1))
+    runner.run(write_geo(run_dir,0.1))
+    assert (run_dir / 'part.msh').stat().st_nlink > 1
+
+    # Linked files that do not come from the mesh cache are kept
+    user_file = tmp_path / 'data.csv'
+    user_file.write_text('1,2,3')
+    os.link(user_file,run_dir / 'data-hard.csv')
+    (run_dir / 'data-sym.csv').symlink_to(user_file)
+
+    runner.run(write_geo(run_dir,0.2))
+    assert count_runs(fake_gmsh) == 2
+    assert (run_dir / 'data-hard.csv').read_text() == '1,2,3'
+    assert (run_dir / 'data-sym.csv').is_symlink()
+    assert (run_dir / 'part.msh').stat().st_nlink == 1
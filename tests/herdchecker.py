@@ -7,15 +7,23 @@ Authors: Lloyd Fletcher
 '''
 
 import os
+import sys
+import json
 from typing import Any
 from pathlib import Path
 from pprint import pprint
 from mooseherder.inputmodifier import InputModifier
-from mooseherder.mooserunner import MooseRunner
+from mooseherder.simrunner import (SimRunner,
+                                   RunResult,
+                                   RUN_FAILED,
+                                   RUN_TIMED_OUT,
+                                   run_process)
+from mooseherder.mooserunner import MooseRunner, get_batch_dir
 from mooseherder.mooseconfig import MooseConfig
 from mooseherder.gmshrunner import GmshRunner
 from mooseherder.mooseherd import MooseHerd
 from mooseherder.directorymanager import DirectoryManager
+from mooseherder.jobscheduler import SlurmScheduler, PBSScheduler
 
 
 NUM_DIRS = 4
@@ -34,6 +42,162 @@ GMSH_INPUT = Path('tests/gmsh/gmsh-test.geo')
 OUTPUT_PATH = Path('tests/output/')
 
 
+class FakeRunner(SimRunner):
+    """FakeRunner: stand in for the MOOSE runner that copies the input file to
+    the output path so the herd can be tested without MOOSE installed. If a
+    sleep time is given a sleeping subprocess is run first to test timeouts.
+    If write_output is False no output is written to test failed runs, if
+    fail_count is set no output is written for that many runs.
+    """
+    def __init__(self,
+                 n_cores: int = 1,
+                 sleep_time: float | None = None,
+                 timeout: float | None = None,
+                 write_output: bool = True,
+                 fail_count: int = 0) -> None:
+        self._input_path = None
+        self._n_cores = n_cores
+        self._cpu_set = None
+        self._sleep_time = sleep_time
+        self._timeout = timeout
+        self._timed_out = False
+        self._write_output = write_output
+        self._fail_count = fail_count
+        self.run_count = 0
+
+    def get_num_cores(self) -> int:
+        return self._n_cores
+
+    def set_cpu_set(self, cpus: list[int] | None) -> None:
+        self._cpu_set = cpus
+
+    def get_timed_out(self) -> bool:
+        return self._timed_out
+
+    def get_input_file(self) -> Path | None:
+        return self._input_path
+
+    def set_input_file(self, input_path: Path) -> None:
+        self._input_path = input_path
+
+    def run(self, input_file: Path | None = None) -> None:
+        if input_file is not None:
+            self.set_input_file(input_file)
+        self.run_count += 1
+        if self._sleep_time is not None:
+            run_result = run_process(
+                [sys.executable,'-c',f'import time; time.sleep({self._sleep_time})'],
+                timeout=self._timeout)
+            self._timed_out = run_result.status == RUN_TIMED_OUT
+            if self._timed_out:
+                return
+
+        if not self._write_output or self.run_count <= self._fail_count:
+            return
+
+        with open(self._input_path,'r',encoding='utf-8') as in_file: # type: ignore
+            lines = in_file.readlines()
+        with open(self.get_output_path(),'w',encoding='utf-8') as out_file: # type: ignore
+            out_file.writelines(lines)
+
+    def get_output_path(self) -> Path | None:
+        if self._input_path is None:
+            return None
+        return self._input_path.parent / (self._input_path.stem +'_out.e')
+
+
+class FakeBatchRunner(FakeRunner):
+    """FakeBatchRunner: fake runner that supports batched runs and records
+    the size of each batch. If fail_batch is True every batch fails so that
+    the herd has to rerun each input file on its own.
+    """
+    def __init__(self, fail_batch: bool = False) -> None:
+        super().__init__()
+        self._fail_batch = fail_batch
+        self.batch_sizes = list([])
+
+    def get_batch_support(self) -> bool:
+        return True
+
+    def run_batch(self, input_files: list[Path]) -> list[RunResult]:
+        # Same input checks as MooseRunner.run_batch
+        get_batch_dir(input_files)
+        self.batch_sizes.append(len(input_files))
+        run_results = list([])
+        for ff in input_files:
+            if self._fail_batch:
+                run_results.append(RunResult(status=RUN_FAILED,exit_code=1))
+                continue
+            self.set_input_file(ff)
+            with open(ff,'r',encoding='utf-8') as in_file:
+                lines = in_file.readlines()
+            with open(self.get_output_path(),'w',encoding='utf-8') as out_file: # type: ignore
+                out_file.writelines(lines)
+            run_results.append(RunResult(exit_code=0,wall_time=0.0))
+            run_results[-1].check_output(self.get_output_path())
+        return run_results
+
+
+class FakeVarSleepRunner(FakeRunner):
+    """FakeVarSleepRunner: fake runner that sleeps for the 'y_max' variable
+    in the input file before writing its output so chains in the same sweep
+    take different times.
+    """
+    def run(self, input_file: Path | None = None) -> None:
+        if input_file is not None:
+            self.set_input_file(input_file)
+        self._sleep_time = float(InputModifier(self._input_path,'#','') # type: ignore
+                                 .get_vars()['y_max'])
+        super().run()
+
+
+FAKE_PROCESS = """import os, sys, time, shutil
+(in_path,out_path,sleep_time) = sys.argv[1:]
+with open(out_path + '.pid','w',encoding='utf-8') as pid_file:
+    pid_file.write(str(os.getpid()))
+time.sleep(float(sleep_time))
+shutil.copyfile(in_path,out_path)
+"""
+
+class FakeProcessRunner(FakeRunner):
+    """FakeProcessRunner: fake runner that gives the herd a python command
+    that copies the input file to the output path so it can be run as an
+    asyncio subprocess. The process writes its pid next to the output file so
+    tests can check it has been killed.
+    """
+    def get_run_command(self, input_file: Path
+                        ) -> tuple[list[str],Path | None,float | None]:
+        self.set_input_file(input_file)
+        sleep_time = 0.0 if self._sleep_time is None else self._sleep_time
+        return ([sys.executable,'-c',FAKE_PROCESS,str(input_file),
+                 str(self.get_output_path()),str(sleep_time)],
+                None,self._timeout)
+
+
+class FakeVarProcessRunner(FakeProcessRunner):
+    """FakeVarProcessRunner: fake runner that runs the command of the
+    FakeProcessRunner as a subprocess, sleeping for the 'y_max' variable in
+    the input file, so tests can check the process is killed when run_para
+    workers are terminated.
+    """
+    def run(self, input_file: Path | None = None) -> None:
+        if input_file is not None:
+            self.set_input_file(input_file)
+        self._sleep_time = float(InputModifier(self._input_path,'#','') # type: ignore
+                                 .get_vars()['y_max'])
+        (arg_list,cwd,timeout) = self.get_run_command(self._input_path) # type: ignore
+        run_process(arg_list,cwd,timeout)
+
+
+def create_fake_herd(dir_manager: DirectoryManager,
+                     n_cores: int = 1,
+                     sleep_time: float | None = None,
+                     timeout: float | None = None) -> MooseHerd:
+    fake_modifier = InputModifier(MOOSE_INPUT,'#','')
+    return MooseHerd([FakeRunner(n_cores,sleep_time,timeout)],
+                     [fake_modifier],dir_manager)
+
+
 def create_moose_config() -> MooseConfig:
     return MooseConfig({'main_path': MOOSE_PATH,
                         'app_path': MOOSE_APP_PATH,
@@ -198,3 +362,120 @@ def debug_print(to_print: Any) -> None:
     print('-'*80)
     print()
 
+
+
+def read_run_results(dir_manager: DirectoryManager,
+                     sweep_iter: int = 1) -> list[list[dict]]:
+    with open(dir_manager.get_run_results_file(sweep_iter),'r',
+              encoding='utf-8') as rrf:
+        return json.load(rrf)
+
+
+FAKE_SUBMIT = '''#!{exe}
+import os, re, sys, subprocess
+from pathlib import Path
+state_dir = Path(__file__).parent
+script = Path([aa for aa in sys.argv[1:] if not aa.startswith('--')][-1])
+(start,end) = re.search(r'{array_regex}',script.read_text()).groups()
+job_id = str(1000 + len(list(state_dir.glob('job-*'))))
+tasks = ('import os, subprocess, sys\\n'
+         'for ii in range(int(sys.argv[2]),int(sys.argv[3])+1):\\n'
+         '    subprocess.run(["bash",sys.argv[1]],'
+         'env=dict(os.environ,{index_var}=str(ii)))\\n'
+         'open(sys.argv[4],"w").close()\\n')
+proc = subprocess.Popen([sys.executable,'-c',tasks,str(script),start,end,
+                         str(state_dir / ('done-' + job_id))],
+                        start_new_session=True,
+                        stdout=subprocess.DEVNULL,stderr=subprocess.DEVNULL)
+(state_dir / ('job-' + job_id)).write_text(str(proc.pid))
+print(job_id)
+'''
+
+FAKE_QUERY = '''#!{exe}
+import sys
+from pathlib import Path
+state_dir = Path(__file__).parent
+job_id = [aa for aa in sys.argv[1:] if aa.isdigit()][0]
+errors_file = state_dir / 'query-errors.txt'
+if errors_file.is_file() and int(errors_file.read_text()) > 0:
+    errors_file.write_text(str(int(errors_file.read_text())-1))
+    print('Socket timed out on send/recv operation',file=sys.stderr)
+    sys.exit(1)
+if (state_dir / ('job-' + job_id)).is_file() and \\
+    not (state_dir / ('done-' + job_id)).is_file():
+    print(job_id)
+    sys.exit(0)
+print('{unknown_job}',file=sys.stderr)
+sys.exit(1)
+'''
+
+FAKE_CANCEL = '''#!{exe}
+import os, sys, signal
+from pathlib import Path
+state_dir = Path(__file__).parent
+job_id = sys.argv[-1]
+try:
+    os.killpg(int((state_dir / ('job-' + job_id)).read_text()),signal.SIGKILL)
+except ProcessLookupError:
+    pass
+(state_dir / ('done-' + job_id)).write_text('cancelled')
+'''
+
+def write_fake_command(fake_path: Path, template: str, **kwargs) -> str:
+    fake_path.write_text(template.format(exe=sys.executable,**kwargs))
+    fake_path.chmod(0o755)
+    return str(fake_path)
+
+
+def create_fake_slurm(fake_dir: Path,
+                      max_running: int | None = None) -> SlurmScheduler:
+    return SlurmScheduler(
+        max_running=max_running,
+        sbatch=write_fake_command(fake_dir / 'sbatch',FAKE_SUBMIT,
+                                  array_regex=r'--array=(\d+)-(\d+)',
+                                  index_var='SLURM_ARRAY_TASK_ID'),
+        squeue=write_fake_command(fake_dir / 'squeue',FAKE_QUERY,
+                                  unknown_job='Invalid job id specified'),
+        scancel=write_fake_command(fake_dir / 'scancel',FAKE_CANCEL))
+
+
+def set_fake_query_errors(fake_dir: Path, n_errors: int) -> None:
+    (fake_dir / 'query-errors.txt').write_text(str(n_errors))
+
+
+def create_fake_pbs(fake_dir: Path) -> PBSScheduler:
+    return PBSScheduler(
+        qsub=write_fake_command(fake_dir / 'qsub',FAKE_SUBMIT,
+                                array_regex=r'-J (\d+)-(\d+)',
+                                index_var='PBS_ARRAY_INDEX'),
+        qstat=write_fake_command(fake_dir / 'qstat',FAKE_QUERY,
+                                 unknown_job='Unknown Job Id'),
+        qdel=write_fake_command(fake_dir / 'qdel',FAKE_CANCEL))
+
+
+FAKE_MOOSE = '''#!{exe}
+import re, sys, shutil
+from pathlib import Path
+in_path = Path(sys.argv[sys.argv.index('-i')+1])
+in_text = in_path.read_text()
+with open(Path(__file__).parent / 'runs.txt','a') as rf:
+    rf.write(str(in_path) + '\\n')
+if 'FullSolveMultiApp' not in in_text:
+    shutil.copyfile(in_path,in_path.stem + '_out.e')
+    sys.exit(0)
+in_files = re.search(r"input_files = '(.*)'",in_text).group(1).split()
+out_bases = re.findall(r"'Outputs/file_base=(.*?)'",in_text)
+for (ii,oo) in zip(in_files,out_bases):
+    shutil.copyfile(ii,oo + '.e')
+'''
+
+def create_fake_moose(fake_dir: Path) -> MooseRunner:
+    app_dir = fake_dir / 'fake-app'
+    app_dir.mkdir(parents=True,exist_ok=True)
+    write_fake_command(app_dir / 'fake-moose-opt',FAKE_MOOSE)
+    moose_config = MooseConfig({'main_path': fake_dir,
+                                'app_path': app_dir,
+                                'app_name': str(app_dir / 'fake-moose-opt')})
+    moose_runner = MooseRunner(moose_config)
+    moose_runner.set_stdout(False)
+    return moose_runner
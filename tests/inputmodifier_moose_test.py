@@ -114,6 +114,44 @@ def test_moose_write_file(moose_mod: InputModifier) -> None:
     }
 
 
+def test_moose_render(moose_mod: InputModifier) -> None:
+    input_lines = list(moose_mod._input_lines)
+    orig_vars = dict(moose_mod.get_vars())
+
+    render_lines = moose_mod.render().splitlines(keepends=True)
+    assert len(render_lines) == len(input_lines)
+    end_ind = moose_mod._var_end_ind
+    assert render_lines[:4] == input_lines[:4]
+    assert render_lines[end_ind:] == input_lines[end_ind:]
+
+    rendered = moose_mod.render({"n_elem_y": 25, "e_type": "QUAD8"})
+    assert "n_elem_y = 25 #" in rendered
+    assert "e_type = QUAD8" in rendered
+    assert moose_mod._input_lines == input_lines
+    assert moose_mod.get_vars() == orig_vars
+
+    with pytest.raises(KeyError):
+        moose_mod.render({"n_elem_z": 50})
+
+
+def test_moose_render_many(moose_mod: InputModifier) -> None:
+    var_dicts = [{"n_elem_y": 25}, None, {"e_modulus": 2e9}]
+    mod_files = [Path(f"tests/moose/moose-test-mod{ii}.i") for ii in range(3)]
+    moose_mod.render_many(var_dicts, mod_files)
+
+    orig_vars = moose_mod.get_vars()
+    for vv, ff in zip(var_dicts, mod_files):
+        expected = dict(orig_vars)
+        if vv is not None:
+            expected.update(vv)
+        assert InputModifier(ff, "#", "").get_vars() == expected
+
+
+def test_moose_render_many_err(moose_mod: InputModifier) -> None:
+    with pytest.raises(ValueError):
+        moose_mod.render_many([None], [])
+
+
 def test_moose_get_var_keys(moose_mod: InputModifier):
     assert moose_mod.get_var_keys() == [
         "n_elem_x",
@@ -0,0 +1,107 @@
+'''
+==============================================================================
+TEST: JobScheduler
+
+Authors: Lloyd Fletcher
+==============================================================================
+'''
+import time
+from pathlib import Path
+import pytest
+from mooseherder.jobscheduler import (SlurmScheduler,
+                                      PBSScheduler,
+                                      JobSchedulerError)
+import tests.herdchecker as hct
+
+
+def wait_inactive(scheduler: SlurmScheduler | PBSScheduler,
+                  job_id: str) -> None:
+    for _ in range(100):
+        if not scheduler.is_active(job_id):
+            return
+        time.sleep(0.1)
+    raise AssertionError('Job did not leave the queue.')
+
+
+def test_slurm_script_header(tmp_path: Path) -> None:
+    scheduler = SlurmScheduler(options=['--partition=short'],max_running=4)
+    header = scheduler.get_script_header('sweep',10,tmp_path)
+
+    assert header[0] == '#!/bin/bash'
+    assert '#SBATCH --job-name=sweep' in header
+    assert '#SBATCH --array=0-9%4' in header
+    assert f'#SBATCH --output={tmp_path}/slurm-%A_%a.out' in header
+    assert '#SBATCH --partition=short' in header
+    assert scheduler.get_task_index_var() == 'SLURM_ARRAY_TASK_ID'
+
+
+def test_pbs_script_header(tmp_path: Path) -> None:
+    scheduler = PBSScheduler(options=['-l walltime=01:00:00'])
+    header = scheduler.get_script_header('sweep',10,tmp_path)
+
+    assert '#PBS -N sweep' in header
+    assert '#PBS -J 0-9' in header
+    assert '#PBS -l walltime=01:00:00' in header
+    assert scheduler.get_task_index_var() == 'PBS_ARRAY_INDEX'
+
+    # PBS arrays need at least two tasks
+    assert '#PBS -J 0-1' in scheduler.get_script_header('sweep',1,tmp_path)
+
+
+def test_slurm_submit_fake(tmp_path: Path) -> None:
+    scheduler = hct.create_fake_slurm(tmp_path)
+    out_file = tmp_path / 'tasks.txt'
+    script_path = tmp_path / 'job.sh'
+    script_lines = scheduler.get_script_header('test',3,tmp_path)
+    script_lines.append(f'echo ${scheduler.get_task_index_var()} >> {out_file}')
+    script_path.write_text('\n'.join(script_lines) + '\n')
+
+    job_id = scheduler.submit(script_path)
+    wait_inactive(scheduler,job_id)
+
+    assert sorted(out_file.read_text().split()) == ['0','1','2']
+
+
+def test_pbs_cancel_fake(tmp_path: Path) -> None:
+    scheduler = hct.create_fake_pbs(tmp_path)
+    script_path = tmp_path / 'job.sh'
+    script_lines = scheduler.get_script_header('test',2,tmp_path)
+    script_lines.append('sleep 60')
+    script_path.write_text('\n'.join(script_lines) + '\n')
+
+    job_id = scheduler.submit(script_path)
+    assert scheduler.is_active(job_id)
+    scheduler.cancel(job_id)
+    wait_inactive(scheduler,job_id)
+
+
+def test_submit_err(tmp_path: Path) -> None:
+    scheduler = SlurmScheduler(sbatch=str(tmp_path / 'no-sbatch'))
+    with pytest.raises(JobSchedulerError):
+        scheduler.submit(tmp_path / 'job.sh')
+
+    scheduler = SlurmScheduler(sbatch='false')
+    with pytest.raises(JobSchedulerError):
+        scheduler.submit(tmp_path / 'job.sh')
+
+
+def test_is_active_query_err(tmp_path: Path) -> None:
+    scheduler = hct.create_fake_slurm(tmp_path)
+    script_path = tmp_path / 'job.sh'
+    script_lines = scheduler.get_script_header('test',2,tmp_path)
+    script_lines.append('sleep 60')
+    script_path.write_text('\n'.join(script_lines) + '\n')
+
+    job_id = scheduler.submit(script_path)
+    hct.set_fake_query_errors(tmp_path,1)
+    # A failed query is not a finished job
+    with pytest.raises(JobSchedulerError):
+        scheduler.is_active(job_id)
+
+    assert scheduler.is_active(job_id)
+    scheduler.cancel(job_id)
+    wait_inactive(scheduler,job_id)
+
+    scheduler = SlurmScheduler(squeue='false')
+    with pytest.raises(JobSchedulerError):
+        scheduler.is_active(job_id)
@@ -6,10 +6,23 @@ Authors: Lloyd Fletcher
 ==============================================================================
 '''
 import os
+import json
+import time
+import asyncio
+from pathlib import Path
 import pytest
 from pytest import MonkeyPatch
-from mooseherder.mooseherd import MooseHerd
+from mooseherder.mooseherd import (MooseHerd,
+                                   MooseHerdError,
+                                   get_available_cpus)
+from mooseherder.inputmodifier import InputModifier
+from mooseherder.retrypolicy import RetryPolicy
 from mooseherder.directorymanager import DirectoryManager
+from mooseherder.sweepreader import SweepReader
+from mooseherder.sweepdesign import FactorialDesign
+from mooseherder.sweeptelemetry import SweepTelemetry
+from mooseherder.jobscheduler import JobSchedulerError
+from mooseherder.exodusreader import ExodusReader
 import tests.herdchecker as hct
 
 
@@ -50,6 +63,7 @@ def setup_teardown(dir_manager):
     yield
     # Teardown here
     dir_manager.clear_dirs()
+    dir_manager.clear_cache()
 
 
 @pytest.fixture()
@@ -317,3 +331,939 @@ def test_run_para_with_gmsh(keep_all: bool,
                       dir_manager,
                       gmsh_sweep)
 
+
+
+@pytest.fixture()
+def herd_fake(dir_manager) -> MooseHerd:
+    return hct.create_fake_herd(dir_manager)
+
+
+def check_fake_outputs(output_files: list[list[Path | None]],
+                       sweep: list[list[dict | None]],
+                       keep_all: bool = True) -> None:
+    assert len(output_files) == len(sweep)
+    for oo,ss in zip(output_files,sweep):
+        assert oo[0] is not None
+        assert oo[0].is_file()
+        # Outputs are overwritten by the next chain in the same worker
+        if not keep_all:
+            continue
+        mod = InputModifier(oo[0],'#','')
+        assert mod.get_vars()['e_modulus'] == ss[0]['e_modulus'] # type: ignore
+        assert mod.get_vars()['p_ratio'] == ss[0]['p_ratio'] # type: ignore
+
+
+@pytest.mark.parametrize(
+    ('keep_all',),
+    (
+        (True,),
+        (False,),
+    )
+)
+def test_run_para_fake(keep_all: bool,
+                       herd_fake: MooseHerd,
+                       moose_sweep: list[list[dict | None]]) -> None:
+    herd_fake.set_keep_flag(keep_all)
+    herd_fake.set_num_para_sims(hct.NUM_PARA)
+    output_files = herd_fake.run_para(moose_sweep)
+    check_fake_outputs(output_files,moose_sweep,keep_all)
+
+    run_dirs = set([oo[0].parent for oo in output_files]) # type: ignore
+    assert len(run_dirs) <= hct.NUM_PARA
+
+
+def test_run_sequential_fake_partial_vars(herd_fake: MooseHerd) -> None:
+    base_vars = InputModifier(hct.MOOSE_INPUT,'#','').get_vars()
+    sweep = [[{'e_modulus': 3e9}],[{'p_ratio': 0.4}]]
+    output_files = herd_fake.run_sequential(sweep)
+
+    out_vars = InputModifier(output_files[1][0],'#','').get_vars() # type: ignore
+    assert out_vars['p_ratio'] == 0.4
+    # Variables from the first chain do not leak into the second
+    assert out_vars['e_modulus'] == base_vars['e_modulus']
+    assert herd_fake._modifiers[0].get_vars() == base_vars
+
+
+def test_run_para_fake_no_keep_lengths(herd_fake: MooseHerd,
+                                       moose_sweep: list[list[dict | None]]
+                                       ) -> None:
+    herd_fake.set_keep_flag(False)
+    herd_fake.set_num_para_sims(hct.NUM_PARA)
+    long_sweep = moose_sweep + [[{'e_modulus': 3e9,'p_ratio': 0.3}]]
+    output_files = herd_fake.run_para(long_sweep)
+    check_fake_outputs(output_files,long_sweep,False)
+
+    output_files = herd_fake.run_para(moose_sweep[:2])
+    check_fake_outputs(output_files,moose_sweep[:2],False)
+    assert herd_fake.get_sim_iter() == 2
+
+
+@pytest.mark.parametrize(
+    ('n_para','pipeline','batch_size'),
+    (
+        (1,False,1),
+        (1,False,3),
+        (hct.NUM_PARA,False,1),
+        (hct.NUM_PARA,True,1),
+    )
+)
+def test_run_para_fake_design(n_para: int,
+                              pipeline: bool,
+                              batch_size: int,
+                              herd_fake: MooseHerd,
+                              dir_manager: DirectoryManager,
+                              moose_sweep: list[list[dict | None]]) -> None:
+    design = FactorialDesign([{'e_modulus': [1e9,2e9],'p_ratio': [0.3,0.35]}])
+    herd_fake.set_num_para_sims(n_para)
+    herd_fake.set_pipeline_flag(pipeline)
+    herd_fake.set_batch_size(batch_size)
+    output_files = herd_fake.run_para(design)
+
+    check_fake_outputs(output_files,moose_sweep)
+    assert SweepReader(dir_manager).read_sweep_var_file(1) == moose_sweep
+
+
+def stop_first(var_list: list[dict | None],
+               output_list: list[Path | None]) -> bool:
+    return output_list[0] is not None
+
+
+def create_sleep_herd(dir_manager: DirectoryManager,
+                      sleep_times: list[float]
+                      ) -> tuple[MooseHerd,list[list[dict | None]]]:
+    fake_modifier = InputModifier(hct.MOOSE_INPUT,'#','')
+    herd = MooseHerd([hct.FakeVarSleepRunner()],[fake_modifier],dir_manager)
+    herd.set_num_para_sims(2)
+    return (herd,[[{'y_max': tt}] for tt in sleep_times])
+
+
+def test_run_para_fake_stop(dir_manager: DirectoryManager) -> None:
+    (herd,sweep) = create_sleep_herd(dir_manager,[0.1,1.0,1.0,1.0,1.0,1.0])
+    output_files = herd.run_para(sweep,stop_func=stop_first)
+
+    assert herd.get_sweep_stopped()
+    status = [rr[0]['status'] for rr in hct.read_run_results(dir_manager)]
+    # The running chain completes, one more may start before the stop
+    assert status[:2] == ['ok','ok']
+    assert status[3:] == ['cancelled']*3
+    assert all(oo[0] is None for oo,ss in zip(output_files,status)
+               if ss == 'cancelled')
+
+    # Cancelled chains are not in the journal so resume runs them
+    (_,completed,_) = dir_manager.read_journal(1)
+    assert all(ii not in completed for ii,ss in enumerate(status)
+               if ss == 'cancelled')
+    output_files = herd.resume(1)
+    assert all(oo[0] is not None for oo in output_files)
+
+
+def test_run_para_fake_stop_kill(dir_manager: DirectoryManager) -> None:
+    (herd,sweep) = create_sleep_herd(dir_manager,[0.1,20.0,20.0,20.0])
+    herd.run_para(sweep,stop_func=stop_first,kill_running=True)
+
+    assert herd.get_sweep_time() < 10.0
+    status = [rr[0]['status'] for rr in hct.read_run_results(dir_manager)]
+    assert status == ['ok'] + ['cancelled']*3
+
+
+def test_run_iter_fake_break_kill(dir_manager: DirectoryManager) -> None:
+    fake_modifier = InputModifier(hct.MOOSE_INPUT,'#','')
+    herd = MooseHerd([hct.FakeVarProcessRunner()],[fake_modifier],dir_manager)
+    herd.set_num_para_sims(2)
+    sweep = [[{'y_max': tt}] for tt in [0.1,30.0,30.0,30.0]]
+
+    for _ in herd.run_iter(sweep):
+        # Let the next chain start its simulation before leaving the loop
+        time.sleep(1.0)
+        break
+
+    assert herd.get_sweep_time() < 30.0
+    pid_files = list([])
+    for rr in dir_manager.get_all_run_dirs():
+        pid_files += list(rr.glob('*.pid'))
+    assert len(pid_files) > 1
+    for pp in pid_files:
+        with pytest.raises(ProcessLookupError):
+            os.kill(int(pp.read_text(encoding='utf-8')),0)
+
+
+def test_run_para_fake_stop_pipeline(dir_manager: DirectoryManager) -> None:
+    (herd,sweep) = create_sleep_herd(dir_manager,[0.1,1.0,1.0,1.0,1.0,1.0])
+    herd.set_pipeline_flag(True)
+    herd.run_para(sweep,stop_func=stop_first)
+
+    assert herd.get_sweep_stopped()
+    status = [rr[0]['status'] for rr in hct.read_run_results(dir_manager)]
+    assert status[0] == 'ok'
+    assert status[3:] == ['cancelled']*3
+
+
+def check_telemetry_status(status: dict, num_chains: int) -> None:
+    assert status['state'] == 'done'
+    assert status['num_completed'] == num_chains
+    assert status['num_running'] == 0
+    assert status['queue_depth'] == 0
+    assert status['status_counts'] == {'ok': num_chains}
+    assert sorted(cc['sweep_ind'] for cc in status['chains']) == \
+        list(range(num_chains))
+    assert all(cc['end_time'] >= cc['start_time'] for cc in status['chains'])
+
+
+@pytest.mark.parametrize(
+    ('pipeline',),
+    (
+        (False,),
+        (True,),
+    )
+)
+def test_run_para_fake_telemetry(pipeline: bool,
+                                 herd_fake: MooseHerd,
+                                 dir_manager: DirectoryManager,
+                                 moose_sweep: list[list[dict | None]]) -> None:
+    statuses = list([])
+    telemetry = SweepTelemetry(callback=statuses.append,update_time=0.0)
+    herd_fake.set_telemetry(telemetry)
+    herd_fake.set_num_para_sims(hct.NUM_PARA)
+    herd_fake.set_pipeline_flag(pipeline)
+    herd_fake.run_para(moose_sweep)
+
+    check_telemetry_status(statuses[-1],len(moose_sweep))
+    assert statuses[0]['state'] == 'running'
+    assert statuses[0]['num_workers'] == herd_fake._get_num_workers()
+    if not pipeline:
+        assert all(cc['worker'] is not None for cc in statuses[-1]['chains'])
+    assert herd_fake.get_iter_time() >= 0.0
+    assert herd_fake.get_iter_status() == ['ok']
+
+    status_file = dir_manager.get_status_file()
+    with open(status_file,'r',encoding='utf-8') as sf:
+        assert json.load(sf)['state'] == 'done'
+    status_file.unlink()
+
+
+def test_run_sequential_fake_telemetry(herd_fake: MooseHerd,
+                                       moose_sweep: list[list[dict | None]]
+                                       ) -> None:
+    statuses = list([])
+    herd_fake.set_telemetry(SweepTelemetry(callback=statuses.append,
+                                           write_status=False,
+                                           update_time=0.0))
+    herd_fake.run_sequential(moose_sweep)
+    check_telemetry_status(statuses[-1],len(moose_sweep))
+    # Chains are completed one at a time
+    assert [ss['num_completed'] for ss in statuses[1:-1]] == \
+        list(range(1,len(moose_sweep)+1))
+
+
+def test_run_async_fake_telemetry(herd_fake: MooseHerd,
+                                  moose_sweep: list[list[dict | None]]) -> None:
+    telemetry = SweepTelemetry(write_status=False)
+    herd_fake.set_telemetry(telemetry)
+    asyncio.run(herd_fake.run_async(moose_sweep))
+    check_telemetry_status(telemetry.get_status(),len(moose_sweep))
+
+
+def read_fake_exodus(output_list: list[Path | None]) -> int:
+    reader = ExodusReader(hct.OUTPUT_PATH / 'moose-mech-outtest_out.e')
+    return reader.get_time().shape[0]
+
+
+def check_fake_timings(dir_manager: DirectoryManager, num_chains: int,
+                       read: bool, sweep_iter: int = 1) -> None:
+    timings = SweepReader(dir_manager).read_timings(sweep_iter)
+    for ii in range(num_chains):
+        chain_timings = {(tt['stage'],tt['section']): tt['time']
+                         for tt in timings if tt['sweep_ind'] == ii}
+        assert ('render','total') in chain_timings
+        assert ('run','total') in chain_timings
+        if read:
+            assert chain_timings[('read','total')] >= \
+                chain_timings[('read','open')]
+            assert ('read','get_time') in chain_timings
+        assert all(tt >= 0.0 for tt in chain_timings.values())
+
+
+@pytest.mark.parametrize(
+    ('pipeline','batch_size'),
+    (
+        (False,1),
+        (False,2),
+        (True,1),
+    )
+)
+def test_run_iter_fake_profile(pipeline: bool,
+                               batch_size: int,
+                               herd_fake: MooseHerd,
+                               dir_manager: DirectoryManager,
+                               moose_sweep: list[list[dict | None]]) -> None:
+    herd_fake.set_num_para_sims(hct.NUM_PARA)
+    herd_fake.set_pipeline_flag(pipeline)
+    herd_fake.set_batch_size(batch_size)
+    herd_fake.set_profile_flag(True)
+    for (_,_,_,_,read_data) in herd_fake.run_iter(moose_sweep,
+                                                  read_func=read_fake_exodus):
+        assert read_data == 4
+
+    check_fake_timings(dir_manager,len(moose_sweep),True)
+
+
+def test_run_sequential_fake_profile(herd_fake: MooseHerd,
+                                     dir_manager: DirectoryManager,
+                                     moose_sweep: list[list[dict | None]]
+                                     ) -> None:
+    herd_fake.run_sequential(moose_sweep)
+    assert SweepReader(dir_manager).read_timings(1) == list([])
+
+    herd_fake.set_profile_flag(True)
+    herd_fake.run_sequential(moose_sweep)
+    check_fake_timings(dir_manager,len(moose_sweep),False,2)
+
+
+def test_run_async_fake_profile(herd_fake: MooseHerd,
+                                dir_manager: DirectoryManager,
+                                moose_sweep: list[list[dict | None]]) -> None:
+    herd_fake.set_profile_flag(True)
+    asyncio.run(herd_fake.run_async(moose_sweep))
+    check_fake_timings(dir_manager,len(moose_sweep),False)
+
+
+def test_run_para_fake_cost_hints(herd_fake: MooseHerd,
+                                  moose_sweep: list[list[dict | None]]) -> None:
+    herd_fake.set_num_para_sims(2)
+    cost_hints = [float(ii) for ii,_ in enumerate(moose_sweep)]
+    output_files = herd_fake.run_para(moose_sweep,cost_hints)
+    check_fake_outputs(output_files,moose_sweep)
+
+
+def test_run_para_cost_hints_err(herd_fake: MooseHerd,
+                                 moose_sweep: list[list[dict | None]]) -> None:
+    with pytest.raises(MooseHerdError):
+        herd_fake.run_para(moose_sweep,[1.0])
+
+
+def test_set_core_budget(herd_fake: MooseHerd) -> None:
+    herd_fake.set_core_budget([0,1,2,3])
+    assert herd_fake.get_core_budget() == [0,1,2,3]
+
+    herd_fake.set_core_budget(1)
+    assert herd_fake.get_core_budget() == get_available_cpus()[:1]
+
+    herd_fake.set_core_budget()
+    assert herd_fake.get_core_budget() is None
+
+
+def test_set_core_budget_err(herd_fake: MooseHerd) -> None:
+    with pytest.raises(MooseHerdError):
+        herd_fake.set_core_budget([])
+
+
+@pytest.mark.parametrize(
+    ('n_para','n_cores','expected'),
+    (
+        (4,2,4),
+        (8,2,4),
+        (2,3,2),
+        (4,8,1),
+    )
+)
+def test_assign_cpu_sets(n_para: int,
+                         n_cores: int,
+                         expected: int,
+                         dir_manager: DirectoryManager) -> None:
+    herd = hct.create_fake_herd(dir_manager,n_cores)
+    herd._n_para_sims = n_para
+    herd.set_core_budget(list(range(8)))
+
+    n_workers = herd._assign_cpu_sets()
+    assert n_workers == expected
+    assert len(herd._cpu_sets) == expected # type: ignore
+
+    all_cpus = [cc for cs in herd._cpu_sets for cc in cs] # type: ignore
+    assert len(all_cpus) == len(set(all_cpus))
+    assert len(all_cpus) <= 8
+
+
+def test_assign_cpu_sets_err(dir_manager: DirectoryManager) -> None:
+    herd = hct.create_fake_herd(dir_manager,16)
+    herd.set_core_budget(list(range(8)))
+    with pytest.raises(MooseHerdError):
+        herd._assign_cpu_sets()
+
+
+def test_assign_cpu_sets_no_budget(herd_fake: MooseHerd) -> None:
+    herd_fake.set_num_para_sims(hct.NUM_PARA)
+    assert herd_fake._assign_cpu_sets() == herd_fake._n_para_sims
+    assert herd_fake._cpu_sets is None
+
+
+def test_run_para_fake_core_budget(herd_fake: MooseHerd,
+                                   moose_sweep: list[list[dict | None]]) -> None:
+    herd_fake.set_num_para_sims(hct.NUM_PARA)
+    herd_fake.set_core_budget(get_available_cpus()[:2])
+    output_files = herd_fake.run_para(moose_sweep)
+    check_fake_outputs(output_files,moose_sweep)
+
+
+def test_run_sequential_fake_cache(herd_fake: MooseHerd,
+                                   dir_manager: DirectoryManager,
+                                   moose_sweep_seq: list[list[dict | None]]
+                                   ) -> None:
+    herd_fake.set_cache_flag(True)
+    first_outputs = herd_fake.run_sequential(moose_sweep_seq)
+    assert herd_fake._runners[0].run_count == len(moose_sweep_seq) # type: ignore
+
+    second_outputs = herd_fake.run_sequential(moose_sweep_seq + [[{'e_modulus': 3e9}]])
+    assert herd_fake._runners[0].run_count == len(moose_sweep_seq)+1 # type: ignore
+
+    cache_dir = dir_manager.get_cache_dir()
+    for oo in second_outputs[:len(moose_sweep_seq)]:
+        assert oo[0] is not None
+        assert oo[0].parent.parent == cache_dir
+    check_fake_outputs(second_outputs[:len(moose_sweep_seq)],moose_sweep_seq)
+    assert first_outputs[0][0] != second_outputs[0][0]
+
+    dir_manager.clear_cache()
+
+
+def read_fake_output(output_list: list[Path | None]) -> dict:
+    return InputModifier(output_list[0],'#','').get_vars() # type: ignore
+
+
+def test_run_iter_fake(herd_fake: MooseHerd,
+                       dir_manager: DirectoryManager,
+                       moose_sweep: list[list[dict | None]]) -> None:
+    herd_fake.set_num_para_sims(hct.NUM_PARA)
+
+    sim_iters = list([])
+    for (sim_iter,var_list,output_list,run_time,read_data) in \
+        herd_fake.run_iter(moose_sweep,read_func=read_fake_output):
+
+        sim_iters.append(sim_iter)
+        assert var_list == moose_sweep[sim_iter]
+        assert output_list[0].is_file() # type: ignore
+        assert run_time >= 0.0
+        assert read_data['e_modulus'] == var_list[0]['e_modulus'] # type: ignore
+        # Output key is only written once the sweep is complete
+        assert herd_fake.get_sweep_iter() == 0
+
+    assert sorted(sim_iters) == list(range(len(moose_sweep)))
+    assert herd_fake.get_sweep_iter() == 1
+    assert dir_manager.get_output_key_file(1).is_file()
+
+
+def test_run_iter_fake_early_exit(herd_fake: MooseHerd,
+                                  dir_manager: DirectoryManager,
+                                  moose_sweep: list[list[dict | None]]) -> None:
+    statuses = list([])
+    herd_fake.set_telemetry(SweepTelemetry(callback=statuses.append,
+                                           write_status=False,
+                                           update_time=0.0))
+    herd_fake.set_num_para_sims(1)
+    for (sim_iter,_,_,_,_) in herd_fake.run_iter(moose_sweep):
+        break
+
+    assert herd_fake.get_sweep_stopped()
+    assert herd_fake.get_sweep_iter() == 1
+    assert herd_fake.get_sim_iter() == len(moose_sweep)
+    assert dir_manager.get_output_key_file(1).is_file()
+    assert statuses[-1]['state'] == 'stopped'
+
+    status = [rr[0]['status'] for rr in hct.read_run_results(dir_manager)]
+    assert status[sim_iter] == 'ok'
+    assert status.count('cancelled') >= 1
+
+    output_files = herd_fake.resume(1)
+    check_fake_outputs(output_files,moose_sweep)
+
+
+def test_run_para_fake_journal(herd_fake: MooseHerd,
+                               dir_manager: DirectoryManager,
+                               moose_sweep: list[list[dict | None]]) -> None:
+    herd_fake.set_num_para_sims(hct.NUM_PARA)
+    output_files = herd_fake.run_para(moose_sweep)
+
+    (sim_iter_start,completed,status) = dir_manager.read_journal(1)
+    assert sim_iter_start == 0
+    assert completed == dict(enumerate(output_files))
+    assert all([rr.status for rr in ss] == ['ok'] for ss in status.values()) # type: ignore
+
+
+def test_resume_fake(herd_fake: MooseHerd,
+                     dir_manager: DirectoryManager,
+                     moose_sweep: list[list[dict | None]]) -> None:
+    herd_fake.set_num_para_sims(hct.NUM_PARA)
+    herd_fake.set_keep_flag(True)
+    dir_manager.create_dirs()
+    first_outputs = herd_fake.run_para(moose_sweep)
+
+    # Simulate a crash: drop the output key, one journal entry and one output
+    dir_manager.get_output_key_file(1).unlink()
+    journal_file = dir_manager.get_journal_file(1)
+    with open(journal_file,'r',encoding='utf-8') as jf:
+        lines = jf.readlines()
+    with open(journal_file,'w',encoding='utf-8') as jf:
+        jf.writelines(lines[:-1])
+    first_outputs[0][0].unlink() # type: ignore
+
+    kept = [ii for ii in dir_manager.read_journal(1)[1] if ii != 0]
+    mtimes = {ii: first_outputs[ii][0].stat().st_mtime_ns # type: ignore
+              for ii in kept}
+
+    resumed = MooseHerd(herd_fake._runners,herd_fake._modifiers,dir_manager)
+    resumed.set_num_para_sims(hct.NUM_PARA)
+    resumed.set_keep_flag(True)
+    output_files = resumed.resume(1)
+
+    check_fake_outputs(output_files,moose_sweep)
+    assert output_files == first_outputs
+    assert dir_manager.get_output_key_file(1).is_file()
+    assert resumed.get_sweep_iter() == 1
+    assert resumed.get_sim_iter() == len(moose_sweep)
+    assert len(dir_manager.read_journal(1)[1]) == len(moose_sweep)
+
+    # Completed chains are not run again so their outputs are untouched
+    for ii in kept:
+        assert output_files[ii][0].stat().st_mtime_ns == mtimes[ii] # type: ignore
+
+
+def test_resume_fake_timeout(dir_manager: DirectoryManager,
+                             moose_sweep_seq: list[list[dict | None]]
+                             ) -> None:
+    herd = hct.create_fake_herd(dir_manager,sleep_time=30.0,timeout=0.5)
+    herd.set_num_para_sims(1)
+    assert herd.run_para(moose_sweep_seq) == [[None]]*len(moose_sweep_seq)
+
+    herd._runners[0]._sleep_time = None # type: ignore
+    output_files = herd.resume(1)
+    check_fake_outputs(output_files,moose_sweep_seq)
+    assert all(rr[0]['status'] == 'ok'
+               for rr in hct.read_run_results(dir_manager))
+
+
+def test_resume_fake_failed(dir_manager: DirectoryManager,
+                            moose_sweep_seq: list[list[dict | None]]) -> None:
+    fake_modifier = InputModifier(hct.MOOSE_INPUT,'#','')
+    herd = MooseHerd([hct.FakeRunner(write_output=False)],[fake_modifier],
+                     dir_manager)
+    herd.set_num_para_sims(1)
+    first_outputs = herd.run_para(moose_sweep_seq)
+    assert all(rr[0]['status'] == 'failed'
+               for rr in hct.read_run_results(dir_manager))
+
+    # A failed run can leave a partial output behind
+    for oo in first_outputs:
+        oo[0].write_text('partial',encoding='utf-8') # type: ignore
+
+    herd._runners[0]._write_output = True # type: ignore
+    output_files = herd.resume(1)
+    check_fake_outputs(output_files,moose_sweep_seq)
+    assert all(rr[0]['status'] == 'ok'
+               for rr in hct.read_run_results(dir_manager))
+
+
+def test_resume_err(herd_fake: MooseHerd) -> None:
+    with pytest.raises(FileNotFoundError):
+        herd_fake.resume(1)
+
+
+def test_run_sequential_fake_timeout(dir_manager: DirectoryManager,
+                                     moose_sweep_seq: list[list[dict | None]]
+                                     ) -> None:
+    herd = hct.create_fake_herd(dir_manager,sleep_time=30.0,timeout=0.5)
+    output_files = herd.run_sequential(moose_sweep_seq)
+
+    assert output_files == [[None]]*len(moose_sweep_seq)
+    assert herd.get_iter_status() == ['timed_out']
+    with open(dir_manager.get_run_results_file(1),'r',encoding='utf-8') as rrf:
+        run_results = json.load(rrf)
+    assert [rr[0]['status'] for rr in run_results] == \
+        ['timed_out']*len(moose_sweep_seq)
+
+
+def test_run_para_fake_run_results(herd_fake: MooseHerd,
+                                   dir_manager: DirectoryManager,
+                                   moose_sweep: list[list[dict | None]]) -> None:
+    herd_fake.set_num_para_sims(hct.NUM_PARA)
+    output_files = herd_fake.run_para(moose_sweep)
+    with open(dir_manager.get_run_results_file(1),'r',encoding='utf-8') as rrf:
+        run_results = json.load(rrf)
+
+    assert len(run_results) == len(moose_sweep)
+    for rr,oo in zip(run_results,output_files):
+        assert rr[0]['status'] == 'ok'
+        assert rr[0]['output_path'] == str(oo[0])
+        assert rr[0]['output_exists']
+        assert rr[0]['output_size'] == oo[0].stat().st_size # type: ignore
+        assert rr[0]['wall_time'] >= 0.0
+
+
+def test_run_sequential_fake_failed(dir_manager: DirectoryManager,
+                                    moose_sweep_seq: list[list[dict | None]]
+                                    ) -> None:
+    fake_modifier = InputModifier(hct.MOOSE_INPUT,'#','')
+    herd = MooseHerd([hct.FakeRunner(write_output=False),hct.FakeRunner()],
+                     [fake_modifier,fake_modifier],dir_manager)
+    herd.run_sequential([vv+[None] for vv in moose_sweep_seq])
+
+    assert herd.get_iter_status() == ['failed','skipped']
+    assert herd.get_iter_results()[0].output_exists is False
+    assert herd._runners[1].run_count == 0 # type: ignore
+
+
+def degrade_fake_runner(runner: hct.FakeRunner, retry: int) -> None:
+    runner._n_cores = 100 + retry
+
+
+def test_set_retry_policies_err(herd_fake: MooseHerd) -> None:
+    with pytest.raises(MooseHerdError):
+        herd_fake.set_retry_policies([RetryPolicy(),RetryPolicy()])
+
+
+def test_run_sequential_fake_retry(dir_manager: DirectoryManager,
+                                   moose_sweep_seq: list[list[dict | None]]
+                                   ) -> None:
+    runner = hct.FakeRunner(fail_count=1)
+    herd = MooseHerd([runner],[InputModifier(hct.MOOSE_INPUT,'#','')],
+                     dir_manager)
+    herd.set_retry_policies([RetryPolicy(max_retries=2,
+                                         degrade_vars={'n_elem_x': 5},
+                                         degrade_runner=degrade_fake_runner)])
+    output_files = herd.run_sequential(moose_sweep_seq)
+
+    # First chain fails then passes with degraded settings
+    first_results = hct.read_run_results(dir_manager)[0][0]
+    assert first_results['status'] == 'ok'
+    assert first_results['attempts'] == 2
+    assert InputModifier(output_files[0][0],'#','').get_vars()['n_elem_x'] == 5 # type: ignore
+    assert herd.get_iter_results()[0].attempts == 1
+    assert runner.get_num_cores() == 1
+
+    check_fake_outputs(output_files[1:],moose_sweep_seq[1:])
+
+
+def test_run_sequential_fake_retry_exhausted(dir_manager: DirectoryManager,
+                                             moose_sweep_seq: list[list[dict | None]]
+                                             ) -> None:
+    herd = hct.create_fake_herd(dir_manager)
+    herd._runners[0]._write_output = False # type: ignore
+    herd.set_retry_policies([RetryPolicy(max_retries=1)])
+    herd.run_sequential(moose_sweep_seq)
+
+    assert herd.get_iter_status() == ['failed']
+    assert herd.get_iter_results()[0].attempts == 2
+
+
+def never_ok(_: Path) -> bool:
+    return False
+
+
+def test_run_sequential_fake_output_check(dir_manager: DirectoryManager,
+                                          moose_sweep_seq: list[list[dict | None]]
+                                          ) -> None:
+    herd = hct.create_fake_herd(dir_manager)
+    herd.set_retry_policies([RetryPolicy(max_retries=1,output_check=never_ok)])
+    herd.run_sequential(moose_sweep_seq)
+
+    assert herd.get_iter_status() == ['failed']
+    assert herd._runners[0].run_count == 2*len(moose_sweep_seq) # type: ignore
+
+
+def test_run_para_fake_retry(dir_manager: DirectoryManager,
+                             moose_sweep: list[list[dict | None]]) -> None:
+    herd = hct.create_fake_herd(dir_manager)
+    herd._runners[0]._fail_count = 1 # type: ignore
+    herd.set_num_para_sims(hct.NUM_PARA)
+    herd.set_retry_policies([RetryPolicy(max_retries=1)])
+    output_files = herd.run_para(moose_sweep)
+
+    check_fake_outputs(output_files,moose_sweep)
+    assert all(rr[0]['status'] == 'ok'
+               for rr in hct.read_run_results(dir_manager))
+
+
+@pytest.mark.parametrize(
+    ('keep_all',),
+    (
+        (True,),
+        (False,),
+    )
+)
+def test_run_para_fake_pipeline(keep_all: bool,
+                                dir_manager: DirectoryManager,
+                                moose_sweep: list[list[dict | None]]) -> None:
+    fake_modifier = InputModifier(hct.MOOSE_INPUT,'#','')
+    herd = MooseHerd([hct.FakeRunner(),hct.FakeRunner()],
+                     [fake_modifier,fake_modifier],dir_manager)
+    herd.set_keep_flag(keep_all)
+    herd.set_num_para_sims(hct.NUM_PARA)
+    herd.set_pipeline_flag(True)
+    pipe_sweep = [vv+vv for vv in moose_sweep]
+
+    sim_iters = list([])
+    for (sim_iter,var_list,output_list,_,read_data) in \
+        herd.run_iter(pipe_sweep,read_func=read_fake_output):
+        sim_iters.append(sim_iter)
+        assert var_list == pipe_sweep[sim_iter]
+        assert all(oo.is_file() for oo in output_list) # type: ignore
+        assert read_data['e_modulus'] == var_list[0]['e_modulus'] # type: ignore
+
+    assert sorted(sim_iters) == list(range(len(pipe_sweep)))
+    run_results = hct.read_run_results(dir_manager)
+    assert all(rr[0]['status'] == 'ok' and rr[1]['status'] == 'ok'
+               for rr in run_results)
+
+
+def test_run_para_fake_pipeline_failed(dir_manager: DirectoryManager,
+                                       moose_sweep: list[list[dict | None]]
+                                       ) -> None:
+    fake_modifier = InputModifier(hct.MOOSE_INPUT,'#','')
+    herd = MooseHerd([hct.FakeRunner(write_output=False),hct.FakeRunner()],
+                     [fake_modifier,fake_modifier],dir_manager)
+    herd.set_num_para_sims(hct.NUM_PARA)
+    herd.set_pipeline_flag(True)
+    output_files = herd.run_para([vv+[None] for vv in moose_sweep])
+
+    assert all(oo[1] is None for oo in output_files)
+    run_results = hct.read_run_results(dir_manager)
+    assert all(rr[0]['status'] == 'failed' and rr[1]['status'] == 'skipped'
+               for rr in run_results)
+
+
+def test_run_para_fake_pipeline_cache(herd_fake: MooseHerd,
+                                      moose_sweep: list[list[dict | None]]
+                                      ) -> None:
+    herd_fake.set_num_para_sims(hct.NUM_PARA)
+    herd_fake.set_pipeline_flag(True)
+    herd_fake.set_cache_flag(True)
+    herd_fake.run_para(moose_sweep)
+    output_files = herd_fake.run_para(moose_sweep)
+    check_fake_outputs(output_files,moose_sweep)
+    assert herd_fake.get_sweep_iter() == 2
+
+    cache_dir = herd_fake._dir_manager.get_cache_dir()
+    assert all(oo[0].parent.parent == cache_dir # type: ignore
+               for oo in output_files)
+
+
+def test_set_batch_size(herd_fake: MooseHerd) -> None:
+    assert herd_fake.get_batch_size() == 1
+    herd_fake.set_batch_size(3)
+    assert herd_fake.get_batch_size() == 3
+
+    with pytest.raises(MooseHerdError):
+        herd_fake.set_batch_size(0)
+
+
+def test_run_sequential_fake_batch(dir_manager: DirectoryManager,
+                                   moose_sweep: list[list[dict | None]]
+                                   ) -> None:
+    fake_modifier = InputModifier(hct.MOOSE_INPUT,'#','')
+    batch_runner = hct.FakeBatchRunner()
+    herd = MooseHerd([hct.FakeRunner(),batch_runner],
+                     [fake_modifier,fake_modifier],dir_manager)
+    herd.set_batch_size(2)
+    batch_sweep = [vv+vv for vv in moose_sweep]
+    output_files = herd.run_sequential(batch_sweep)
+
+    check_fake_outputs(output_files,moose_sweep)
+    assert batch_runner.batch_sizes == [2,2]
+    assert batch_runner.run_count == 0
+    assert all(oo[1].is_file() for oo in output_files) # type: ignore
+    assert output_files[0][0].parent.name == 'batch-1' # type: ignore
+    assert output_files[1][0].parent.name == 'batch-2' # type: ignore
+    assert all(rr[1]['status'] == 'ok'
+               for rr in hct.read_run_results(dir_manager))
+
+
+def test_run_sequential_fake_batch_failed(dir_manager: DirectoryManager,
+                                          moose_sweep: list[list[dict | None]]
+                                          ) -> None:
+    fake_modifier = InputModifier(hct.MOOSE_INPUT,'#','')
+    batch_runner = hct.FakeBatchRunner(fail_batch=True)
+    herd = MooseHerd([batch_runner],[fake_modifier],dir_manager)
+    herd.set_batch_size(len(moose_sweep))
+    output_files = herd.run_sequential(moose_sweep)
+
+    # Failed batches are rerun one input file at a time
+    check_fake_outputs(output_files,moose_sweep)
+    assert batch_runner.batch_sizes == [len(moose_sweep)]
+    assert batch_runner.run_count == len(moose_sweep)
+
+
+def test_run_sequential_fake_moose_batch(dir_manager: DirectoryManager,
+                                         moose_sweep: list[list[dict | None]],
+                                         tmp_path: Path) -> None:
+    fake_modifier = InputModifier(hct.MOOSE_INPUT,'#','')
+    herd = MooseHerd([hct.create_fake_moose(tmp_path)],[fake_modifier],
+                     dir_manager)
+    herd.set_batch_size(len(moose_sweep))
+    output_files = herd.run_sequential(moose_sweep)
+
+    # Each chain is written to its own batch directory and run in one batch
+    check_fake_outputs(output_files,moose_sweep)
+    assert len(set(oo[0].parent for oo in output_files)) == len(moose_sweep) # type: ignore
+    batch_inputs = list(dir_manager.get_run_dir(0).glob('batch-*.i'))
+    assert len(batch_inputs) == 1
+    runs = (tmp_path / 'fake-app' / 'runs.txt').read_text().splitlines()
+    assert runs == [batch_inputs[0].name]
+    assert all(rr[0]['status'] == 'ok' and rr[0]['attempts'] == 1
+               for rr in hct.read_run_results(dir_manager))
+
+
+def test_run_sequential_fake_batch_missing_input(
+        dir_manager: DirectoryManager) -> None:
+    batch_runner = hct.FakeBatchRunner()
+    with pytest.raises(FileNotFoundError):
+        batch_runner.run_batch([dir_manager.get_run_dir(0) / 'no-exist.i'])
+    with pytest.raises(ValueError):
+        batch_runner.run_batch([])
+
+
+def test_run_para_fake_batch(dir_manager: DirectoryManager,
+                             moose_sweep: list[list[dict | None]]) -> None:
+    fake_modifier = InputModifier(hct.MOOSE_INPUT,'#','')
+    herd = MooseHerd([hct.FakeBatchRunner()],[fake_modifier],dir_manager)
+    herd.set_num_para_sims(hct.NUM_PARA)
+    herd.set_batch_size(2)
+    herd.set_cache_flag(True)
+
+    sim_iters = [ss for (ss,_,_,_,_) in herd.run_iter(moose_sweep)]
+    assert sorted(sim_iters) == list(range(len(moose_sweep)))
+
+    output_files = herd.run_para(moose_sweep)
+    check_fake_outputs(output_files,moose_sweep)
+    cache_dir = dir_manager.get_cache_dir()
+    assert all(oo[0].parent.parent == cache_dir # type: ignore
+               for oo in output_files)
+
+
+def test_run_async_fake(dir_manager: DirectoryManager,
+                        moose_sweep: list[list[dict | None]]) -> None:
+    fake_modifier = InputModifier(hct.MOOSE_INPUT,'#','')
+    herd = MooseHerd([hct.FakeProcessRunner(sleep_time=0.5)],[fake_modifier],
+                     dir_manager)
+    output_files = asyncio.run(herd.run_async(moose_sweep))
+
+    check_fake_outputs(output_files,moose_sweep)
+    assert herd.get_sweep_iter() == 1
+    assert herd.get_sim_iter() == len(moose_sweep)
+    # All chains run at once so the sweep takes about one chain's sleep time
+    assert herd.get_sweep_time() < 0.5*len(moose_sweep)
+    assert all(rr[0]['status'] == 'ok'
+               for rr in hct.read_run_results(dir_manager))
+
+
+def test_run_async_fake_thread(herd_fake: MooseHerd,
+                               moose_sweep: list[list[dict | None]]) -> None:
+    herd_fake.set_cache_flag(True)
+    output_files = asyncio.run(herd_fake.run_async(moose_sweep,2))
+    check_fake_outputs(output_files,moose_sweep)
+
+    output_files = asyncio.run(herd_fake.run_async(moose_sweep))
+    cache_dir = herd_fake._dir_manager.get_cache_dir()
+    assert all(oo[0].parent.parent == cache_dir # type: ignore
+               for oo in output_files)
+
+
+def test_run_async_err(herd_fake: MooseHerd,
+                       moose_sweep: list[list[dict | None]]) -> None:
+    with pytest.raises(MooseHerdError):
+        asyncio.run(herd_fake.run_async(moose_sweep,0))
+
+
+def test_run_async_fake_timeout(dir_manager: DirectoryManager,
+                                moose_sweep: list[list[dict | None]]) -> None:
+    fake_modifier = InputModifier(hct.MOOSE_INPUT,'#','')
+    herd = MooseHerd([hct.FakeProcessRunner(sleep_time=10.0,timeout=0.5)],
+                     [fake_modifier],dir_manager)
+    output_files = asyncio.run(herd.run_async(moose_sweep))
+
+    assert all(oo[0] is None for oo in output_files)
+    assert herd.get_sweep_time() < 10.0
+    assert all(rr[0]['status'] == 'timed_out'
+               for rr in hct.read_run_results(dir_manager))
+
+
+def test_run_async_fake_cancel(dir_manager: DirectoryManager,
+                               moose_sweep: list[list[dict | None]]) -> None:
+    fake_modifier = InputModifier(hct.MOOSE_INPUT,'#','')
+    herd = MooseHerd([hct.FakeProcessRunner(sleep_time=30.0)],[fake_modifier],
+                     dir_manager)
+
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(asyncio.wait_for(herd.run_async(moose_sweep),2.0))
+
+    pid_files = list([])
+    for rr in dir_manager.get_all_run_dirs():
+        pid_files += list(rr.glob('*.pid'))
+    assert len(pid_files) == len(moose_sweep)
+    for pp in pid_files:
+        with pytest.raises(ProcessLookupError):
+            os.kill(int(pp.read_text(encoding='utf-8')),0)
+
+
+def test_run_cluster_fake_slurm(herd_fake: MooseHerd,
+                                dir_manager: DirectoryManager,
+                                moose_sweep: list[list[dict | None]],
+                                tmp_path: Path) -> None:
+    scheduler = hct.create_fake_slurm(tmp_path)
+    output_files = herd_fake.run_cluster(moose_sweep,scheduler,poll_time=0.1)
+
+    check_fake_outputs(output_files,moose_sweep)
+    assert herd_fake.get_sweep_iter() == 1
+    assert herd_fake.get_sim_iter() == len(moose_sweep)
+    assert output_files[0][0].parent.name == 'task-1' # type: ignore
+    assert SweepReader(dir_manager).read_output_key(1) == output_files
+    assert all(rr[0]['status'] == 'ok'
+               for rr in hct.read_run_results(dir_manager))
+    (_,completed,_) = dir_manager.read_journal(1)
+    assert sorted(completed.keys()) == list(range(len(moose_sweep)))
+
+
+def test_run_cluster_fake_pbs(herd_fake: MooseHerd,
+                              moose_sweep: list[list[dict | None]],
+                              tmp_path: Path) -> None:
+    scheduler = hct.create_fake_pbs(tmp_path)
+    output_files = herd_fake.run_cluster(moose_sweep[:1],scheduler,
+                                         poll_time=0.1)
+    check_fake_outputs(output_files,moose_sweep[:1])
+
+
+def test_run_cluster_fake_query_err(herd_fake: MooseHerd,
+                                    dir_manager: DirectoryManager,
+                                    moose_sweep: list[list[dict | None]],
+                                    tmp_path: Path) -> None:
+    scheduler = hct.create_fake_slurm(tmp_path)
+    hct.set_fake_query_errors(tmp_path,3)
+    output_files = herd_fake.run_cluster(moose_sweep,scheduler,poll_time=0.1,
+                                         query_retries=3)
+
+    check_fake_outputs(output_files,moose_sweep)
+    assert all(rr[0]['status'] == 'ok'
+               for rr in hct.read_run_results(dir_manager))
+
+
+def test_run_cluster_fake_query_retries(herd_fake: MooseHerd,
+                                        moose_sweep: list[list[dict | None]],
+                                        tmp_path: Path) -> None:
+    scheduler = hct.create_fake_slurm(tmp_path)
+    hct.set_fake_query_errors(tmp_path,3)
+    with pytest.raises(JobSchedulerError):
+        herd_fake.run_cluster(moose_sweep,scheduler,poll_time=0.1,
+                              query_retries=2)
+
+    # The job array is cancelled when the queries keep failing
+    assert list(tmp_path.glob('done-*'))
+
+
+def test_run_cluster_fake_failed(herd_fake: MooseHerd,
+                                 dir_manager: DirectoryManager,
+                                 moose_sweep: list[list[dict | None]],
+                                 tmp_path: Path) -> None:
+    scheduler = hct.create_fake_slurm(tmp_path)
+    output_files = herd_fake.run_cluster(moose_sweep,scheduler,poll_time=0.1,
+                                         python_cmd='false')
+
+    assert all(oo[0] is None for oo in output_files)
+    assert all(rr[0]['status'] == 'failed'
+               for rr in hct.read_run_results(dir_manager))
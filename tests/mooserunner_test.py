@@ -9,10 +9,33 @@ Authors: Lloyd Fletcher
 import os
 from pathlib import Path
 import pytest
-from mooseherder.mooserunner import MooseRunner
+from mooseherder.mooserunner import (MooseRunner,
+                                     write_batch_input,
+                                     get_batch_dir,
+                                     read_perf_graph)
+from mooseherder.simrunner import RunResult
 import tests.herdchecker as hc
 
 
+PERF_GRAPH = '''Time Step 1, time = 1, dt = 1
+ Solve Converged!
+
+Performance Graph:
+--------------------------------------------------------------------------------------------------------------------
+|                  Section                  | Calls |   Self(s)  |   Avg(s)   |    %   | Children(s) |  Total(s)  |
+--------------------------------------------------------------------------------------------------------------------
+| MooseApp (main)                           |     1 |      0.010 |      0.010 |   1.00 |       0.990 |      1.000 |
+|   MooseApp::setup                         |     1 |      0.050 |      0.050 |   5.00 |       0.150 |      0.200 |
+|     FileMesh::init                        |     1 |      0.100 |      0.100 |  10.00 |       0.000 |      0.100 |
+|     Exodus::outputSetup                   |     1 |      0.050 |      0.050 |   5.00 |       0.000 |      0.050 |
+|   MooseApp::execute                       |     1 |      0.000 |      0.000 |   0.00 |       0.790 |      0.790 |
+|     Transient::PicardSolve::solve         |     4 |      0.600 |      0.150 |  60.00 |       0.000 |      0.600 |
+|     FEProblem::outputStep                 |     5 |      0.010 |      0.002 |   1.00 |       0.180 |      0.190 |
+|       Exodus::outputStep                  |     5 |      0.180 |      0.036 |  18.00 |       0.000 |      0.180 |
+--------------------------------------------------------------------------------------------------------------------
+'''
+
+
 @pytest.fixture()
 def runner() -> MooseRunner:
     moose_config = hc.create_moose_config()
@@ -61,6 +84,16 @@ def test_set_env_vars(runner: MooseRunner) -> None:
     assert os.environ['FC'] == 'mpif90'
     assert os.environ['MOOSE_DIR'] == str(runner._config['main_path'])
 
+def test_set_timeout(runner: MooseRunner) -> None:
+    assert runner.get_timeout() is None
+    runner.set_timeout(10.0)
+    assert runner.get_timeout() == 10.0
+    assert not runner.get_timed_out()
+
+    with pytest.raises(ValueError):
+        runner.set_timeout(-1.0)
+
+
 @pytest.mark.parametrize(
     ('n_threads','expected'),
     (
@@ -162,6 +195,23 @@ def test_assemble_arg_list_with_input(opts: tuple[int,int,bool],
     assert runner.assemble_arg_list(input_path) == expected
 
 
+@pytest.mark.parametrize(
+    ('opts','expected'),
+    (
+        ((1,2), ['proteus-opt','--n-threads=2','-i','moose-test.i']),
+        ((2,2), ['mpirun','-np','2','--cpu-set','0,1,2,3','--map-by','slot:PE=2',
+                 '--bind-to','core','proteus-opt','--n-threads=2','-i','moose-test.i']),
+    )
+)
+def test_assemble_arg_list_cpu_set(opts: tuple[int,int],
+                                   expected: list[str],
+                                   input_runner: MooseRunner) -> None:
+    input_runner.set_run_opts(opts[0],opts[1],False)
+    input_runner.set_cpu_set([0,1,2,3])
+    assert input_runner.get_num_cores() == opts[0]*opts[1]
+    assert input_runner.assemble_arg_list() == expected
+
+
 def test_assemble_arg_list_err(runner: MooseRunner) -> None:
     with pytest.raises(RuntimeError) as err_info:
         runner.assemble_arg_list()
@@ -230,4 +280,97 @@ def test_run_with_input(runner: MooseRunner, input_path: Path) -> None:
 
     assert os.path.isfile(runner.get_output_path()) is True, 'Exodus output does not exist when solve should have run' # type: ignore
     assert os.path.isfile(runner.get_input_dir() / 'stdout.processor.0') is True, 'Stdout does not exist when it should.' # type: ignore
-    assert hc.check_solve_converged(runner.get_input_dir() / 'stdout.processor.0') >= 1, 'Solve did not converge when it should have.' # type: ignore
\ No newline at end of file
+    assert hc.check_solve_converged(runner.get_input_dir() / 'stdout.processor.0') >= 1, 'Solve did not converge when it should have.' # type: ignore
+
+def test_write_batch_input(tmp_path: Path) -> None:
+    input_files = [tmp_path / 'sim-1.i', tmp_path / 'sim-2.i']
+    batch_path = tmp_path / 'batch-sim-1.i'
+    write_batch_input(batch_path,input_files)
+
+    batch_text = batch_path.read_text(encoding='utf-8')
+    assert "input_files = 'sim-1.i sim-2.i'" in batch_text
+    assert "positions = '0 0 0 0 0 0'" in batch_text
+    assert "'Outputs/file_base=sim-1_out' 'Outputs/file_base=sim-2_out'" in batch_text
+    assert 'type = FullSolveMultiApp' in batch_text
+
+
+def test_write_batch_input_sub_dirs(tmp_path: Path) -> None:
+    input_files = [tmp_path / 'batch-1' / 'sim-1.i',
+                   tmp_path / 'batch-2' / 'sim-1.i']
+    for ff in input_files:
+        ff.parent.mkdir()
+        ff.write_text('',encoding='utf-8')
+
+    batch_dir = get_batch_dir(input_files)
+    assert batch_dir == tmp_path.absolute()
+
+    batch_path = batch_dir / 'batch-sim-1.i'
+    write_batch_input(batch_path,input_files)
+    batch_text = batch_path.read_text(encoding='utf-8')
+    assert "input_files = 'batch-1/sim-1.i batch-2/sim-1.i'" in batch_text
+    assert ("'Outputs/file_base=batch-1/sim-1_out' "
+            "'Outputs/file_base=batch-2/sim-1_out'") in batch_text
+
+
+def test_run_batch_err(runner: MooseRunner, input_path: Path,
+                       input_noexist: Path) -> None:
+    with pytest.raises(ValueError):
+        runner.run_batch([])
+
+    with pytest.raises(FileNotFoundError):
+        runner.run_batch([input_path,input_noexist])
+
+
+def test_run_batch(runner: MooseRunner, input_path: Path,
+                   tmp_path: Path) -> None:
+    input_files = [tmp_path / 'sim-1.i', tmp_path / 'sim-2.i']
+    for ff in input_files:
+        ff.write_text(input_path.read_text(encoding='utf-8'),encoding='utf-8')
+
+    runner.set_run_opts(1,1,True)
+    run_results = runner.run_batch(input_files)
+
+    for ff,rr in zip(input_files,run_results):
+        assert rr.status == 'ok'
+        assert rr.output_path == tmp_path / (ff.stem + '_out.e')
+        assert rr.output_exists
+
+
+def test_assemble_arg_list_timing(input_runner: MooseRunner) -> None:
+    input_runner.set_run_opts(1,1,True)
+    input_runner.set_timing_flag(True)
+    assert input_runner.assemble_arg_list() == ['proteus-opt','--n-threads=1',
+                                                '-i','moose-test.i','--timing',
+                                                '--redirect-stdout']
+
+
+def test_read_perf_graph(tmp_path: Path) -> None:
+    stdout_path = tmp_path / 'stdout.processor.0'
+    stdout_path.write_text('Time Step 1\n',encoding='utf-8')
+    assert read_perf_graph(stdout_path) == list([])
+
+    stdout_path.write_text(PERF_GRAPH,encoding='utf-8')
+    sections = read_perf_graph(stdout_path)
+
+    assert len(sections) == 8
+    assert sections[0] == {'section': 'MooseApp (main)','depth': 0,
+                           'calls': 1,'self_time': 0.01,'total_time': 1.0}
+    assert [ss['depth'] for ss in sections] == [0,1,2,2,1,2,2,3]
+    assert sections[5]['section'] == 'Transient::PicardSolve::solve'
+    assert sections[5]['calls'] == 4
+
+
+def test_get_timings(input_runner: MooseRunner, tmp_path: Path) -> None:
+    stdout_path = tmp_path / 'stdout.processor.0'
+    stdout_path.write_text(PERF_GRAPH,encoding='utf-8')
+    input_runner.set_run_result(RunResult(wall_time=1.5))
+    input_runner._run_result.stdout_path = stdout_path # type: ignore
+
+    assert input_runner.get_timings() == dict({})
+
+    input_runner.set_timing_flag(True)
+    timings = input_runner.get_timings()
+    assert timings['startup'] == pytest.approx(0.5)
+    assert timings['setup'] == pytest.approx(0.2)
+    assert timings['output'] == pytest.approx(0.24)
+    assert timings['solve'] == pytest.approx(0.6)
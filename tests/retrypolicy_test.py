@@ -0,0 +1,36 @@
+'''
+==============================================================================
+TEST: RetryPolicy
+
+Authors: Lloyd Fletcher
+==============================================================================
+'''
+import pytest
+from mooseherder.retrypolicy import RetryPolicy
+from mooseherder.simrunner import RunResult, RUN_FAILED, RUN_TIMED_OUT
+
+
+def test_should_retry() -> None:
+    policy = RetryPolicy(max_retries=2)
+    assert policy.should_retry(RunResult(status=RUN_FAILED),0)
+    assert policy.should_retry(RunResult(status=RUN_FAILED),1)
+    assert not policy.should_retry(RunResult(status=RUN_FAILED),2)
+    assert not policy.should_retry(RunResult(),0)
+    assert not policy.should_retry(RunResult(status=RUN_TIMED_OUT),0)
+
+    policy = RetryPolicy(retry_on=(RUN_FAILED,RUN_TIMED_OUT))
+    assert policy.should_retry(RunResult(status=RUN_TIMED_OUT),0)
+
+
+def test_get_backoff() -> None:
+    policy = RetryPolicy(max_retries=3,backoff=0.5,backoff_factor=2.0)
+    assert policy.get_backoff(1) == 0.5
+    assert policy.get_backoff(2) == 1.0
+    assert policy.get_backoff(3) == 2.0
+
+
+def test_retry_policy_err() -> None:
+    with pytest.raises(ValueError):
+        RetryPolicy(max_retries=-1)
+    with pytest.raises(ValueError):
+        RetryPolicy(backoff=-1.0)
@@ -0,0 +1,117 @@
+'''
+==============================================================================
+TEST: SimRunner helper functions
+
+Authors: Lloyd Fletcher
+==============================================================================
+'''
+import os
+import sys
+import time
+import asyncio
+from pathlib import Path
+from mooseherder.simrunner import (RunResult,
+                                   RUN_OK,
+                                   RUN_FAILED,
+                                   RUN_TIMED_OUT,
+                                   run_process,
+                                   run_process_async)
+
+
+def test_run_process(tmp_path: Path) -> None:
+    run_result = run_process(
+        [sys.executable,'-c','import sys; sys.exit(3)'],
+        cwd=tmp_path,timeout=30.0)
+    assert run_result.status == RUN_OK
+    assert run_result.exit_code == 3
+    assert run_result.wall_time > 0.0
+    assert run_result.peak_rss is None or run_result.peak_rss > 0
+
+
+def test_run_process_peak_rss() -> None:
+    run_result = run_process(
+        [sys.executable,'-c','x = bytearray(64*1024*1024); x[::4096] = b"1"*len(x[::4096])'])
+    assert run_result.exit_code == 0
+    if run_result.peak_rss is not None:
+        assert run_result.peak_rss > 64*1024*1024
+
+
+def test_run_process_timeout(tmp_path: Path) -> None:
+    # The child writes the pid of a grandchild so we can check that the whole
+    # process group is killed
+    pid_file = tmp_path / 'child.pid'
+    child_cmd = ('import subprocess,sys,time; '
+                 'pp = subprocess.Popen([sys.executable,"-c",'
+                 '"import time; time.sleep(60)"]); '
+                 f'open(r"{pid_file}","w").write(str(pp.pid)); '
+                 'time.sleep(60)')
+
+    start_time = time.perf_counter()
+    run_result = run_process([sys.executable,'-c',child_cmd],
+                             timeout=1.0,kill_wait=1.0)
+    assert run_result.status == RUN_TIMED_OUT
+    assert time.perf_counter() - start_time < 30.0
+
+    grandchild_pid = int(pid_file.read_text(encoding='utf-8'))
+    for _ in range(50):
+        try:
+            os.kill(grandchild_pid,0)
+        except ProcessLookupError:
+            break
+        time.sleep(0.1)
+    else:
+        raise AssertionError('Grandchild process was not killed.')
+
+
+def test_run_result_check_output(tmp_path: Path) -> None:
+    output_path = tmp_path / 'sim_out.e'
+
+    run_result = RunResult(exit_code=0)
+    run_result.check_output(output_path)
+    assert run_result.status == RUN_FAILED
+    assert not run_result.output_exists
+
+    output_path.write_text('output',encoding='utf-8')
+    run_result = RunResult(exit_code=0)
+    run_result.check_output(output_path)
+    assert run_result.status == RUN_OK
+    assert run_result.output_exists
+    assert run_result.output_size == len('output')
+
+    run_result = RunResult(exit_code=1)
+    run_result.check_output(output_path)
+    assert run_result.status == RUN_FAILED
+
+    run_result = RunResult(status=RUN_TIMED_OUT)
+    run_result.check_output(None)
+    assert run_result.status == RUN_TIMED_OUT
+
+
+def test_run_result_dict(tmp_path: Path) -> None:
+    run_result = RunResult(exit_code=0,
+                           wall_time=1.5,
+                           peak_rss=1024,
+                           stdout_path=tmp_path / 'stdout.processor.0')
+    run_result.check_output(tmp_path / 'sim_out.e')
+
+    result_dict = run_result.to_dict()
+    assert result_dict['stdout_path'] == str(tmp_path / 'stdout.processor.0')
+    assert RunResult.from_dict(result_dict) == run_result
+
+
+def test_run_process_async(tmp_path: Path) -> None:
+    run_result = asyncio.run(run_process_async(
+        [sys.executable,'-c','import sys; sys.exit(3)'],
+        cwd=tmp_path,timeout=30.0))
+    assert run_result.status == RUN_OK
+    assert run_result.exit_code == 3
+    assert run_result.wall_time > 0.0
+
+
+def test_run_process_async_timeout() -> None:
+    start_time = time.perf_counter()
+    run_result = asyncio.run(run_process_async(
+        [sys.executable,'-c','import time; time.sleep(60)'],
+        timeout=1.0,kill_wait=1.0))
+    assert run_result.status == RUN_TIMED_OUT
+    assert time.perf_counter() - start_time < 30.0
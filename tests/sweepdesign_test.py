@@ -0,0 +1,118 @@
+'''
+==============================================================================
+TEST: SweepDesign
+
+Authors: Lloyd Fletcher
+==============================================================================
+'''
+import numpy as np
+import pytest
+from mooseherder.sweepdesign import (FactorialDesign,
+                                     LatinHypercubeDesign,
+                                     HaltonDesign,
+                                     SobolDesign,
+                                     ZipDesign)
+
+
+@pytest.fixture()
+def chain_bounds() -> list[dict | None]:
+    return [{'lc': (0.1,0.5)},None,{'e_modulus': (1e9,2e9),'p_ratio': (0.3,0.4)}]
+
+
+def get_points(design) -> np.ndarray:
+    return np.array([[vv[0]['lc'],vv[2]['e_modulus'],vv[2]['p_ratio']]
+                     for vv in design])
+
+
+def test_factorial_design() -> None:
+    design = FactorialDesign([{'lc': [0.1,0.2]},None,
+                              {'e_modulus': [1e9,2e9],'p_ratio': [0.3,0.35]}])
+
+    nested = list([])
+    for ll in [0.1,0.2]:
+        for ee in [1e9,2e9]:
+            for pp in [0.3,0.35]:
+                nested.append([{'lc': ll},None,{'e_modulus': ee,'p_ratio': pp}])
+
+    assert len(design) == 8
+    assert list(design) == nested
+    assert design[-1] == nested[-1]
+    assert design[2:4] == nested[2:4]
+
+    with pytest.raises(IndexError):
+        _ = design[8]
+
+
+def test_factorial_design_err() -> None:
+    with pytest.raises(ValueError):
+        FactorialDesign([{'lc': []}])
+
+
+def test_unit_cube_design_err(chain_bounds: list[dict | None]) -> None:
+    with pytest.raises(ValueError):
+        SobolDesign(chain_bounds,0)
+    with pytest.raises(ValueError):
+        HaltonDesign([None],4)
+    with pytest.raises(ValueError):
+        SobolDesign([{f'x{ii}': (0.0,1.0) for ii in range(22)}],4)
+
+
+def test_latin_hypercube_design(chain_bounds: list[dict | None]) -> None:
+    design = LatinHypercubeDesign(chain_bounds,20,seed=7)
+    points = get_points(design)
+
+    assert len(design) == 20
+    assert all(vv[1] is None for vv in design)
+    # Each stratum of each variable is sampled once
+    lower = np.array([0.1,1e9,0.3])
+    upper = np.array([0.5,2e9,0.4])
+    strata = np.floor((points-lower)/(upper-lower)*20).astype(int)
+    for dd in range(3):
+        assert sorted(strata[:,dd]) == list(range(20))
+
+    # Points are the same however they are accessed
+    assert design[5] == list(design)[5]
+    assert list(LatinHypercubeDesign(chain_bounds,20,seed=7)) == list(design)
+
+
+def test_halton_design() -> None:
+    design = HaltonDesign([{'x': (0.0,1.0),'y': (0.0,1.0)}],4)
+    points = np.array([[vv[0]['x'],vv[0]['y']] for vv in design])
+    expected = np.array([[1/2,1/3],[1/4,2/3],[3/4,1/9],[1/8,4/9]])
+    assert np.allclose(points,expected)
+
+
+def test_sobol_design() -> None:
+    design = SobolDesign([{'x': (0.0,1.0),'y': (0.0,1.0),'z': (0.0,1.0)}],8)
+    points = np.array([[vv[0]['x'],vv[0]['y'],vv[0]['z']] for vv in design])
+    expected = np.array([[0.0,0.0,0.0],
+                         [0.5,0.5,0.5],
+                         [0.75,0.25,0.25],
+                         [0.25,0.75,0.75],
+                         [0.375,0.375,0.625],
+                         [0.875,0.875,0.125],
+                         [0.625,0.125,0.875],
+                         [0.125,0.625,0.375]])
+    assert np.allclose(points,expected)
+
+
+def test_sobol_design_stratified() -> None:
+    num_dims = 21
+    design = SobolDesign([{f'x{ii}': (0.0,1.0) for ii in range(num_dims)}],256)
+    points = np.array([list(vv[0].values()) for vv in design])
+    for dd in range(num_dims):
+        assert len(set(np.floor(points[:,dd]*256).astype(int))) == 256
+
+
+def test_zip_design(chain_bounds: list[dict | None]) -> None:
+    gmsh_design = SobolDesign([{'lc': (0.1,0.5)}],8)
+    moose_design = FactorialDesign([{'e_modulus': [1e9,2e9,3e9,4e9],
+                                     'p_ratio': [0.3,0.35]}])
+    design = ZipDesign([gmsh_design,moose_design])
+
+    assert len(design) == 8
+    for ii,vv in enumerate(design):
+        assert vv == gmsh_design[ii] + moose_design[ii]
+
+    with pytest.raises(ValueError):
+        ZipDesign([gmsh_design,SobolDesign(chain_bounds,4)])
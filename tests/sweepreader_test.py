@@ -5,9 +5,17 @@ TEST: SweepReader
 Authors: Lloyd Fletcher
 ==============================================================================
 '''
+from pathlib import Path
 import pytest
-from mooseherder.sweepreader import SweepReader
+import numpy as np
+from mooseherder.sweepreader import (SweepReader,
+                                     NpyArrayRef,
+                                     sim_data_to_npy,
+                                     sim_data_from_npy,
+                                     aggregate_timings)
+from mooseherder.simdata import SimData
 from mooseherder.directorymanager import DirectoryManager
+from mooseherder.simrunner import RunResult, RUN_FAILED
 import tests.herdchecker as hc
 
 
@@ -32,3 +40,107 @@ def test_init_sweep_reader(sweep_reader: SweepReader) -> None:
 
 def test_read_output_key(sweep_reader: SweepReader) -> None:
     pass
+
+
+def test_read_results_sequential_lazy(sweep_reader: SweepReader) -> None:
+    sweep_results = sweep_reader.read_results_sequential(lazy=True)
+    assert len(sweep_results) == len(sweep_reader.get_output_files())
+
+    data = sweep_results[0][0]
+    assert data is not None
+    assert not data.node_vars.is_cached('disp_x') # type: ignore
+    assert data.node_vars['disp_x'].shape[0] > 0 # type: ignore
+
+
+def test_read_results_para_mem_map(sweep_reader: SweepReader) -> None:
+    sweep_results = sweep_reader.read_results_para(mem_map=True)
+    check_results = sweep_reader.read_results_sequential()
+    assert len(sweep_results) == len(check_results)
+
+    for (rr,cc) in zip(sweep_results,check_results):
+        data = rr[0]
+        check = cc[0]
+        assert isinstance(data.coords,np.memmap)
+        assert (data.coords == check.coords).all() # type: ignore
+        for nn in check.node_vars: # type: ignore
+            assert isinstance(data.node_vars[nn],np.memmap) # type: ignore
+            assert (data.node_vars[nn] == check.node_vars[nn]).all() # type: ignore
+
+
+def test_sim_data_to_from_npy(tmp_path) -> None:
+    data = SimData(time=np.array([0.0,1.0]),
+                   glob_vars={'react_y': np.array([1.0,2.0])},
+                   side_sets={('top','node'): None}) # type: ignore
+    sim_data_to_npy(data,tmp_path,'sim-1')
+    assert isinstance(data.time,NpyArrayRef)
+    assert isinstance(data.glob_vars['react_y'],NpyArrayRef) # type: ignore
+
+    sim_data_from_npy(data)
+    assert (data.time == np.array([0.0,1.0])).all()
+    assert (data.glob_vars['react_y'] == np.array([1.0,2.0])).all() # type: ignore
+    assert data.side_sets[('top','node')] is None # type: ignore
+
+
+def test_read_output_key_skip_failed(tmp_path: Path) -> None:
+    dir_manager = DirectoryManager(1)
+    dir_manager.set_base_dir(tmp_path)
+    dir_manager.create_dirs()
+
+    output_files = [[None,tmp_path / 'sim-1_out.e'],
+                    [None,tmp_path / 'sim-2_out.e']]
+    dir_manager.set_output_paths(output_files)
+    dir_manager.write_output_key(1)
+
+    reader = SweepReader(dir_manager)
+    # No run results written so nothing is skipped
+    assert reader.read_output_key(1,skip_failed=True) == output_files
+
+    run_results = [[RunResult(),RunResult(exit_code=0)],
+                   [RunResult(),RunResult(status=RUN_FAILED,exit_code=1)]]
+    dir_manager.write_run_results(run_results,1)
+
+    assert reader.read_run_results(1) == run_results
+    assert reader.read_output_key(1) == output_files
+    assert reader.read_output_key(1,skip_failed=True) == [output_files[0],
+                                                          [None,None]]
+
+    with pytest.raises(FileNotFoundError):
+        reader.read_run_results(2)
+
+
+def test_read_timings(tmp_path: Path) -> None:
+    dir_manager = DirectoryManager(1)
+    dir_manager.set_base_dir(tmp_path)
+    dir_manager.create_dirs()
+    reader = SweepReader(dir_manager)
+
+    for ss in (1,2):
+        dir_manager.set_output_paths([[None,None],[None,None]])
+        dir_manager.write_output_key(ss)
+        run_results = [[RunResult(timings={'render': 0.1*ss,'run': 1.0*ss}),
+                        RunResult(timings={'run': 2.0*ss,'run:solve': 1.5*ss,
+                                           'read': 0.5*ss})],
+                       None]
+        dir_manager.write_run_results(run_results,ss)
+
+    timings = reader.read_timings(1)
+    assert len(timings) == 5
+    assert timings[0] == {'sweep_iter': 1,'sweep_ind': 0,'chain_pos': 0,
+                          'status': 'ok','stage': 'render',
+                          'section': 'total','time': 0.1}
+    assert [(tt['stage'],tt['section']) for tt in timings[2:]] == \
+        [('run','total'),('run','solve'),('read','total')]
+
+    timings = reader.read_timings()
+    assert len(timings) == 10
+    assert [tt['sweep_iter'] for tt in timings] == [1]*5 + [2]*5
+
+    summary = aggregate_timings(timings,('stage','section'))
+    assert summary[1] == {'stage': 'run','section': 'total','count': 4,
+                          'total': 9.0,'mean': 2.25,'min': 1.0,'max': 4.0}
+    assert [(ss['stage'],ss['section']) for ss in summary] == \
+        [('render','total'),('run','total'),('run','solve'),('read','total')]
+
+
+def test_aggregate_timings_empty() -> None:
+    assert aggregate_timings(list([])) == list([])
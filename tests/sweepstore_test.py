@@ -0,0 +1,79 @@
+'''
+==============================================================================
+TEST: SweepStore
+
+Authors: Lloyd Fletcher
+==============================================================================
+'''
+from pathlib import Path
+import pytest
+import numpy as np
+from mooseherder.sweepreader import SweepReader
+from mooseherder.sweepstore import SweepStoreWriter, read_sweep_store
+from mooseherder.directorymanager import DirectoryManager
+from mooseherder.simdata import SimData
+import tests.herdchecker as hc
+
+
+@pytest.fixture
+def sweep_reader() -> SweepReader:
+    dir_manager = DirectoryManager(hc.NUM_DIRS)
+    dir_manager.set_base_dir(hc.OUTPUT_PATH)
+    return SweepReader(dir_manager)
+
+
+def test_write_sweep_store(sweep_reader: SweepReader, tmp_path: Path) -> None:
+    store_path = sweep_reader.write_sweep_store(tmp_path / 'sweep.nc')
+    assert store_path.is_file()
+
+    (sim_data,sweep_vars) = read_sweep_store(store_path)
+    sweep_results = sweep_reader.read_results_sequential()
+    num_sims = len(sweep_results)
+
+    assert sim_data['node_disp_x'].shape[0] == num_sims
+    assert len(sweep_vars) == 1
+    assert sweep_vars[0]['e_modulus'].shape == (num_sims,)
+
+    for ii,rr in enumerate(sweep_results):
+        data = rr[-1]
+        num_nodes = sim_data['num_nodes'][ii]
+        num_steps = sim_data['num_time_steps'][ii]
+        assert num_nodes == data.coords.shape[0] # type: ignore
+        assert num_steps == data.time.shape[0] # type: ignore
+        assert (sim_data['time'][ii,:num_steps] == data.time).all() # type: ignore
+        assert (sim_data['node_disp_y'][ii,:num_steps,:num_nodes] ==
+                data.node_vars['disp_y'].T).all() # type: ignore
+        assert (sim_data['connect1'][ii,:data.connect['connect1'].shape[1],:] ==
+                data.connect['connect1'].T).all() # type: ignore
+        # Smaller meshes are padded with NaN
+        assert np.isnan(sim_data['coords'][ii,num_nodes:,:]).all()
+
+
+def test_write_sweep_vars(tmp_path: Path) -> None:
+    sweep_vars = [[{'p0': 1.0, 'mesh': 'fine'},None],
+                  [{'p0': 2.0},{'e_mod': 1e9}]]
+
+    with SweepStoreWriter(tmp_path / 'sweep.nc',len(sweep_vars)) as store:
+        store.write_sim(0,SimData(time=np.array([0.0,1.0]),
+                                  glob_vars={'react_y': np.array([3.0,4.0])}))
+        store.write_sweep_vars(sweep_vars)
+
+    (sim_data,check_vars) = read_sweep_store(tmp_path / 'sweep.nc')
+    assert (sim_data['time'][0,:] == np.array([0.0,1.0])).all()
+    assert np.isnan(sim_data['time'][1,:]).all()
+    assert (sim_data['glob_react_y'][0,:] == np.array([3.0,4.0])).all()
+    assert len(check_vars) == 2
+    assert (check_vars[0]['p0'] == np.array([1.0,2.0])).all()
+    assert tuple(check_vars[0]['mesh']) == ('fine','')
+    assert np.isnan(check_vars[1]['e_mod'][0])
+    assert check_vars[1]['e_mod'][1] == 1e9
+
+
+def test_sweep_store_path_err(tmp_path: Path) -> None:
+    with pytest.raises(FileNotFoundError):
+        SweepStoreWriter(tmp_path / 'no_exist' / 'sweep.nc',1)
+
+
+def test_read_sweep_store_err(tmp_path: Path) -> None:
+    with pytest.raises(FileNotFoundError):
+        read_sweep_store(tmp_path / 'no_exist.nc')
@@ -0,0 +1,135 @@
+'''
+==============================================================================
+TEST: SweepTelemetry
+
+Authors: Lloyd Fletcher
+==============================================================================
+'''
+import json
+import time
+import threading
+import urllib.request
+from pathlib import Path
+import pytest
+from mooseherder.simrunner import RunResult, RUN_FAILED, RUN_SKIPPED
+from mooseherder.directorymanager import DirectoryManager
+from mooseherder.sweeptelemetry import SweepTelemetry, get_chain_status
+
+
+@pytest.fixture()
+def dir_manager(tmp_path: Path) -> DirectoryManager:
+    dir_manager = DirectoryManager(1)
+    dir_manager.set_base_dir(tmp_path)
+    return dir_manager
+
+
+def test_get_chain_status() -> None:
+    assert get_chain_status([RunResult(),RunResult()]) == 'ok'
+    assert get_chain_status([RunResult(status=RUN_FAILED),
+                             RunResult(status=RUN_SKIPPED)]) == 'failed'
+
+
+def test_telemetry_status(dir_manager: DirectoryManager) -> None:
+    statuses = list([])
+    with SweepTelemetry(callback=statuses.append,update_time=0.0) as telemetry:
+        telemetry.start_sweep(dir_manager,1,4,2)
+        assert statuses[-1]['state'] == 'running'
+        assert statuses[-1]['queue_depth'] == 4
+        assert statuses[-1]['eta'] is None
+
+        telemetry.chain_started(0,'1',start_time=100.0)
+        telemetry.chain_started(1,'2',start_time=101.0)
+        status = telemetry.get_status()
+        assert status['num_running'] == 2
+        assert status['queue_depth'] == 2
+
+        telemetry.chain_ended(0,[RunResult()],end_time=110.0)
+        telemetry.chain_ended(1,[RunResult(status=RUN_FAILED)],end_time=111.0)
+        status = statuses[-1]
+        assert status['num_completed'] == 2
+        assert status['num_running'] == 0
+        assert status['queue_depth'] == 2
+        assert status['status_counts'] == {'ok': 1,'failed': 1}
+        assert status['completed_per_min'] > 0.0
+        assert status['eta'] == pytest.approx(status['elapsed'],rel=0.1)
+        assert [cc['sweep_ind'] for cc in status['chains']] == [0,1]
+        assert status['chains'][0]['worker'] == '1'
+        assert status['chains'][0]['run_time'] == 10.0
+
+        telemetry.end_sweep()
+
+    with open(dir_manager.get_status_file(),'r',encoding='utf-8') as sf:
+        status = json.load(sf)
+    assert status['state'] == 'done'
+    assert status['num_completed'] == 2
+
+
+def test_telemetry_late_start(dir_manager: DirectoryManager) -> None:
+    telemetry = SweepTelemetry(write_status=False)
+    telemetry.start_sweep(dir_manager,1,1,1)
+    # Worker starts can be read from the start queue after the chain ends
+    telemetry.chain_ended(0,[RunResult()],end_time=105.0)
+    telemetry.chain_started(0,'1',start_time=100.0)
+    telemetry.end_sweep()
+
+    status = telemetry.get_status()
+    assert status['num_running'] == 0
+    assert status['chains'][0]['run_time'] == 5.0
+    assert not dir_manager.get_status_file().exists()
+
+
+def test_telemetry_concurrent_update(dir_manager: DirectoryManager) -> None:
+    in_callback = list([0])
+    overlaps = list([])
+
+    def callback(status: dict) -> None: # pylint: disable=unused-argument
+        in_callback[0] += 1
+        overlaps.append(in_callback[0] > 1)
+        time.sleep(0.001)
+        in_callback[0] -= 1
+
+    errors = list([])
+    telemetry = SweepTelemetry(callback=callback,update_time=0.0)
+    telemetry.start_sweep(dir_manager,1,4,2)
+
+    def run_updates() -> None:
+        try:
+            for _ in range(50):
+                telemetry.update()
+        except Exception as err: # pylint: disable=broad-exception-caught
+            errors.append(err)
+
+    threads = [threading.Thread(target=run_updates) for _ in range(4)]
+    for tt in threads:
+        tt.start()
+    for ii in range(4):
+        telemetry.chain_ended(ii,[RunResult()])
+    for tt in threads:
+        tt.join()
+    telemetry.end_sweep()
+
+    assert errors == []
+    assert not any(overlaps)
+    with open(dir_manager.get_status_file(),'r',encoding='utf-8') as sf:
+        assert json.load(sf)['num_completed'] == 4
+    assert not list(dir_manager.get_status_file().parent.glob('*.tmp'))
+
+
+def test_telemetry_metrics(dir_manager: DirectoryManager) -> None:
+    with SweepTelemetry(write_status=False,metrics_port=0) as telemetry:
+        telemetry.start_sweep(dir_manager,2,3,2)
+        telemetry.chain_started(0)
+        telemetry.chain_ended(0,[RunResult()])
+
+        port = telemetry.get_metrics_port()
+        assert port is not None
+        with urllib.request.urlopen(f'http://127.0.0.1:{port}/metrics') as resp:
+            text = resp.read().decode('utf-8')
+
+        assert 'mooseherd_sweep_iter 2' in text
+        assert 'mooseherd_chains_total 3' in text
+        assert 'mooseherd_queue_depth 2' in text
+        assert 'mooseherd_chains_completed{status="ok"} 1' in text
+        assert 'mooseherd_sweep_running 1' in text
+
+    assert telemetry.get_metrics_port() is None